@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import urllib.error
+import urllib.request
+from html import escape
+
+# 图片资源目录：source 存放原图（手动放入或 --fetch 下载），build 存放按显示尺寸生成、以内容哈希命名的缩略图
+ASSET_DIR = os.environ.get('NFL_ASSET_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets'))
+SOURCE_DIR = os.path.join(ASSET_DIR, 'source')
+BUILD_DIR = os.path.join(ASSET_DIR, 'build')
+MANIFEST_NAME = 'manifest.json'
+
+# 静态文件的URL前缀；文件名含内容哈希，内容变化即换名，浏览器可缓存一年
+ASSET_URL_PATH = '/assets'
+ASSET_CACHE_AGE = 365 * 24 * 3600
+
+# 主页图片：名称 → (原图地址, 显示宽度, 显示高度, 说明文字)，尺寸与主页中的布局一致
+HOME_IMAGES = {
+    'banner': ('https://static.www.nfl.com/image/upload/t_q-best/league/rtnvdxwvnde041y3a7t8', 1280, 256,
+               'NFL比赛数据分析平台'),
+    'players': ('https://pic1.zhimg.com/v2-435904cdd13640d507ca59edc5a98a42_1440w.jpg', 320, 192, 'NFL球员风采'),
+    'highlights': ('https://static.www.nfl.com/image/upload/f_auto,q_auto,dpr_2.0/league/lu2uwwwknoaxjahas6ni',
+                   320, 192, '精彩比赛瞬间'),
+    'tactics': ('https://ts1.tc.mm.bing.net/th/id/OIP-C.MH4CP4_l6en7cJvrF2nXgQHaJ-?r=0&rs=1&pid=ImgDetMain',
+                320, 192, '战术数据分析'),
+}
+
+# 可识别的原图格式（按响应类型决定下载后的扩展名）
+SOURCE_EXTENSIONS = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.webp': 'image/webp'}
+
+# 缩略图编码参数与下载超时
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+FETCH_TIMEOUT = 10
+
+# 缺少原图时占位图的配色（与仪表盘主色一致）
+PLACEHOLDER_COLORS = ('#1E3A8A', '#F97316')
+
+
+def find_source(name, source_dir=SOURCE_DIR):
+    """返回名为 name 的原图路径（任一可识别的扩展名），不存在时返回 None"""
+    for extension in SOURCE_EXTENSIONS:
+        path = os.path.join(source_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def fetch_sources(source_dir=SOURCE_DIR, images=HOME_IMAGES, timeout=FETCH_TIMEOUT, report=print):
+    """下载尚未放入 source_dir 的原图；下载失败只输出提示，构建时改用占位图"""
+    os.makedirs(source_dir, exist_ok=True)
+    for name, (url, _, _, _) in images.items():
+        if find_source(name, source_dir) is not None:
+            continue
+        request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                content_type = response.headers.get_content_type()
+                data = response.read()
+        except (urllib.error.URLError, OSError) as e:
+            report(f"  - {name}: 下载失败 ({e})，将使用占位图")
+            continue
+        extension = next((ext for ext, mime in SOURCE_EXTENSIONS.items() if mime == content_type), '.jpg')
+        with open(os.path.join(source_dir, name + extension), 'wb') as f:
+            f.write(data)
+        report(f"  - {name}: 已下载 {len(data) / 1024:.0f} KB")
+
+
+def _source_signature(path):
+    """原图的 (文件名, 大小, 修改时间)，用于判断是否需要重新构建"""
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return [os.path.basename(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _hashed_name(name, data, extension):
+    return f"{name}.{hashlib.sha256(data).hexdigest()[:10]}{extension}"
+
+
+def render_thumbnails(path, width, height):
+    """按显示尺寸居中裁切缩放（与 object-cover 一致），返回 {'webp': 字节, 'jpeg': 字节}"""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    encoded = {}
+    for key, options in (('webp', {'format': 'WEBP', 'quality': WEBP_QUALITY, 'method': 6}),
+                         ('jpeg', {'format': 'JPEG', 'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True})):
+        buffer = io.BytesIO()
+        image.save(buffer, **options)
+        encoded[key] = buffer.getvalue()
+    return encoded
+
+
+def placeholder_svg(width, height, label):
+    """缺少原图时使用的SVG占位图（渐变底色加说明文字），不依赖任何图像库"""
+    start, end = PLACEHOLDER_COLORS
+    font_size = max(14, min(height // 6, 40))
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}">'
+            f'<defs><linearGradient id="g" x1="0" y1="0" x2="1" y2="1">'
+            f'<stop offset="0" stop-color="{start}"/><stop offset="1" stop-color="{end}"/></linearGradient></defs>'
+            f'<rect width="100%" height="100%" fill="url(#g)"/>'
+            f'<text x="50%" y="50%" fill="#fff" font-family="sans-serif" font-size="{font_size}" '
+            f'text-anchor="middle" dominant-baseline="middle">{escape(label)}</text></svg>').encode('utf-8')
+
+
+def build_assets(source_dir=SOURCE_DIR, build_dir=BUILD_DIR, images=HOME_IMAGES, report=print):
+    """为每张图片生成显示尺寸的WebP与JPEG缩略图（缺少原图时为SVG占位图），写入清单并返回清单
+
+    未安装Pillow时原图以内容哈希命名原样发布。构建结果中不再被清单引用的旧文件会被删除。
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    has_pillow = importlib.util.find_spec('PIL') is not None
+    manifest = {}
+    for name, (_, width, height, label) in images.items():
+        path = find_source(name, source_dir)
+        files = None
+        if path is not None and has_pillow:
+            try:
+                files = {key: (data, '.jpg' if key == 'jpeg' else '.webp')
+                         for key, data in render_thumbnails(path, width, height).items()}
+            except OSError as e:
+                report(f"  - {name}: 无法读取原图 {path} ({e})，改用占位图")
+        elif path is not None:
+            with open(path, 'rb') as f:
+                files = {'original': (f.read(), os.path.splitext(path)[1].lower())}
+        if files is None:
+            files = {'svg': (placeholder_svg(width, height, label), '.svg')}
+
+        entry = {'width': width, 'height': height, 'label': label, 'source': _source_signature(path), 'files': {}}
+        for key, (data, extension) in files.items():
+            filename = _hashed_name(name, data, extension)
+            target = os.path.join(build_dir, filename)
+            if not os.path.exists(target):
+                with open(target + '.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(target + '.tmp', target)
+            entry['files'][key] = filename
+        manifest[name] = entry
+        sizes = ', '.join(f"{key} {len(data) / 1024:.1f} KB" for key, (data, _) in files.items())
+        report(f"  - {name}: {width}×{height} {sizes}{' (占位图)' if 'svg' in files else ''}")
+
+    manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    referenced = {filename for entry in manifest.values() for filename in entry['files'].values()}
+    for filename in os.listdir(build_dir):
+        if filename != MANIFEST_NAME and filename not in referenced and not filename.endswith('.tmp'):
+            os.remove(os.path.join(build_dir, filename))
+    return manifest
+
+
+def load_manifest(build_dir=BUILD_DIR):
+    """读取构建清单；不存在或无法解析时返回 None"""
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_current(manifest, source_dir=SOURCE_DIR, build_dir=BUILD_DIR, images=HOME_IMAGES):
+    """清单是否覆盖全部图片、原图未变化且引用的文件都存在"""
+    if manifest is None or set(manifest) != set(images):
+        return False
+    for name, (_, width, height, _) in images.items():
+        entry = manifest[name]
+        if (entry.get('width'), entry.get('height')) != (width, height):
+            return False
+        if entry.get('source') != _source_signature(find_source(name, source_dir)):
+            return False
+        if not all(os.path.exists(os.path.join(build_dir, filename)) for filename in entry['files'].values()):
+            return False
+    return True
+
+
+def prepare_assets(source_dir=SOURCE_DIR, build_dir=BUILD_DIR, report=print):
+    """启动时调用：清单是最新的则直接使用，否则在本地重新构建（不联网，缺少的原图用占位图）"""
+    manifest = load_manifest(build_dir)
+    if is_current(manifest, source_dir, build_dir):
+        return manifest
+    report("正在构建主页图片资源...")
+    return build_assets(source_dir, build_dir, report=report)
+
+
+def asset_url(filename):
+    return f"{ASSET_URL_PATH}/{filename}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='构建主页图片资源：按显示尺寸生成WebP/JPEG缩略图，以内容哈希命名')
+    parser.add_argument('--fetch', action='store_true', help='先从原始地址下载尚未放入源目录的图片')
+    parser.add_argument('--source-dir', default=SOURCE_DIR, help='原图目录（文件名为 <图片名>.jpg/.png/.webp）')
+    parser.add_argument('--build-dir', default=BUILD_DIR, help='构建结果目录')
+    args = parser.parse_args()
+    if args.fetch:
+        print("正在下载原图...")
+        fetch_sources(args.source_dir)
+    print("正在构建图片资源...")
+    build_assets(args.source_dir, args.build_dir)
+    print(f"清单已写入 {os.path.join(args.build_dir, MANIFEST_NAME)}")
+
+
+if __name__ == '__main__':
+    main()
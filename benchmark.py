@@ -0,0 +1,243 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from cube import build_pass_cube, query_pass_metrics, query_situational_metrics
+from drives import add_game_state_columns, build_drive_table
+from figure_cache import FIGURE_CACHE
+from metrics import compute_pass_metrics
+from nfl_app import (DISTRIBUTION_MODES, build_yards_distribution_figure, create_pass_analysis_section,
+                     create_expected_points_section, create_play_type_section, create_player_lookup_section,
+                     create_player_overview_section, create_situational_section, create_team_comparison_section,
+                     preprocess_data)
+from play_parser import parse_play_descriptions
+from player_index import PlayerIndex, build_player_stats
+from profiling import PeakMemorySampler, rss_reader
+from schema import read_table
+from situational import build_ep_table, situation_frame
+from streaming import stream_pass_cube
+from synthetic_data import FILE_NAMES, SIZES, dataset_dir_name, write_dataset
+
+# 生成的数据与基线文件的默认位置
+BENCH_DATA_DIR = os.environ.get('NFL_BENCH_DATA_DIR', '.bench_data')
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+# 耗时或峰值内存超过基线的比例（且超过绝对阈值）时判为退化，避免毫秒级抖动误报
+DEFAULT_TOLERANCE = 0.25
+MIN_SECONDS_DELTA = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+# 筛选后查询使用的示例条件（单支进攻球队）
+SAMPLE_FILTERS = {'offense': ['KC']}
+
+# 流式构建时把数据集分成的块数（保证各规模都分成多块，覆盖跨块比赛的处理）
+STREAM_CHUNKS = 10
+
+# 球员检索的示例输入（逐字输入的前缀、姓氏前缀、拼写错误）
+SAMPLE_QUERIES = ['t', 'to', 'tom', 'tom s', 'smi', 'jonhson']
+
+
+def measure(func, repeat=1):
+    """执行func：第一次执行时记录峰值内存（兼作预热），再按repeat次计时取最小值
+
+    峰值内存优先采样进程常驻内存；无法读取时退回tracemalloc（结果准确但明显更慢）。
+    首次调用的导入、缓存开销不会计入耗时。返回 (结果, 秒, 峰值MB)。
+    """
+    read_rss = rss_reader()
+    if read_rss is not None:
+        with PeakMemorySampler(read_rss, collect=True) as sampler, contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        peak_mb = sampler.peak_mb
+    else:
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return result, seconds, peak_mb
+
+
+def render_section(render):
+    """在独立容器中构建板块界面后删除，避免多次测量时界面元素累积"""
+    from nicegui import ui
+    with ui.element() as container:
+        render()
+    container.delete()
+
+
+def run_size(size, data_dir, repeat=1, seed=0):
+    """对一个规模的数据集执行全部阶段，返回 {阶段: {'seconds', 'peak_mb'}}"""
+    n_plays = SIZES[size]
+    out_dir = os.path.join(data_dir, dataset_dir_name(size, seed))
+    paths = {name: os.path.join(out_dir, file_name) for name, file_name in FILE_NAMES.items()}
+    if not all(os.path.exists(path) for path in paths.values()):
+        print(f"正在生成 {size} 合成数据集...")
+        paths = write_dataset(out_dir, n_plays, seed)
+
+    results = {}
+
+    def stage(name, func):
+        result, seconds, peak_mb = measure(func, repeat)
+        results[name] = {'seconds': round(seconds, 6), 'peak_mb': round(peak_mb, 3)}
+        print(f"  - {name:<40} {seconds * 1000:>10.1f} ms {peak_mb:>10.1f} MB")
+        return result
+
+    # CSV解析
+    tables = {name: stage(f"parse:{name}", lambda name=name, path=path: read_table(name, path))
+              for name, path in paths.items()}
+    stage('parse:play_descriptions', lambda: parse_play_descriptions(tables['plays']['playDescription']))
+
+    # 预处理与合并（预处理会原地添加列，每次都从解析结果的副本开始）
+    def preprocess():
+        return preprocess_data(*(tables[name].copy() for name in ('players', 'plays', 'games', 'scouting')))
+    players_df, merged_df, _, _ = stage('preprocess', preprocess)
+    # 比赛状态列已在预处理中追加，这里单独计时（重算结果相同，原地覆盖）
+    stage('preprocess:game_state', lambda: add_game_state_columns(merged_df))
+
+    # 球员索引：逐球员聚合、索引构建与自动补全检索
+    player_stats = stage('index:player_stats', lambda: build_player_stats(merged_df, tables['scouting']))
+    player_index = stage('index:build', lambda: PlayerIndex(players_df, player_stats))
+    stage('index:search', lambda: [player_index.search(query) for query in SAMPLE_QUERIES])
+
+    # 各板块的聚合
+    stage('aggregate:compute_pass_metrics', lambda: compute_pass_metrics(merged_df))
+    ep_table = stage('aggregate:ep_table', lambda: build_ep_table(merged_df))
+    stage('aggregate:situation_frame', lambda: situation_frame(merged_df, ep_table))
+    stage('aggregate:drive_table', lambda: build_drive_table(merged_df))
+    cube = stage('aggregate:pass_cube', lambda: build_pass_cube(merged_df, ep_table))
+    metrics = stage('aggregate:query_pass_metrics', lambda: query_pass_metrics(cube))
+    filtered = stage('aggregate:query_pass_metrics_filtered', lambda: query_pass_metrics(cube, SAMPLE_FILTERS))
+    situations = stage('aggregate:query_situations', lambda: query_situational_metrics(cube))
+    stage('aggregate:query_situations_filtered', lambda: query_situational_metrics(cube, SAMPLE_FILTERS))
+
+    # 流式模式：plays与球探数据分块读取并折叠进立方体
+    chunk_size = max(n_plays // STREAM_CHUNKS, 1000)
+    stage('stream:pass_cube', lambda: stream_pass_cube(paths['plays'], paths['scouting'], tables['games'],
+                                                       chunk_size, report=lambda *args: None))
+
+    # 图表构建与序列化
+    for mode in DISTRIBUTION_MODES:
+        stage(f"figure:yards-{mode}",
+              lambda mode=mode: build_yards_distribution_figure(metrics['yard_counts'], mode).to_json())
+
+    # 板块渲染：cold 为清空图表缓存后的首次渲染（含图表构建与序列化），warm 为缓存命中时的渲染
+    sections = {
+        'player-overview': lambda: create_player_overview_section(players_df),
+        'pass-analysis': lambda: create_pass_analysis_section(metrics),
+        'pass-analysis-filtered': lambda: create_pass_analysis_section(filtered, SAMPLE_FILTERS),
+        'play-type': lambda: create_play_type_section(metrics),
+        'team-comparison': lambda: create_team_comparison_section(metrics),
+        'team-comparison-filtered': lambda: create_team_comparison_section(filtered, SAMPLE_FILTERS),
+        'player-lookup': lambda: create_player_lookup_section(player_index),
+        'situational': lambda: create_situational_section(situations, ep_table),
+        'expected-points': lambda: create_expected_points_section(situations, ep_table),
+    }
+    for name, render in sections.items():
+        def cold(render=render):
+            FIGURE_CACHE.clear()
+            render_section(render)
+        stage(f"render:{name}:cold", cold)
+        stage(f"render:{name}:warm", lambda render=render: render_section(render))
+    FIGURE_CACHE.clear()
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """与基线比较，返回退化项列表 [(规模, 阶段, 指标, 基线值, 当前值)]"""
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            base = baseline.get('sizes', {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            for metric, min_delta in (('seconds', MIN_SECONDS_DELTA), ('peak_mb', MIN_MEMORY_DELTA_MB)):
+                if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > min_delta:
+                    regressions.append((size, name, metric, base[metric], current[metric]))
+    return regressions
+
+
+def environment():
+    """记录运行环境，基线只应与同一环境下的结果比较"""
+    import numpy
+    import plotly
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': numpy.__version__,
+        'plotly': plotly.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NFL数据分析平台性能基准：分阶段计时并记录峰值内存')
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'], choices=list(SIZES),
+                        help='要测量的数据规模（回合数）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段计时的重复次数（取最小值）')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据的随机种子')
+    parser.add_argument('--data-dir', default=BENCH_DATA_DIR, help='合成数据集的存放目录（已生成的数据会被复用）')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线结果文件')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果写入基线文件')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许超过基线的比例')
+    parser.add_argument('--output', default=None, help='另存本次结果的JSON文件')
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        print(f"规模 {size}（约 {SIZES[size]:,} 个回合）:")
+        results[size] = run_size(size, args.data_dir, args.repeat, args.seed)
+
+    report = {'environment': environment(), 'sizes': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        baseline = {'sizes': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline['environment'] = report['environment']
+        baseline.setdefault('sizes', {}).update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"基线已写入 {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"未找到基线文件 {args.baseline}，使用 --save-baseline 生成")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != report['environment']:
+        print("警告：基线记录于不同的运行环境，比较结果仅供参考")
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"与基线相比没有超过 {args.tolerance:.0%} 的退化")
+        return
+    print("性能退化:")
+    for size, name, metric, base, current in regressions:
+        print(f"  - [{size}] {name} {metric}: {base:.3f} → {current:.3f} (+{(current / base - 1) if base else 0:.0%})")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import pandas as pd
+
+from distribution import empty_counts
+from drives import DRIVE_CUBE_KEYS, DRIVE_SUM_COLUMNS, build_drive_table, drive_cells, rollup_drives
+from metrics import SUM_COLUMNS, TACTIC_KEYS, build_indicator_frame, summarize_pass_metrics
+from situational import (SITUATION_KEYS, SITUATION_SUM_COLUMNS, has_situation_columns, situation_frame,
+                         summarize_situations)
+
+# 数据立方体的维度：每个单元保存可加的部分聚合（次数、求和、指标计数）
+# gameId 由 (赛季, 周次, 对阵) 唯一确定，加入维度不会增加单元数，但使按比赛替换部分聚合成为可能
+CUBE_KEYS = ['gameId', 'season', 'week', 'possessionTeam', 'defensiveTeam', 'quarter', 'passResult']
+
+# 码数计数立方体的维度（用于在筛选后还原码数分布）
+YARD_CUBE_KEYS = ['gameId', 'season', 'week', 'possessionTeam', 'defensiveTeam', 'passResult', 'playResult']
+
+# 传球战术立方体的维度（传球深度×方向，由回合描述解析得到）
+TACTIC_CUBE_KEYS = ['gameId', 'season', 'week', 'possessionTeam', 'defensiveTeam', *TACTIC_KEYS]
+
+# 情境立方体的维度（档数×场区），聚合EPA、成功回合与传球完成情况
+SITUATION_CUBE_KEYS = ['gameId', 'season', 'week', 'possessionTeam', 'defensiveTeam', *SITUATION_KEYS]
+
+# 立方体各部分的 (维度, 可加的聚合列)
+CUBE_PARTS = {
+    'facts': (CUBE_KEYS, SUM_COLUMNS),
+    'yards': (YARD_CUBE_KEYS, ['count']),
+    'tactics': (TACTIC_CUBE_KEYS, SUM_COLUMNS),
+    'situations': (SITUATION_CUBE_KEYS, SITUATION_SUM_COLUMNS),
+    'drives': (DRIVE_CUBE_KEYS, DRIVE_SUM_COLUMNS),
+}
+
+# 立方体中需保持为分类类型的维度（拼接后会退化为object）
+CATEGORY_KEYS = ['possessionTeam', 'defensiveTeam', 'passResult']
+
+
+def build_pass_cube(merged_df, ep_table=None):
+    """一次遍历合并表，构建传球数据立方体
+
+    返回 {'facts': 指标立方体, 'yards': 码数计数立方体, 'tactics': 传球战术立方体, 'situations': 情境立方体,
+    'drives': 推进立方体}；情境立方体需要期望得分查找表 ep_table（流式模式下没有，为空表）。
+    合并表为空或缺少必要列时返回 None。
+    筛选时只需在立方体上做掩码和求和，比率在查询时再由求和结果推导。
+    """
+    if merged_df.empty or any(key not in merged_df.columns for key in CUBE_KEYS):
+        return None
+
+    passes = build_indicator_frame(merged_df)
+    facts = passes.groupby(CUBE_KEYS, observed=True)[SUM_COLUMNS].sum().reset_index()
+    if 'playResult' in passes.columns:
+        yards = passes.groupby(YARD_CUBE_KEYS, observed=True).size().rename('count').reset_index()
+    else:
+        yards = pd.DataFrame(columns=YARD_CUBE_KEYS + ['count'])
+    if all(key in passes.columns for key in TACTIC_KEYS):
+        tactics = passes.groupby(TACTIC_CUBE_KEYS, observed=True)[SUM_COLUMNS].sum().reset_index()
+    else:
+        tactics = pd.DataFrame(columns=TACTIC_CUBE_KEYS + SUM_COLUMNS)
+    return {'facts': facts, 'yards': yards, 'tactics': tactics, 'situations': build_situation_cube(merged_df, ep_table),
+            'drives': build_drive_cube(merged_df)}
+
+
+def build_situation_cube(merged_df, ep_table):
+    """按 (比赛, 球队, 档数, 场区) 聚合每回合的EPA、成功与传球完成情况"""
+    if ep_table is None or not has_situation_columns(merged_df):
+        return pd.DataFrame(columns=SITUATION_CUBE_KEYS + SITUATION_SUM_COLUMNS)
+    situations = situation_frame(merged_df, ep_table)
+    dimensions = [key for key in SITUATION_CUBE_KEYS if key not in SITUATION_KEYS]
+    detail = merged_df.loc[situations.index, dimensions].assign(
+        down=situations['down'],
+        field_zone=situations['field_zone'],
+        plays=1,
+        attempts=situations['attempt'],
+        completions=situations['completion'],
+        successes=situations['success'],
+        epa_sum=situations['epa'],
+    )
+    return detail.groupby(SITUATION_CUBE_KEYS, observed=True)[SITUATION_SUM_COLUMNS].sum().reset_index()
+
+
+def build_drive_cube(merged_df):
+    """按 (比赛, 球队) 聚合推进次数、推进得分、达阵与红区推进"""
+    drive_table = build_drive_table(merged_df)
+    if drive_table is None or any(key not in drive_table.columns for key in DRIVE_CUBE_KEYS):
+        return pd.DataFrame(columns=DRIVE_CUBE_KEYS + DRIVE_SUM_COLUMNS)
+    return drive_cells(drive_table).groupby(DRIVE_CUBE_KEYS, observed=True)[DRIVE_SUM_COLUMNS].sum().reset_index()
+
+
+def restore_categories(table):
+    """把拼接后退化为object的维度列恢复为分类类型（深度与方向的固定类别不受影响）"""
+    for column in CATEGORY_KEYS:
+        if column in table.columns:
+            table[column] = table[column].astype('category')
+    return table
+
+
+def replace_games(cube, game_ids, partial):
+    """用部分立方体替换指定比赛的全部单元（热更新时只重算变化的比赛）"""
+    parts = {}
+    for name, table in cube.items():
+        kept = table[~table['gameId'].isin(game_ids)]
+        frames = [kept] if partial is None else [kept, partial[name]]
+        parts[name] = restore_categories(pd.concat(frames, ignore_index=True))
+    return parts
+
+
+def filter_options(cube):
+    """可供筛选的赛季、周次范围和球队列表"""
+    facts = cube['facts']
+    teams = sorted(set(facts['possessionTeam'].astype(str)) | set(facts['defensiveTeam'].astype(str)))
+    return {
+        'seasons': sorted(int(s) for s in facts['season'].unique()),
+        'weeks': (int(facts['week'].min()), int(facts['week'].max())),
+        'teams': teams,
+    }
+
+
+def _filter_mask(df, filters):
+    """根据筛选条件生成布尔掩码；空列表或缺省表示不限制"""
+    mask = pd.Series(True, index=df.index)
+    if filters.get('seasons'):
+        mask &= df['season'].isin(filters['seasons'])
+    if filters.get('weeks'):
+        low, high = filters['weeks']
+        mask &= df['week'].between(low, high)
+    if filters.get('offense'):
+        mask &= df['possessionTeam'].isin(filters['offense'])
+    if filters.get('defense'):
+        mask &= df['defensiveTeam'].isin(filters['defense'])
+    return mask
+
+
+def query_pass_metrics(cube, filters=None):
+    """在立方体上按筛选条件取切片并汇总为各板块使用的指标，不扫描原始回合表"""
+    if cube is None:
+        return None
+    filters = filters or {}
+    facts = cube['facts'][_filter_mask(cube['facts'], filters)]
+    if facts.empty:
+        return {'has_pass_result': True, 'pass_count': 0}
+
+    yards = cube['yards'][_filter_mask(cube['yards'], filters)]
+    if yards.empty:
+        yard_counts = empty_counts('passResult', 'playResult')
+    else:
+        yard_counts = yards.groupby(['passResult', 'playResult'], observed=True)['count'].sum().reset_index()
+    tactics = cube['tactics'][_filter_mask(cube['tactics'], filters)] if 'tactics' in cube else None
+    metrics = summarize_pass_metrics(facts, yard_counts, tactics)
+    drives = cube['drives'][_filter_mask(cube['drives'], filters)] if 'drives' in cube else None
+    metrics['drives_by_team'] = rollup_drives(drives, 'possessionTeam') if drives is not None and not drives.empty else None
+    return metrics
+
+
+def query_situational_metrics(cube, filters=None):
+    """在情境立方体上按筛选条件取切片并汇总；没有情境数据或切片为空时返回 None"""
+    if cube is None or 'situations' not in cube or cube['situations'].empty:
+        return None
+    situations = cube['situations']
+    return summarize_situations(situations[_filter_mask(situations, filters or {})])
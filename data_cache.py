@@ -0,0 +1,188 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+
+import pandas as pd
+
+from instrumentation import METRICS
+
+# 缓存目录与格式版本（解析逻辑变化时递增版本号，使旧缓存整体失效）
+CACHE_DIR = os.environ.get('NFL_CACHE_DIR', '.nfl_cache')
+CACHE_FORMAT_VERSION = 10
+MANIFEST_NAME = 'manifest.json'
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """分块计算文件内容哈希，避免一次性读入大文件"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_parquet(path):
+    """读取缓存的Parquet表；没有任何类别的分类列（全为缺失）经pyarrow往返后会变成object，按写入时的pandas元数据恢复"""
+    import pyarrow.parquet as pq
+    df = pd.read_parquet(path)
+    columns = (pq.read_schema(path).pandas_metadata or {}).get('columns', [])
+    lost = [c['name'] for c in columns
+            if c.get('pandas_type') == 'categorical' and c['name'] in df.columns and df[c['name']].dtype == object]
+    return df.astype({name: 'category' for name in lost}) if lost else df
+
+
+class DataCache:
+    """列式磁盘缓存：按源文件路径、大小、修改时间和内容哈希判断是否需要重新解析
+
+    每张表单独存为一个Parquet文件，只有源文件发生变化的表会被重建。
+    未安装pyarrow时缓存自动停用，行为退化为直接读取CSV。
+    各表可在不同线程中并发加载：解析和读写Parquet在锁外进行，只有清单的修改与写入互斥。
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, rebuild=False):
+        self.cache_dir = cache_dir
+        self.rebuild = rebuild
+        self.enabled = importlib.util.find_spec('pyarrow') is not None
+        self._manifest = self._read_manifest() if self.enabled else {}
+        self._sources = {}
+        self._lock = threading.RLock()
+        if not self.enabled:
+            print('提示：未安装pyarrow，磁盘缓存已停用')
+
+    # 清单读写
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if manifest.get('version') != CACHE_FORMAT_VERSION:
+            return {}
+        return manifest.get('tables', {})
+
+    def _write_manifest(self):
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._manifest_path() + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'tables': self._manifest}, f, indent=2)
+            os.replace(tmp_path, self._manifest_path())
+
+    def _table_path(self, name):
+        return os.path.join(self.cache_dir, f'{name}.parquet')
+
+    def _fingerprint(self, path, previous=None):
+        """生成源文件指纹；大小与修改时间均未变时沿用已记录的内容哈希"""
+        stat = os.stat(path)
+        fingerprint = {
+            'path': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        if (previous and previous.get('path') == fingerprint['path']
+                and previous.get('size') == fingerprint['size']
+                and previous.get('mtime_ns') == fingerprint['mtime_ns']):
+            fingerprint['hash'] = previous['hash']
+        else:
+            fingerprint['hash'] = file_digest(path)
+        return fingerprint
+
+    def _is_valid(self, name, key):
+        entry = self._manifest.get(name)
+        return (not self.rebuild and entry is not None
+                and entry.get('key') == key
+                and os.path.exists(self._table_path(name)))
+
+    def _store(self, name, key, df, **extra):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        df.to_parquet(self._table_path(name), index=False)
+        with self._lock:
+            self._manifest[name] = {'key': key, **extra}
+            self._write_manifest()
+
+    def source_key(self, name):
+        """返回已加载源表的内容哈希，供派生表和数据集版本号使用"""
+        return self._sources[name]['hash']
+
+    def dataset_version(self, source_names):
+        """由多张源表的内容哈希组合出数据集版本号；缓存停用或有表未加载时返回None"""
+        if not all(s in self._sources for s in source_names):
+            return None
+        return hashlib.blake2b(
+            '|'.join(self.source_key(s) for s in source_names).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    def track_source(self, name, path):
+        """只登记源文件指纹而不加载（流式读取模式使用），返回内容哈希"""
+        if not self.enabled:
+            return None
+        fingerprint = self._fingerprint(path, self._manifest.get(name, {}).get('source'))
+        with self._lock:
+            entry = self._manifest.setdefault(name, {})
+            if fingerprint != entry.get('source'):
+                entry['source'] = fingerprint
+                self._write_manifest()
+        self._sources[name] = fingerprint
+        return fingerprint['hash']
+
+    def load_table(self, name, path, reader):
+        """加载单张源表：命中缓存时直接读取Parquet，否则调用reader解析CSV并写入缓存
+
+        返回 (DataFrame, 是否命中缓存)。
+        """
+        if not self.enabled:
+            return reader(path), False
+
+        previous = self._manifest.get(name, {}).get('source')
+        fingerprint = self._fingerprint(path, previous)
+        self._sources[name] = fingerprint
+        key = fingerprint['hash']
+
+        if self._is_valid(name, key):
+            if fingerprint != previous:
+                # 内容未变但文件被touch过，刷新记录的修改时间
+                with self._lock:
+                    self._manifest[name]['source'] = fingerprint
+                    self._write_manifest()
+            METRICS.inc('nfl_data_cache_requests_total', table=name, result='hit')
+            return read_parquet(self._table_path(name)), True
+
+        METRICS.inc('nfl_data_cache_requests_total', table=name, result='miss')
+        df = reader(path)
+        self._store(name, key, df, source=fingerprint)
+        return df, False
+
+    def load_derived(self, name, source_names, builder):
+        """加载派生表集合（如预处理结果），任一依赖源表变化时调用builder重建
+
+        builder 返回 {表名: DataFrame}；本函数返回 (同结构字典, 是否命中缓存)。
+        """
+        if not self.enabled:
+            return builder(), False
+
+        key = self.dataset_version(source_names)
+        entry = self._manifest.get(name)
+        parts = entry.get('parts', []) if entry else []
+
+        if (not self.rebuild and entry is not None and entry.get('key') == key
+                and all(os.path.exists(self._table_path(f'{name}.{p}')) for p in parts)):
+            METRICS.inc('nfl_data_cache_requests_total', table=name, result='hit')
+            return {p: read_parquet(self._table_path(f'{name}.{p}')) for p in parts}, True
+
+        METRICS.inc('nfl_data_cache_requests_total', table=name, result='miss')
+        frames = builder()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for part, df in frames.items():
+            df.to_parquet(self._table_path(f'{name}.{part}'), index=False)
+        with self._lock:
+            self._manifest[name] = {'key': key, 'parts': list(frames)}
+            self._write_manifest()
+        return frames, False
+
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# 每个类别最多展示的离群点数量（按取值均匀抽取，结果确定）
+MAX_OUTLIERS = 20
+# 箱线图须的长度（IQR倍数）
+WHISKER_IQR = 1.5
+
+
+def value_counts_by_group(df, group_column, value_column):
+    """统计每个类别下各取值出现的次数，返回 (类别, 取值, count) 三列表
+
+    推进码数是整数，按码数计数后即可无损地还原分位数，并且计数可跨分片直接相加。
+    """
+    counts = df.groupby([group_column, value_column], observed=True).size()
+    return counts.rename('count').reset_index()
+
+
+def _quantiles(values, cumulative, total, probs):
+    """在 (已排序取值, 累计次数) 表示的分布上按numpy默认的线性插值计算分位数"""
+    positions = np.asarray(probs) * (total - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    lower_values = values[np.searchsorted(cumulative, lower, side='right')]
+    upper_values = values[np.searchsorted(cumulative, upper, side='right')]
+    return lower_values + (upper_values - lower_values) * (positions - lower)
+
+
+def _sample_outliers(values, counts, max_outliers):
+    """离群取值超过上限时按位置均匀抽取，保留两端极值"""
+    if len(values) <= max_outliers:
+        return values, counts
+    index = np.unique(np.linspace(0, len(values) - 1, max_outliers).round().astype(np.int64))
+    return values[index], counts[index]
+
+
+def box_statistics(counts_df, group_column, value_column, max_outliers=MAX_OUTLIERS):
+    """由计数表计算每个类别的箱线图统计量：四分位数、须、均值和抽样后的离群点
+
+    返回列表，每项为一个类别的统计字典，体积与原始数据量无关。
+    """
+    stats = []
+    for group, part in counts_df.groupby(group_column, observed=True, sort=True):
+        part = part.sort_values(value_column)
+        values = part[value_column].to_numpy(dtype=float)
+        counts = part['count'].to_numpy(dtype=np.int64)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        cumulative = np.cumsum(counts)
+
+        q1, median, q3 = _quantiles(values, cumulative, total, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = (values >= q1 - WHISKER_IQR * iqr) & (values <= q3 + WHISKER_IQR * iqr)
+        outlier_values, outlier_counts = _sample_outliers(values[~inside], counts[~inside], max_outliers)
+
+        stats.append({
+            'group': group,
+            'count': total,
+            'mean': float((values * counts).sum() / total),
+            'q1': float(q1),
+            'median': float(median),
+            'q3': float(q3),
+            'lowerfence': float(values[inside].min()) if inside.any() else float(q1),
+            'upperfence': float(values[inside].max()) if inside.any() else float(q3),
+            'outliers': outlier_values.tolist(),
+            'outlier_counts': outlier_counts.tolist(),
+        })
+    return stats
+
+
+def binned_counts(counts_df, group_column, value_column, bin_width=1):
+    """按固定宽度分箱汇总计数，供直方图和小提琴图使用"""
+    binned = counts_df.assign(bin=(counts_df[value_column] // bin_width) * bin_width)
+    return (binned.groupby([group_column, 'bin'], observed=True)['count'].sum()
+            .reset_index()
+            .rename(columns={'bin': value_column}))
+
+
+def clip_counts(counts_df, value_column, lower, upper):
+    """只保留取值落在 (lower, upper) 开区间内的计数"""
+    values = counts_df[value_column]
+    return counts_df[(values > lower) & (values < upper)]
+
+
+def empty_counts(group_column, value_column):
+    return pd.DataFrame({group_column: [], value_column: [], 'count': []})
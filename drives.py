@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from situational import TOUCHDOWN_POINTS, clock_seconds, yards_to_goal
+
+# 分段与比赛状态所需的列
+STATE_SOURCE_COLUMNS = ['gameId', 'playId', 'quarter', 'gameClock', 'possessionTeam', 'homeTeamAbbr',
+                        'preSnapHomeScore', 'preSnapVisitorScore']
+
+# 追加到合并表的比赛状态列：推进编号（每场比赛从1开始）、推进内第几个回合、开球前进攻/防守方得分与分差、半场与全场剩余秒数
+STATE_COLUMNS = ['drive', 'drive_play', 'offense_score', 'defense_score', 'score_differential',
+                 'half_seconds_remaining', 'game_seconds_remaining']
+
+# 推进结果使用固定类别，保证分块、热更新拼接后的类别一致
+DRIVE_RESULTS = pd.CategoricalDtype(['touchdown', 'field_goal', 'opponent_score', 'interception', 'end_of_half', 'other'])
+
+# 红区：距对方端区不超过20码
+RED_ZONE_YARDS = 20
+QUARTER_SECONDS = 900
+
+# 推进立方体的维度与可加的聚合列
+DRIVE_CUBE_KEYS = ['gameId', 'season', 'week', 'possessionTeam', 'defensiveTeam']
+DRIVE_SUM_COLUMNS = ['drives', 'points', 'touchdowns', 'red_zone_drives', 'red_zone_touchdowns']
+
+
+def has_state_source_columns(df):
+    return all(column in df.columns for column in STATE_SOURCE_COLUMNS)
+
+
+def add_game_state_columns(merged_df):
+    """按 (比赛, 节次, 剩余时间) 排序后把回合划分为推进，并追加开球前比分与剩余时间等比赛状态列
+
+    相邻回合换了进攻方、跨越半场或比分发生变化（得分后开球）时开始新的推进；推进编号为组内累加，
+    全部为排序后的移位与累加运算。数据只包含传球回合，整段只有跑球的推进无法识别，其前后同一进攻方的推进会被视为一次。
+    缺少所需列时原样返回。
+    """
+    if merged_df.empty or not has_state_source_columns(merged_df):
+        return merged_df
+
+    seconds = clock_seconds(merged_df['gameClock']).fillna(0)
+    order = merged_df.assign(_seconds=seconds).sort_values(
+        ['gameId', 'quarter', '_seconds', 'playId'], ascending=[True, True, False, True]).index
+    game = merged_df.loc[order, 'gameId']
+    quarter = merged_df.loc[order, 'quarter'].astype('int16')
+    offense = merged_df.loc[order, 'possessionTeam'].astype(object)
+    home = merged_df.loc[order, 'preSnapHomeScore'].astype('float64').fillna(0)
+    visitor = merged_df.loc[order, 'preSnapVisitorScore'].astype('float64').fillna(0)
+    half = np.minimum((quarter + 1) // 2, 3)
+
+    new_drive = ((game != game.shift()) | (half != half.shift()) | (offense != offense.shift())
+                 | (home != home.shift()) | (visitor != visitor.shift()))
+    drive = new_drive.astype('int16').groupby(game).cumsum()
+    offense_home = (offense == merged_df.loc[order, 'homeTeamAbbr'].astype(object)).to_numpy()
+    offense_score = np.where(offense_home, home, visitor)
+    defense_score = np.where(offense_home, visitor, home)
+    clock = seconds.loc[order]
+
+    state = pd.DataFrame({
+        'drive': drive,
+        'drive_play': drive.groupby([game, drive]).cumcount().astype('int16') + 1,
+        'offense_score': offense_score.astype('int16'),
+        'defense_score': defense_score.astype('int16'),
+        'score_differential': (offense_score - defense_score).astype('int16'),
+        # 第1、3节还要加上下一节的时间；加时赛只计本节剩余时间
+        'half_seconds_remaining': (clock + QUARTER_SECONDS * quarter.isin([1, 3])).astype('int16'),
+        'game_seconds_remaining': (clock + QUARTER_SECONDS * (4 - quarter).clip(lower=0)).astype('int16'),
+    }, index=order)
+    for column in STATE_COLUMNS:
+        merged_df[column] = state[column]
+    return merged_df
+
+
+def build_drive_table(merged_df):
+    """由带比赛状态列的合并表汇总出每次推进一行：回合数、起始位置、是否进入红区、得分与推进结果
+
+    推进得分为进攻方从本次推进开始到下一次推进开始之间的得分变化（比赛最后一次推进以达阵传球计7分），
+    对方在此期间得分（拦截回攻达阵、安全分等）记为 opponent_score。缺少所需列时返回 None。
+    """
+    if merged_df.empty or 'drive' not in merged_df.columns:
+        return None
+
+    order = merged_df.sort_values(['gameId', 'drive', 'drive_play'])
+    starts = np.flatnonzero(order['drive_play'].to_numpy() == 1)
+    ends = np.append(starts[1:], len(order)) - 1
+    first = order.iloc[starts]
+    last = order.iloc[ends]
+
+    # 推进期间到达的最靠近对方端区的位置
+    goal = yards_to_goal(order).to_numpy()
+    closest = np.fmin.reduceat(goal, starts)
+
+    game = first['gameId'].to_numpy()
+    quarter = first['quarter'].to_numpy()
+    half = np.minimum((quarter + 1) // 2, 3)
+    offense_score = first['offense_score'].to_numpy()
+    defense_score = first['defense_score'].to_numpy()
+    # 下一次推进开始时的比分（换到本次进攻方的视角）
+    same_offense = np.append(first['possessionTeam'].astype(object).to_numpy()[1:]
+                             == first['possessionTeam'].astype(object).to_numpy()[:-1], False)
+    next_offense = np.append(offense_score[1:], 0)
+    next_defense = np.append(defense_score[1:], 0)
+    has_next = np.append(game[1:] == game[:-1], False)
+    offense_gain = np.where(same_offense, next_offense, next_defense) - offense_score
+    defense_gain = np.where(same_offense, next_defense, next_offense) - defense_score
+
+    result_last = last['passResult'].astype(object).to_numpy()
+    touchdown_pass = result_last == 'C'
+    if 'playDescription' in last.columns:
+        touchdown_pass &= last['playDescription'].str.contains('TOUCHDOWN', regex=False, na=False).to_numpy()
+    else:
+        touchdown_pass[:] = False
+    points = np.where(has_next, np.clip(offense_gain, 0, None), np.where(touchdown_pass, TOUCHDOWN_POINTS, 0))
+    end_of_half = ~has_next | (np.append(half[1:], 0) != half)
+
+    result = np.select(
+        [points >= 6, points > 0, has_next & (defense_gain > 0), result_last == 'IN', end_of_half],
+        ['touchdown', 'field_goal', 'opponent_score', 'interception', 'end_of_half'],
+        'other',
+    )
+    table = pd.DataFrame({
+        'gameId': game,
+        'drive': first['drive'].to_numpy(),
+        **{key: first[key].to_numpy() for key in ('season', 'week') if key in first.columns},
+        'possessionTeam': first['possessionTeam'].to_numpy(),
+        'defensiveTeam': first['defensiveTeam'].to_numpy(),
+        'quarter': quarter,
+        'plays': (ends - starts + 1).astype('int16'),
+        'start_yards_to_goal': goal[starts],
+        'red_zone': closest <= RED_ZONE_YARDS,
+        'points': points.astype('int8'),
+        'result': pd.Categorical(result, dtype=DRIVE_RESULTS),
+    })
+    return table
+
+
+def drive_cells(drive_table):
+    """每次推进的可加指标：推进次数、得分、达阵、进入红区与红区达阵"""
+    touchdowns = drive_table['result'] == 'touchdown'
+    return drive_table[[key for key in DRIVE_CUBE_KEYS if key in drive_table.columns]].assign(
+        drives=1,
+        points=drive_table['points'].astype('int32'),
+        touchdowns=touchdowns,
+        red_zone_drives=drive_table['red_zone'],
+        red_zone_touchdowns=drive_table['red_zone'] & touchdowns,
+    )
+
+
+def rollup_drives(detail, keys):
+    """将推进立方体的部分聚合汇总到指定维度，并计算每次推进得分、达阵率与红区达阵率"""
+    summary = detail.groupby(keys, observed=True)[DRIVE_SUM_COLUMNS].sum()
+    drives = summary['drives']
+    summary['points_per_drive'] = summary['points'] / drives
+    summary['td_per_drive'] = summary['touchdowns'] / drives * 100
+    summary['red_zone_td_rate'] = (summary['red_zone_touchdowns']
+                                   / summary['red_zone_drives'].where(summary['red_zone_drives'] > 0) * 100)
+    return summary.reset_index()
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from instrumentation import METRICS
+
+# 默认最多缓存的图表数量，可通过环境变量或命令行参数调整
+DEFAULT_FIGURE_CACHE_SIZE = int(os.environ.get('NFL_FIGURE_CACHE_SIZE', '256'))
+
+
+def freeze_params(params):
+    """将筛选参数转换为可哈希的键（列表/集合转为排序后的元组）"""
+    if not params:
+        return ()
+    frozen = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            value = tuple(sorted(value, key=str))
+        frozen.append((name, value))
+    return tuple(frozen)
+
+
+class FigureCache:
+    """进程级图表缓存：所有浏览器会话共享序列化后的Plotly图表JSON
+
+    键为 (板块, 图表名, 筛选参数, 数据集版本)，超过容量时按LRU淘汰最久未使用的图表。
+    """
+
+    def __init__(self, max_size=DEFAULT_FIGURE_CACHE_SIZE):
+        self.max_size = max_size
+        self.dataset_version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_dataset_version(self, version):
+        """切换数据集版本；旧版本的图表不会再被命中，并随LRU逐步淘汰"""
+        self.dataset_version = version
+
+    def resize(self, max_size):
+        """调整容量并立即淘汰超出的部分"""
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_json(self, section, name, build, params=None):
+        """返回图表的JSON字符串；未命中时调用build生成Figure并序列化"""
+        key = (section, name, freeze_params(params), self.dataset_version)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        # 在锁外构建，避免慢图表阻塞其它视图的读取
+        with METRICS.timer('nfl_figure_build_seconds', section=section, figure=name):
+            fig = build()
+        with METRICS.timer('nfl_figure_serialize_seconds', section=section, figure=name):
+            payload = fig.to_json()
+        METRICS.observe('nfl_figure_payload_bytes', len(payload), section=section, figure=name)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            self._evict()
+        return payload
+
+    def get(self, section, name, build, params=None):
+        """返回可直接交给 ui.plotly 的图表字典"""
+        payload = self.get_json(section, name, build, params)
+        METRICS.inc('nfl_figure_sent_bytes_total', len(payload), section=section)
+        return json.loads(payload)
+
+    def stats(self):
+        """命中/未命中次数与当前容量使用情况"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 进程内共享的图表缓存实例
+FIGURE_CACHE = FigureCache()
@@ -0,0 +1,420 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from cube import build_pass_cube, replace_games
+from play_parser import DESCRIPTION_COLUMNS
+from preprocessing import clean_plays, merge_play_tables
+from schema import TABLE_SCHEMAS, can_hold_na, concat_aligned, read_table
+from scouting import PLAY_KEYS, PLAY_SCOUTING_COLUMNS, aggregate_scouting_by_play
+from streaming import combine_cubes, stream_pass_cube
+
+# 默认轮询间隔（秒）
+DEFAULT_POLL_INTERVAL = 10.0
+# 判断文件是否仅被追加时，校验已读取部分末尾的字节数
+TAIL_CHECK_BYTES = 64 * 1024
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SourceTracker:
+    """记录单个CSV源文件已读取到的位置，用于区分“尾部追加”和“整体改写”"""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = b''
+        self.offset = 0
+        self.mtime_ns = None
+        self.tail_digest = None
+        self.snapshot()
+
+    def _read_range(self, start, end):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def snapshot(self):
+        """把当前文件内容视为已全部读取（只计到最后一个完整行）"""
+        stat = os.stat(self.path)
+        with open(self.path, 'rb') as f:
+            self.header = f.readline()
+        data_end = stat.st_size
+        # 写入方可能正在追加，末尾不完整的行留待下次读取
+        tail = self._read_range(max(0, data_end - TAIL_CHECK_BYTES), data_end)
+        if tail and not tail.endswith(b'\n'):
+            data_end -= len(tail) - (tail.rfind(b'\n') + 1)
+        self.offset = data_end
+        self.mtime_ns = stat.st_mtime_ns
+        self._update_tail()
+
+    def _update_tail(self):
+        self.tail_digest = _digest(self._read_range(max(0, self.offset - TAIL_CHECK_BYTES), self.offset))
+
+    def check(self):
+        """返回 None（未变化）、'append'（仅在尾部追加）或 'rewrite'（已有内容被改写）"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        if stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.offset:
+            return None
+        if stat.st_size < self.offset:
+            return 'rewrite'
+        tail = self._read_range(max(0, self.offset - TAIL_CHECK_BYTES), self.offset)
+        if _digest(tail) != self.tail_digest or self._read_range(0, len(self.header)) != self.header:
+            return 'rewrite'
+        if stat.st_size == self.offset:
+            # 只有修改时间变化（如被touch），无需重新读取
+            self.mtime_ns = stat.st_mtime_ns
+            return None
+        return 'append'
+
+    def read_appended(self, name):
+        """只解析上次读取位置之后新增的完整行，按表的schema返回DataFrame"""
+        size = os.stat(self.path).st_size
+        data = self._read_range(self.offset, size)
+        data = data[:data.rfind(b'\n') + 1]
+        df = read_table(name, io.BytesIO(self.header + data))
+        self.offset += len(data)
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+        self._update_tail()
+        return df
+
+
+def game_fingerprints(df, columns):
+    """按比赛计算行内容指纹，用于找出改写后内容发生变化的比赛"""
+    columns = [c for c in columns if c in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False)
+    return row_hashes.groupby(df['gameId'].to_numpy()).sum()
+
+
+def changed_games(old, new):
+    """比较两组比赛指纹，返回新增、删除或内容变化的gameId集合"""
+    aligned_old, aligned_new = old.align(new)
+    return set(aligned_old.index[aligned_old.ne(aligned_new)])
+
+
+def _concat(frames):
+    """拼接非空的表（先对齐各表的列类型）；全部为空时返回 None"""
+    frames = [df for df in frames if df is not None and not df.empty]
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    return concat_aligned(frames, ignore_index=not isinstance(frames[0].index, pd.MultiIndex))
+
+
+def _game_bounds(game_ids, games):
+    """在已排序的gameId数组上二分查找各比赛所在的行区间，返回 (排序后的gameId, 起始位置, 结束位置)"""
+    games = np.sort(np.fromiter(games, dtype=game_ids.dtype, count=len(games)))
+    return games, np.searchsorted(game_ids, games, 'left'), np.searchsorted(game_ids, games, 'right')
+
+
+def rows_of_games(df, games):
+    """按 (gameId, playId) 排序的表中这些比赛的行；每场比赛是连续的一段，按二分查找定位而不扫描整表"""
+    _, starts, stops = _game_bounds(df['gameId'].to_numpy(), games)
+    positions = [np.arange(start, stop) for start, stop in zip(starts, stops)]
+    return df.iloc[np.concatenate(positions) if positions else []]
+
+
+def _align_new_rows(merged_df, new_rows):
+    """把新行的列类型对齐到合并表：分类列补充新出现的类别，新行中全为缺失的列取合并表的类型（该类型能表示缺失时）
+
+    只检查新行，返回 (对齐后的新行, 合并表各段需要转换的分类列类型)。
+    """
+    new_casts = {}
+    old_casts = {}
+    for column, dtype in merged_df.dtypes.items():
+        if column not in new_rows.columns or new_rows[column].dtype == dtype:
+            continue
+        new_dtype = new_rows[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and isinstance(new_dtype, pd.CategoricalDtype):
+            added = new_dtype.categories.difference(dtype.categories)
+            if len(added):
+                dtype = pd.CategoricalDtype(dtype.categories.append(added), ordered=dtype.ordered)
+                old_casts[column] = dtype
+            new_casts[column] = dtype
+        elif new_rows[column].isna().all() and can_hold_na(dtype):
+            new_casts[column] = dtype
+    return new_rows.astype(new_casts), old_casts
+
+
+def splice_games(merged_df, games, new_rows):
+    """用 new_rows 替换合并表中这些比赛的行段，返回新的合并表
+
+    两张表都按 (gameId, playId) 排序：未受影响的部分按原顺序切片，新行按gameId插入对应位置，不再整体排序。
+    """
+    games, starts, stops = _game_bounds(merged_df['gameId'].to_numpy(), games)
+    _, new_starts, new_stops = _game_bounds(new_rows['gameId'].to_numpy(), games)
+    new_rows, old_casts = _align_new_rows(merged_df, new_rows)
+    pieces = []
+    previous = 0
+    for start, stop, new_start, new_stop in zip(starts, stops, new_starts, new_stops):
+        pieces.append(merged_df.iloc[previous:start])
+        pieces.append(new_rows.iloc[new_start:new_stop])
+        previous = stop
+    pieces.append(merged_df.iloc[previous:])
+    pieces = [piece.astype(old_casts) if old_casts else piece for piece in pieces if len(piece)]
+    if not pieces:
+        return merged_df.iloc[:0]
+    return pd.concat(pieces, ignore_index=True)
+
+
+def _rows_for_games(play_scouting, game_ids):
+    if play_scouting is None:
+        return None
+    return play_scouting[play_scouting.index.get_level_values('gameId').isin(game_ids)]
+
+
+class LiveDataset:
+    """运行期可原地更新的数据集：仪表盘总是读取最新的立方体，更新后通知已订阅的客户端
+
+    数据按部分（球员表 players、传球数据立方体 pass_cube、球员索引 player_index）在后台陆续就绪，
+    status 记录各部分的状态（loading / ready / failed），加载失败时 errors 保存原因；
+    回调以发生变化的部分名调用，页面只需刷新依赖该部分的板块。
+    """
+
+    PARTS = ('players', 'pass_cube', 'player_index')
+
+    def __init__(self, players_df=None, games_df=None, merged_df=None, pass_cube=None, scouting_df=None,
+                 player_stats=None, player_index=None, ep_table=None, stream=False):
+        self.players_df = players_df
+        self.games_df = games_df
+        self.merged_df = merged_df
+        self.pass_cube = pass_cube
+        self.ep_table = ep_table
+        self.scouting_df = scouting_df
+        self.player_stats = player_stats
+        self.player_index = player_index
+        # 流式模式：没有完整的合并表，立方体不含情境部分
+        self.stream = stream
+        self.version = 0
+        self.status = {part: 'loading' for part in self.PARTS}
+        self.errors = {}
+        self._listeners = []
+
+    def mark_ready(self, part, **tables):
+        """设置该部分的数据表（如 players_df=...）并通知订阅者"""
+        for name, value in tables.items():
+            setattr(self, name, value)
+        self.status[part] = 'ready'
+        self.notify(part)
+
+    def mark_failed(self, part, error):
+        self.status[part] = 'failed'
+        self.errors[part] = error
+        self.notify(part)
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(self, part):
+        for callback in list(self._listeners):
+            callback(part)
+
+
+class HotReloader:
+    """轮询数据文件，只读取新增或变化的部分并原地更新数据集和立方体
+
+    常规模式下只重算受影响比赛的立方体单元，并按比赛替换合并表中的行段；流式模式（内存中没有合并表）下，
+    仅为全新比赛追加的数据做增量折叠，其余情况重新流式构建立方体。
+    应在开始加载数据之前创建：文件快照在创建时记录，加载期间发生的变化在第一次轮询时处理。
+    """
+
+    def __init__(self, dataset, data_files, chunk_size=None, report=print):
+        self.dataset = dataset
+        self.data_files = data_files
+        self.chunk_size = chunk_size
+        self.report = report
+        self.trackers = {name: SourceTracker(data_files[name]) for name in ('plays', 'games', 'scouting')}
+        # 已读取但尚无对应回合的回合级球探汇总（球探数据先于plays写入时），待回合到达后再合并
+        self.pending_scouting = None
+        # 每场比赛已有回合的playId（按受影响的比赛增量维护），用于判断球探汇总是否已匹配到回合
+        self.play_ids = None
+        # 最近一次更新影响的比赛，供 on_update 只刷新这些比赛的派生数据
+        self.updated_games = set()
+        self._first_poll = True
+
+    def prepare(self):
+        """数据加载完成后建立每场比赛的回合索引（只在开始监视时扫描一次合并表）"""
+        merged_df = self.dataset.merged_df
+        if self.play_ids is None and merged_df is not None:
+            self.play_ids = {game: ids.to_numpy() for game, ids in merged_df.groupby('gameId', sort=False)['playId']}
+
+    def poll(self):
+        """检查一次源文件；有更新时完成增量处理并返回 True"""
+        changes = {name: tracker.check() for name, tracker in self.trackers.items()}
+        changes = {name: kind for name, kind in changes.items() if kind}
+        if self._first_poll:
+            # 快照早于数据加载，加载时可能已读到这些变化：追加的数据不能直接累加，按改写逐场比较内容
+            self._first_poll = False
+            changes = {name: 'rewrite' for name in changes}
+        if not changes:
+            return False
+
+        start = time.perf_counter()
+        if self.dataset.merged_df is None:
+            affected = self._update_streaming(changes)
+        else:
+            affected = self._update_merged(changes)
+        self.updated_games = affected
+        self.dataset.version += 1
+        self.report(f"数据热更新: {changes} 影响 {len(affected)} 场比赛，耗时 {time.perf_counter() - start:.2f}s")
+        return True
+
+    def _read_changes(self, name, kind):
+        tracker = self.trackers[name]
+        if kind == 'append':
+            return tracker.read_appended(name)
+        df = read_table(name, self.data_files[name])
+        tracker.snapshot()
+        return df
+
+    def _update_games(self, changes):
+        """比赛表很小，变化时整体重读；返回元数据发生变化的已有比赛"""
+        if 'games' not in changes:
+            return set()
+        games_df = read_table('games', self.data_files['games'])
+        self.trackers['games'].snapshot()
+        columns = list(TABLE_SCHEMAS['games'])
+        changed = changed_games(game_fingerprints(self.dataset.games_df, columns), game_fingerprints(games_df, columns))
+        self.dataset.games_df = games_df
+        return changed
+
+    def _update_merged(self, changes):
+        """常规模式：重建受影响比赛的合并行，替换它们在合并表中的行段和在立方体中的单元"""
+        self.prepare()
+        dataset = self.dataset
+        merged_df = dataset.merged_df
+        # 回合描述的解析结果随旧回合一起保留；比赛状态列在合并时按整场比赛重新计算
+        plays_columns = [c for c in [*TABLE_SCHEMAS['plays'], *DESCRIPTION_COLUMNS] if c in merged_df.columns]
+        scouting_columns = [c for c in PLAY_SCOUTING_COLUMNS if c in merged_df.columns]
+
+        affected = {game for game in self._update_games(changes) if game in self.play_ids}
+
+        plays_added = plays_full = None
+        if 'plays' in changes:
+            plays = clean_plays(self._read_changes('plays', changes['plays']))
+            if changes['plays'] == 'append':
+                plays_added = plays
+                affected |= set(plays['gameId'].unique())
+            else:
+                plays_full = plays
+                affected |= changed_games(game_fingerprints(merged_df, plays_columns),
+                                          game_fingerprints(plays, plays_columns))
+
+        scouting_delta = scouting_full = None
+        if 'scouting' in changes:
+            play_scouting = aggregate_scouting_by_play(self._read_changes('scouting', changes['scouting']))
+            if changes['scouting'] == 'append':
+                scouting_delta = play_scouting
+                affected |= set(play_scouting.index.get_level_values('gameId').unique())
+            else:
+                scouting_full = play_scouting
+                old_scouting = merged_df.dropna(subset=scouting_columns, how='all')
+                affected |= changed_games(game_fingerprints(old_scouting, scouting_columns),
+                                          game_fingerprints(play_scouting.reset_index(), scouting_columns))
+
+        if not affected:
+            return affected
+
+        # 受影响比赛的回合行与回合级球探汇总
+        old_rows = rows_of_games(merged_df, affected)
+        if plays_full is not None:
+            plays_rows = plays_full[plays_full['gameId'].isin(affected)]
+        else:
+            # 只有球探数据到达、尚无回合的比赛，按空表处理
+            plays_rows = _concat([old_rows[plays_columns], plays_added])
+            if plays_rows is None:
+                plays_rows = old_rows[plays_columns]
+
+        pending = self.pending_scouting
+        if scouting_full is not None:
+            scouting_rows = _rows_for_games(scouting_full, affected)
+        else:
+            # 回合级球探汇总均为计数，追加的部分可直接相加
+            parts = [old_rows.set_index(PLAY_KEYS)[scouting_columns].dropna(how='all'),
+                     _rows_for_games(pending, affected), scouting_delta]
+            scouting_rows = _concat(parts)
+            if scouting_rows is None:
+                scouting_rows = pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=PLAY_KEYS))
+            else:
+                scouting_rows = scouting_rows.groupby(level=PLAY_KEYS).sum().astype('int16')
+
+        new_rows = merge_play_tables(plays_rows, dataset.games_df, scouting_rows)
+        dataset.merged_df = splice_games(merged_df, affected, new_rows)
+        for game in affected:
+            self.play_ids.pop(game, None)
+        self.play_ids.update({game: ids.to_numpy() for game, ids in new_rows.groupby('gameId', sort=False)['playId']})
+        # 期望得分表沿用加载时的估计（少量新增比赛对各情境的EP影响可以忽略），受影响比赛按它重新计算EPA
+        dataset.pass_cube = replace_games(dataset.pass_cube, affected, build_pass_cube(new_rows, dataset.ep_table))
+
+        # 记录仍未匹配到回合的球探汇总
+        candidates = scouting_full if scouting_full is not None else _concat([pending, scouting_delta])
+        if candidates is not None:
+            candidates = candidates[~self._has_play(candidates.index)]
+            self.pending_scouting = None if candidates.empty else candidates
+        return affected
+
+    def _has_play(self, keys):
+        """(gameId, playId) 索引中的各项是否已有对应回合；只查找这些比赛的回合索引"""
+        games = keys.get_level_values('gameId')
+        known = [(game, self.play_ids[game]) for game in games.unique() if game in self.play_ids]
+        if not known:
+            return np.zeros(len(keys), dtype=bool)
+        known_keys = pd.MultiIndex.from_arrays(
+            [np.repeat([game for game, _ in known], [len(ids) for _, ids in known]),
+             np.concatenate([ids for _, ids in known])], names=PLAY_KEYS)
+        return keys.isin(known_keys)
+
+    def _update_streaming(self, changes):
+        """流式模式：全新比赛的追加数据直接折叠进立方体，其余情况重新流式构建"""
+        dataset = self.dataset
+        self._update_games(changes)
+        cube = dataset.pass_cube
+        known_games = set() if cube is None else set(cube['facts']['gameId'].unique())
+
+        if all(kind == 'append' for kind in changes.values()) and 'plays' in changes:
+            plays = clean_plays(self._read_changes('plays', 'append'))
+            if 'scouting' in changes:
+                play_scouting = aggregate_scouting_by_play(self._read_changes('scouting', 'append'))
+            else:
+                play_scouting = pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=PLAY_KEYS))
+            new_games = set(plays['gameId'].unique())
+            scouting_games = set(play_scouting.index.get_level_values('gameId').unique())
+            if not (new_games & known_games) and scouting_games <= new_games:
+                partial = build_pass_cube(merge_play_tables(plays, dataset.games_df, play_scouting))
+                if partial is not None:
+                    dataset.pass_cube = partial if cube is None else combine_cubes([cube, partial])
+                return new_games
+
+        # 无法增量处理（改写或追加到已有比赛）：重新流式构建
+        for name in ('plays', 'scouting'):
+            self.trackers[name].snapshot()
+        kwargs = {'chunk_size': self.chunk_size} if self.chunk_size else {}
+        dataset.pass_cube = stream_pass_cube(self.data_files['plays'], self.data_files['scouting'],
+                                             dataset.games_df, report=self.report, **kwargs)
+        return known_games | (set() if dataset.pass_cube is None else set(dataset.pass_cube['facts']['gameId'].unique()))
+
+    async def run(self, interval=DEFAULT_POLL_INTERVAL, on_update=None):
+        """后台循环：在线程中轮询文件，有更新时回到事件循环等待协程on_update完成后再继续轮询"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                updated = await asyncio.to_thread(self.poll)
+            except Exception as e:
+                self.report(f"数据热更新失败: {e}")
+                continue
+            if updated and on_update is not None:
+                await on_update()
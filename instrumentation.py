@@ -0,0 +1,141 @@
+import contextlib
+import json
+import threading
+import time
+
+# 各指标的类型与说明（Prometheus 文本格式中的 TYPE / HELP 行）
+METRIC_DEFINITIONS = {
+    'nfl_data_load_seconds': ('summary', '启动时各数据加载阶段的耗时'),
+    'nfl_data_cache_requests_total': ('counter', '列式磁盘缓存的读取次数（按表和命中结果）'),
+    'nfl_section_compute_seconds': ('summary', '板块聚合计算（立方体查询）的耗时'),
+    'nfl_section_render_seconds': ('summary', '板块渲染的耗时（含聚合计算、图表获取和界面构建）'),
+    'nfl_figure_build_seconds': ('summary', '图表缓存未命中时构建Plotly图表的耗时'),
+    'nfl_figure_serialize_seconds': ('summary', '图表序列化为JSON的耗时'),
+    'nfl_figure_payload_bytes': ('summary', '序列化后的图表大小'),
+    'nfl_figure_sent_bytes_total': ('counter', '发送给客户端的图表数据量（每次渲染计一次）'),
+    'nfl_figure_cache_hits_total': ('counter', '图表缓存命中次数'),
+    'nfl_figure_cache_misses_total': ('counter', '图表缓存未命中次数'),
+    'nfl_figure_cache_hit_ratio': ('gauge', '图表缓存命中率'),
+    'nfl_figure_cache_entries': ('gauge', '图表缓存当前条目数'),
+    'nfl_active_clients': ('gauge', '当前连接的浏览器会话数'),
+    'nfl_http_request_seconds': ('summary', 'HTTP请求耗时（仅在开启请求追踪时记录）'),
+}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Metrics:
+    """进程内指标注册表：计数器与耗时/大小汇总（count、sum、max），按Prometheus文本格式导出
+
+    未启用时 timer 返回空上下文、inc/observe 直接返回，热路径上几乎没有额外开销。
+    启用追踪日志后，每次计时还会以JSON行写入一条记录，附带 trace_context 提供的请求上下文（如会话id）。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._counters = {}
+        self._summaries = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._trace_file = None
+        self._trace_context = None
+
+    def enable(self, trace_path=None, trace_context=None):
+        """启用指标收集；给出trace_path时同时把每次计时追加写入该文件"""
+        self.enabled = True
+        if trace_path:
+            self._trace_file = open(trace_path, 'a', encoding='utf-8', buffering=1)
+            self._trace_context = trace_context
+
+    @property
+    def tracing(self):
+        return self._trace_file is not None
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total, peak = self._summaries.get(key, (0, 0.0, value))
+            self._summaries[key] = (count + 1, total + value, max(peak, value))
+
+    def gauge(self, name, collect):
+        """登记在导出时才计算的瞬时值；collect 返回数值或 {标签元组: 数值}"""
+        self._gauges[name] = collect
+
+    def timer(self, name, **labels):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timer(name, labels)
+
+    @contextlib.contextmanager
+    def _timer(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(name, seconds, **labels)
+            if self._trace_file is not None:
+                self.trace(name, seconds=round(seconds, 6), **labels)
+
+    def trace(self, event, **fields):
+        """写入一条追踪记录（未开启追踪时忽略）"""
+        if self._trace_file is None:
+            return
+        record = {'ts': round(time.time(), 6), 'event': event}
+        if self._trace_context is not None:
+            record.update(self._trace_context())
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._trace_file.write(line + '\n')
+
+    def render(self):
+        """按Prometheus文本格式（0.0.4）导出全部指标"""
+        with self._lock:
+            counters = dict(self._counters)
+            summaries = dict(self._summaries)
+        samples = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append((name, labels, value))
+        for (name, labels), (count, total, peak) in summaries.items():
+            series = samples.setdefault(name, [])
+            series.append((f'{name}_count', labels, count))
+            series.append((f'{name}_sum', labels, total))
+            samples.setdefault(f'{name}_max', []).append((f'{name}_max', labels, peak))
+        for name, collect in self._gauges.items():
+            value = collect()
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            samples[name] = [(name, tuple(labels), v) for labels, v in items]
+
+        lines = []
+        for name in sorted(samples):
+            if name.endswith('_max') and name[:-4] in METRIC_DEFINITIONS:
+                kind, description = 'gauge', METRIC_DEFINITIONS[name[:-4]][1] + '（最大值）'
+            else:
+                kind, description = METRIC_DEFINITIONS.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample, labels, value in sorted(samples[name], key=lambda s: (s[1], s[0])):
+                lines.append(f'{sample}{_format_labels(labels)} {value:.9g}')
+        return '\n'.join(lines) + '\n'
+
+
+# 进程内共享的指标注册表（默认不收集，--metrics 时启用）
+METRICS = Metrics()
@@ -0,0 +1,124 @@
+import pandas as pd
+
+from distribution import empty_counts, value_counts_by_group
+
+# 传球结果编码
+COMPLETE = 'C'
+INTERCEPTION = 'IN'
+SACK = 'S'
+TOUCHDOWN = 'TD'
+UNKNOWN_RESULT = 'unknown'
+
+# 指标引擎需要的列（只截取这些列，避免复制整张合并表）
+METRIC_COLUMNS = ['gameId', 'season', 'week', 'quarter', 'possessionTeam', 'defensiveTeam', 'passResult', 'playResult',
+                  'pass_depth', 'pass_direction']
+
+# 明细聚合的分组维度，其余维度的结果均由它汇总得到
+DETAIL_KEYS = ['quarter', 'possessionTeam', 'passResult']
+
+# 传球战术（由回合描述解析）的分组维度
+TACTIC_KEYS = ['pass_depth', 'pass_direction']
+
+# 可加的部分聚合列
+SUM_COLUMNS = ['plays', 'completions', 'touchdowns', 'interceptions', 'sacks', 'pressured', 'yards_sum', 'yards_count']
+
+
+def defensive_recovery(descriptions, defensive_team):
+    """回合中掉球后最后一次由防守方抢到球（如接球后掉球被回攻达阵）；返回与 descriptions 同索引的布尔列"""
+    recovered = descriptions.str.contains('RECOVERED by', regex=False, na=False)
+    if defensive_team is None or not recovered.any():
+        return pd.Series(False, index=descriptions.index)
+    # 贪婪匹配取最后一次抢到球的球队
+    team = descriptions[recovered].str.extract(r'.*RECOVERED by ([A-Z]{2,3})-', expand=False)
+    by_defense = team.eq(defensive_team[team.index].astype(object))
+    return by_defense.reindex(descriptions.index, fill_value=False)
+
+
+def build_indicator_frame(merged_df):
+    """截取有效传球回合并生成布尔指标列（完成、达阵、拦截、擒杀、受压）"""
+    mask = merged_df['passResult'] != UNKNOWN_RESULT
+    passes = pd.DataFrame({c: merged_df[c][mask] for c in METRIC_COLUMNS if c in merged_df.columns})
+
+    result = passes['passResult']
+    passes['completions'] = result == COMPLETE
+    passes['interceptions'] = result == INTERCEPTION
+    passes['sacks'] = result == SACK
+    # 数据中达阵不是独立的传球结果，需从回合描述中识别（排除被改判的回合，以及拦截、擒杀掉球后由防守方回攻的达阵）
+    touchdowns = result == TOUCHDOWN
+    if 'playDescription' in merged_df.columns:
+        description = merged_df['playDescription'][mask]
+        offense_td = (
+            description.str.contains('TOUCHDOWN', regex=False, na=False)
+            & ~description.str.contains('REVERSED|NULLIFIED', na=False)
+            & (result != INTERCEPTION)
+            & (result != SACK)
+        )
+        touchdowns |= offense_td & ~defensive_recovery(description, passes.get('defensiveTeam'))
+    passes['touchdowns'] = touchdowns
+    # 球探数据中至少一名防守球员造成压迫的回合
+    if 'pff_pressures' in merged_df.columns:
+        passes['pressured'] = merged_df['pff_pressures'][mask].fillna(0) > 0
+    else:
+        passes['pressured'] = False
+    if 'playResult' in passes.columns:
+        passes['yards_sum'] = passes['playResult']
+        passes['yards_count'] = passes['playResult'].notna()
+    else:
+        passes['yards_sum'] = 0.0
+        passes['yards_count'] = False
+    passes['plays'] = 1
+    return passes
+
+
+def rollup(detail, keys):
+    """将明细部分聚合汇总到指定维度，并计算比率指标"""
+    summary = detail.groupby(keys, observed=True)[SUM_COLUMNS].sum()
+    plays = summary['plays']
+    summary['completion_rate'] = summary['completions'] / plays * 100
+    summary['td_percentage'] = summary['touchdowns'] / plays * 100
+    summary['int_percentage'] = summary['interceptions'] / plays * 100
+    summary['pressure_rate'] = summary['pressured'] / plays * 100
+    summary['avg_yards'] = summary['yards_sum'] / summary['yards_count'].where(summary['yards_count'] > 0)
+    return summary.reset_index()
+
+
+def summarize_pass_metrics(detail, yard_counts, tactics=None):
+    """由可加的部分聚合（明细聚合或数据立方体切片）汇总出各板块使用的指标
+
+    tactics 为按 (传球深度, 传球方向) 可汇总的部分聚合；缺省或为空时 by_tactic 为 None。
+    """
+    by_result = rollup(detail, 'passResult').sort_values('plays', ascending=False, ignore_index=True)
+    by_quarter = rollup(detail, 'quarter')
+    by_team = rollup(detail, 'possessionTeam')
+    by_tactic = rollup(tactics, TACTIC_KEYS) if tactics is not None and not tactics.empty else None
+
+    return {
+        'has_pass_result': True,
+        'pass_count': int(detail['plays'].sum()),
+        'by_result': by_result,
+        'by_quarter': by_quarter,
+        'by_team': by_team,
+        'by_tactic': by_tactic,
+        'yard_counts': yard_counts,
+    }
+
+
+def compute_pass_metrics(merged_df):
+    """一次遍历合并表，产出各板块共用的传球聚合指标
+
+    先按 (节次, 进攻球队, 传球结果) 计算可加的部分聚合，
+    再由它汇总出按节次、按球队、按传球结果的统计，全程只使用内置的向量化归约。
+    合并表为空时返回 None。
+    """
+    if merged_df.empty:
+        return None
+    if 'passResult' not in merged_df.columns:
+        return {'has_pass_result': False, 'pass_count': 0}
+
+    passes = build_indicator_frame(merged_df)
+    detail = passes.groupby(DETAIL_KEYS, observed=True)[SUM_COLUMNS].sum().reset_index()
+    yard_counts = (value_counts_by_group(passes, 'passResult', 'playResult')
+                   if 'playResult' in passes.columns else empty_counts('passResult', 'playResult'))
+    tactics = (passes.groupby(TACTIC_KEYS, observed=True)[SUM_COLUMNS].sum().reset_index()
+               if all(key in passes.columns for key in TACTIC_KEYS) else None)
+    return summarize_pass_metrics(detail, yard_counts, tactics)
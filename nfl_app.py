@@ -1,69 +1,322 @@
+import time
+
+# 导入阶段计时需在其它导入之前开始
+from profiling import STARTUP_PROFILER
+STARTUP_PROFILER.begin('imports')
+
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from nicegui import ui
+from nicegui import Client, app, background_tasks, run, ui
+import argparse
+import asyncio
+import functools
 import os
-import matplotlib.pyplot as plt
-from matplotlib.font_manager import FontProperties
+import secrets
+import shutil
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# 设置中文字体
-plt.rcParams["font.family"] = ["SimHei", "WenQuanYi Micro Hei", "Heiti TC"]
+from assets import ASSET_CACHE_AGE, ASSET_URL_PATH, BUILD_DIR, asset_url, prepare_assets
+from cube import CUBE_KEYS, build_pass_cube, filter_options, query_pass_metrics, query_situational_metrics
+from data_cache import DataCache
+from distribution import binned_counts, box_statistics, clip_counts
+from figure_cache import DEFAULT_FIGURE_CACHE_SIZE, FIGURE_CACHE, freeze_params
+from hot_reload import DEFAULT_POLL_INTERVAL, HotReloader, LiveDataset, rows_of_games
+from instrumentation import METRICS
+from player_index import PlayerIndex, build_player_stats, collect_fouls, replace_game_fouls
+from schema import print_memory_report, read_table
+from preprocessing import add_height_columns, clean_plays, merge_play_tables
+from scouting import aggregate_scouting_by_play
+from situational import DISTANCE_LABELS, FIELD_ZONE_LABELS, build_ep_table
+from serving import StickyBalancer, install_session_cookie, start_workers, stop_workers, wait_for_workers
+from shared_store import SHARED_STORE_DIR, export_dataset, import_dataset
+from streaming import DEFAULT_CHUNK_SIZE, stream_pass_cube
 
-# 确保Plotly中文字体正常显示
-import plotly.io as pio
-pio.templates.default = "plotly_white"
+STARTUP_PROFILER.end('imports')
 
 # 颜色配置
 PRIMARY_COLOR = '#1E3A8A'
 SECONDARY_COLOR = '#F97316'
 ACCENT_COLORS = ['#10B981', '#EF4444', '#6366F1', '#F59E0B', '#8B5CF6']
+PASS_RESULT_COLORS = {
+    'C': PRIMARY_COLOR,
+    'I': '#64748B',
+    'IN': SECONDARY_COLOR,
+    'TD': ACCENT_COLORS[0],
+    'S': ACCENT_COLORS[1]
+}
 
-# 加载数据
-def load_data():
-    """从CSV文件加载所有数据"""
-    try:
-        print("正在加载数据...")
-        players_df = pd.read_csv('players.csv')
-        plays_df = pd.read_csv('plays.csv')
-        games_df = pd.read_csv('games.csv')
-        scouting_df = pd.read_csv('pffScoutingData.csv')
-        
-        print(f"数据加载完成:")
-        print(f"  - players: {players_df.shape}")
-        print(f"  - plays: {plays_df.shape}")
-        print(f"  - games: {games_df.shape}")
-        print(f"  - scouting: {scouting_df.shape}")
-        
-        return players_df, plays_df, games_df, scouting_df
-    except FileNotFoundError as e:
-        print(f"错误：找不到CSV文件 - {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+# 码数分布图的展示模式与分箱宽度
+DISTRIBUTION_MODES = {'box': '箱线图', 'histogram': '直方图', 'violin': '小提琴图'}
+DISTRIBUTION_BIN_WIDTH = 2
+
+# 传球深度与方向的中文标签（顺序即图表中的顺序）
+PASS_DEPTH_LABELS = {'short': '短传', 'deep': '长传'}
+PASS_DIRECTION_LABELS = {'left': '左', 'middle': '中', 'right': '右'}
+
+# 档数的中文标签与情境热力图中给出结论所需的最少回合数
+DOWN_LABELS = {1: '第一档', 2: '第二档', 3: '第三档', 4: '第四档'}
+SITUATION_MIN_PLAYS = 30
+
+# 球员下钻中展示的球探汇总指标
+PLAYER_STAT_LABELS = {
+    'pff_passRushers': '传球冲击（Pass Rush）',
+    'pff_passBlockers': '传球保护（Pass Block）',
+    'pff_hits': '击中四分卫',
+    'pff_hurries': '催促出手',
+    'pff_sacks': '擒杀',
+    'pff_hitsAllowed': '被击中（保护失败）',
+    'pff_hurriesAllowed': '被催促（保护失败）',
+    'pff_sacksAllowed': '被擒杀（保护失败）',
+    'pff_beatenBlocks': '被突破的阻挡',
+}
+# 球员检索板块默认列出的犯规最多球员数
+PLAYER_LEADER_COUNT = 10
+
+# 多进程模式下传给工作进程的指标访问令牌（环境变量名）
+METRICS_TOKEN_ENV = 'NFL_METRICS_TOKEN'
+
+# 数据源文件
+DATA_FILES = {
+    'players': 'players.csv',
+    'plays': 'plays.csv',
+    'games': 'games.csv',
+    'scouting': 'pffScoutingData.csv',
+}
+
+# 传球数据立方体依赖的源表（球员表单独加载，其变化不会使合并表和立方体的缓存失效）
+PASS_SOURCES = ('plays', 'games', 'scouting')
+
+# 加载单张源表
+def load_source_table(cache, name):
+    """按声明的schema从CSV文件加载一张源表；传入cache时优先读取列式缓存，仅在源文件变化时重新解析
+
+    找不到文件等错误直接抛出，由调用方报告给依赖该表的板块。
+    """
+    start = time.perf_counter()
+    reader = functools.partial(read_table, name)
+    with STARTUP_PROFILER.phase(f'load:{name}'), METRICS.timer('nfl_data_load_seconds', stage=f'load:{name}'):
+        if cache is None:
+            df, status = reader(DATA_FILES[name]), '未启用缓存'
+        else:
+            df, hit = cache.load_table(name, DATA_FILES[name], reader)
+            status = '缓存命中' if hit else '缓存未命中'
+    # 整行一次写出，避免各表在不同线程中加载时输出交错
+    print(f"  - {name}: {df.shape} [{status}] {time.perf_counter() - start:.2f}s\n", end='')
+    return df
 
 # 数据预处理
-def preprocess_data(players_df, plays_df, games_df, scouting_df):
-    """预处理和清洗数据"""
+def merge_sources(plays_df, games_df, scouting_df):
+    """清洗plays数据，并与比赛元数据、按回合聚合的球探数据合并"""
+    # 处理plays数据：填充缺失值+类型转换
+    plays_df = clean_plays(plays_df)
+    
+    # 多表合并：关联比赛事件和元数据；球探数据先压缩为每回合一行再按索引连接，避免回合被逐球员复制
+    play_scouting = aggregate_scouting_by_play(scouting_df)
+    merged_df = merge_play_tables(plays_df, games_df, play_scouting)
+    
+    # 打印合并后列名用于调试
+    print(f"合并后数据列名: {merged_df.columns.tolist()}")
+    return merged_df
+
+def preprocess_data(players_df, plays_df, games_df, scouting_df, keep_player_scouting=True):
+    """预处理和清洗数据；keep_player_scouting为False时不返回逐球员球探表以节省内存"""
     if players_df.empty or plays_df.empty or games_df.empty or scouting_df.empty:
         return players_df, plays_df, games_df, scouting_df
     
     # 处理players数据：身高单位转换（英尺-英寸→总英寸）
-    if 'height' in players_df.columns:
-        height_split = players_df['height'].str.split('-', n=1, expand=True)
-        players_df['height_feet'] = height_split[0].astype(float)
-        players_df['height_inches'] = height_split[1].astype(float)
-        players_df['height_total_inches'] = players_df['height_feet'] * 12 + players_df['height_inches']
+    players_df = add_height_columns(players_df)
+    merged_df = merge_sources(plays_df, games_df, scouting_df)
     
-    # 处理plays数据：填充缺失值+类型转换
-    plays_df['passResult'] = plays_df['passResult'].fillna('unknown')  # 传球结果缺失值用'unknown'标记
-    plays_df['quarter'] = plays_df['quarter'].astype(int)  # 确保节次为整数
+    # 逐球员球探数据仅在需要下钻分析时保留
+    if not keep_player_scouting:
+        scouting_df = pd.DataFrame()
     
-    # 多表合并：关联比赛事件、元数据和球探数据
-    merged_df = pd.merge(plays_df, games_df, on='gameId', how='left')
-    merged_df = pd.merge(merged_df, scouting_df, on=['gameId', 'playId'], how='left')
+    return players_df, merged_df, games_df, scouting_df
+
+# 合并表（预处理结果同样写入缓存）
+def load_merged(cache, plays_df, games_df, scouting_df):
+    """返回合并表；plays、games与球探源文件均未变化时直接读取缓存的合并表"""
+    empty = [name for name, df in zip(PASS_SOURCES, (plays_df, games_df, scouting_df)) if df.empty]
+    if empty:
+        raise ValueError(f"数据表为空: {', '.join(empty)}")
     
-    # 打印合并后列名用于调试
-    print(f"合并后数据列名: {merged_df.columns.tolist()}")
+    def build():
+        return {'merged': merge_sources(plays_df, games_df, scouting_df)}
     
-    return players_df, merged_df, games_df, scouting_df
+    start = time.perf_counter()
+    with STARTUP_PROFILER.phase('preprocess_data'), METRICS.timer('nfl_data_load_seconds', stage='preprocess_data'):
+        if cache is None:
+            frames, status = build(), '未启用缓存'
+        else:
+            frames, hit = cache.load_derived('preprocessed', list(PASS_SOURCES), build)
+            status = '缓存命中' if hit else '缓存未命中'
+    print(f"  - preprocessed: {frames['merged'].shape} [{status}] {time.perf_counter() - start:.2f}s")
+    return frames['merged']
+
+# 期望得分查找表（同样写入缓存）
+def load_ep_table(cache, merged_df):
+    """由合并表估计 (档数, 剩余码数, 场区) 的期望得分；缺少情境列时返回 None"""
+    def build():
+        ep_table = build_ep_table(merged_df)
+        return {} if ep_table is None else {'ep_table': ep_table}
+    
+    start = time.perf_counter()
+    with STARTUP_PROFILER.phase('ep_table'), METRICS.timer('nfl_data_load_seconds', stage='ep_table'):
+        if cache is None:
+            frames, status = build(), '未启用缓存'
+        else:
+            frames, hit = cache.load_derived('ep_table', list(PASS_SOURCES), build)
+            status = '缓存命中' if hit else '缓存未命中'
+    ep_table = frames.get('ep_table')
+    size = len(ep_table) if ep_table is not None else '缺少情境列'
+    print(f"  - ep_table: {size} [{status}] {time.perf_counter() - start:.2f}s")
+    return ep_table
+
+# 构建传球数据立方体（同样写入缓存）
+def load_pass_cube(cache, merged_df, ep_table=None):
+    """构建或从缓存读取传球数据立方体；合并表为空或缺少维度列时返回 None"""
+    if merged_df.empty or any(key not in merged_df.columns for key in CUBE_KEYS):
+        return None
+    
+    def build():
+        return build_pass_cube(merged_df, ep_table)
+    
+    start = time.perf_counter()
+    with STARTUP_PROFILER.phase('pass_cube'), METRICS.timer('nfl_data_load_seconds', stage='pass_cube'):
+        if cache is None:
+            cube, status = build(), '未启用缓存'
+        else:
+            cube, hit = cache.load_derived('pass_cube', list(PASS_SOURCES), build)
+            status = '缓存命中' if hit else '缓存未命中'
+    print(f"  - pass_cube: {cube['facts'].shape} [{status}] {time.perf_counter() - start:.2f}s")
+    return cube
+
+# 流式加载（多赛季大数据集）
+def load_streaming_cube(cache, games_df, chunk_size=DEFAULT_CHUNK_SIZE):
+    """流式模式：plays与球探数据分块读取，逐块关联比赛表后折叠进传球数据立方体，不构建完整合并表
+
+    流式立方体没有情境部分（不估计期望得分），以单独的派生表名缓存，不会被常规模式当作完整的立方体读取。
+    """
+    def build():
+        return stream_pass_cube(DATA_FILES['plays'], DATA_FILES['scouting'], games_df, chunk_size) or {}
+    
+    start = time.perf_counter()
+    with STARTUP_PROFILER.phase('stream_pass_cube'), METRICS.timer('nfl_data_load_seconds', stage='stream_pass_cube'):
+        if cache is None:
+            cube, status = build(), '未启用缓存'
+        else:
+            # 比赛表由调用方传入，也登记其指纹，缓存键不依赖调用方是否经缓存读取了它
+            for name in PASS_SOURCES:
+                cache.track_source(name, DATA_FILES[name])
+            cube, hit = cache.load_derived('stream_pass_cube', list(PASS_SOURCES), build)
+            status = '缓存命中' if hit else '缓存未命中'
+    print(f"  - pass_cube: [{status}] {time.perf_counter() - start:.2f}s")
+    return cube or None
+
+# 球员下钻聚合（同样写入缓存）
+def load_player_stats(cache, merged_df, scouting_df):
+    """预先计算球员索引使用的逐球员球探汇总与犯规长表；源文件均未变化时直接读取缓存"""
+    def build():
+        return build_player_stats(merged_df, scouting_df)
+    
+    start = time.perf_counter()
+    with STARTUP_PROFILER.phase('player_stats'), METRICS.timer('nfl_data_load_seconds', stage='player_stats'):
+        if cache is None:
+            stats, status = build(), '未启用缓存'
+        else:
+            stats, hit = cache.load_derived('player_stats', list(PASS_SOURCES), build)
+            status = '缓存命中' if hit else '缓存未命中'
+    print(f"  - player_stats: 球员 {len(stats['scouting'])} 名, 犯规 {len(stats['fouls'])} 次 [{status}] "
+          f"{time.perf_counter() - start:.2f}s")
+    return stats
+
+# 热更新后只重新展开受影响比赛的犯规，并只更新这些比赛涉及的球员记录
+def update_player_fouls(dataset, games):
+    """返回 (新的player_stats, 新的球员索引)；在线程中执行，原有结果在替换前保持可用"""
+    game_fouls = collect_fouls(rows_of_games(dataset.merged_df, games))
+    fouls, nfl_ids = replace_game_fouls(dataset.player_stats['fouls'], games, game_fouls)
+    return {**dataset.player_stats, 'fouls': fouls}, dataset.player_index.with_fouls(fouls, nfl_ids)
+
+def describe_load_error(error):
+    """将加载异常转换为板块内显示的说明"""
+    if isinstance(error, FileNotFoundError):
+        return f"找不到CSV文件 {error.filename}"
+    return f"{type(error).__name__}: {error}"
+
+# 后台加载数据集
+async def populate_dataset(dataset, cache, stream=False, chunk_size=DEFAULT_CHUNK_SIZE, keep_player_scouting=True):
+    """服务启动后并发加载数据并逐步填充数据集
+
+    各源表在线程池中同时读取；球员表就绪即标记 players，页面随即渲染球员数据概览，
+    传球相关板块等plays、games与球探数据合并并构建立方体后再填充（流式模式下只完整读取players、games小表）；
+    球员索引在球员表与逐球员汇总（球探、犯规）都就绪后构建，流式模式或传球数据加载失败时只包含球员表字段。
+    某一部分加载失败只把该部分标记为失败，由依赖它的板块显示原因。
+    """
+    if stream:
+        print(f"正在以流式模式加载数据（每块 {chunk_size} 行）...")
+    else:
+        print("正在加载数据...")
+    dataset.stream = stream
+    names = ('players', 'games') if stream else tuple(DATA_FILES)
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='nfl-load')
+    tables = {name: loop.run_in_executor(pool, load_source_table, cache, name) for name in names}
+    pool.shutdown(wait=False)
+    
+    async def load_players():
+        players_df = add_height_columns(await tables['players'])
+        dataset.mark_ready('players', players_df=players_df)
+        return {'players': players_df}
+    
+    async def load_pass_data():
+        if stream:
+            games_df = await tables['games']
+            pass_cube = await run.io_bound(load_streaming_cube, cache, games_df, chunk_size)
+            dataset.mark_ready('pass_cube', games_df=games_df, pass_cube=pass_cube)
+            return {'games': games_df, **(pass_cube or {})}
+        
+        plays_df, games_df, scouting_df = await asyncio.gather(*(tables[name] for name in PASS_SOURCES))
+        merged_df = await run.io_bound(load_merged, cache, plays_df, games_df, scouting_df)
+        ep_table = await run.io_bound(load_ep_table, cache, merged_df)
+        pass_cube = await run.io_bound(load_pass_cube, cache, merged_df, ep_table)
+        player_stats = await run.io_bound(load_player_stats, cache, merged_df, scouting_df)
+        # 逐球员球探数据仅在需要下钻分析时保留
+        if not keep_player_scouting:
+            scouting_df = pd.DataFrame()
+        dataset.mark_ready('pass_cube', games_df=games_df, merged_df=merged_df, scouting_df=scouting_df,
+                           pass_cube=pass_cube, ep_table=ep_table)
+        return {'merged': merged_df, 'games': games_df, 'scouting': scouting_df,
+                'player_scouting': player_stats['scouting'], 'fouls': player_stats['fouls']}
+    
+    async def load_player_index():
+        players, pass_frames = await asyncio.gather(players_task, pass_task)
+        if 'players' not in players:
+            raise ValueError(dataset.errors.get('players', '球员表加载失败'))
+        player_stats = None
+        if 'fouls' in pass_frames:
+            player_stats = {'scouting': pass_frames['player_scouting'], 'fouls': pass_frames['fouls']}
+        player_index = await run.io_bound(PlayerIndex, players['players'], player_stats)
+        dataset.mark_ready('player_index', player_stats=player_stats, player_index=player_index)
+        return {}
+    
+    async def load_part(part, load):
+        STARTUP_PROFILER.begin(f'ready:{part}')
+        try:
+            return await load()
+        except Exception as e:
+            print(f"错误：{part} 加载失败 - {e}")
+            dataset.mark_failed(part, describe_load_error(e))
+            return {}
+        finally:
+            STARTUP_PROFILER.end(f'ready:{part}')
+    
+    players_task = asyncio.ensure_future(load_part('players', load_players))
+    pass_task = asyncio.ensure_future(load_part('pass_cube', load_pass_data))
+    frames = await asyncio.gather(players_task, pass_task, load_part('player_index', load_player_index))
+    print("数据加载完成")
+    print_memory_report({name: df for part in frames for name, df in part.items()})
 
 # 1. 球员数据概览板块（含数据分析）
 def create_player_overview_section(players_df):
@@ -97,19 +350,24 @@ def create_player_overview_section(players_df):
         
         # 球员位置分布图表及分析
         if 'officialPosition' in players_df.columns:
-            position_counts = players_df['officialPosition'].value_counts().reset_index()
-            position_counts.columns = ['位置', '数量']
+            def build_position_figure():
+                px, _ = plotly_modules()
+                position_counts = players_df['officialPosition'].value_counts().reset_index()
+                position_counts.columns = ['位置', '数量']
             
-            # 生成位置分布柱状图
-            fig = px.bar(
-                position_counts,
-                x='位置',
-                y='数量',
-                title='球员位置分布',
-                labels={'位置': '球员位置', '数量': '球员数量'},
-                color_discrete_sequence=[PRIMARY_COLOR]
-            )
-            fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+                # 生成位置分布柱状图
+                fig = px.bar(
+                    position_counts,
+                    x='位置',
+                    y='数量',
+                    title='球员位置分布',
+                    labels={'位置': '球员位置', '数量': '球员数量'},
+                    color_discrete_sequence=[PRIMARY_COLOR]
+                )
+                fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+                return fig
+            
+            fig = cached_figure('player-overview', 'positions', build_position_figure)
             
             with ui.card().classes('w-full mt-4'):
                 ui.label('球员位置分布').classes('text-xl font-semibold mb-2')
@@ -122,9 +380,9 @@ def create_player_overview_section(players_df):
                 ui.label('3. 外接手（T）与跑卫（TE）数量均衡，说明传球与跑球战术的平衡配置。')
 
 # 2. 传球结果分析板块（含数据分析）
-def create_pass_analysis_section(merged_df):
-    """创建传球结果分析板块，含结果分布与节次效率分析"""
-    if merged_df.empty:
+def create_pass_analysis_section(metrics, filters=None):
+    """创建传球结果分析板块，含结果分布与节次效率分析；filters 为当前筛选条件（用于图表缓存键）"""
+    if metrics is None or not metrics['has_pass_result']:
         with ui.card().classes('w-full max-w-4xl mx-auto'):
             ui.label('数据加载失败').classes('text-2xl font-bold mb-4 text-red-500')
         return
@@ -132,68 +390,77 @@ def create_pass_analysis_section(merged_df):
     with ui.card().classes('w-full max-w-4xl mx-auto'):
         ui.label('传球结果分析').classes('text-2xl font-bold mb-4')
         
-        # 筛选传球数据（排除未知结果）
-        pass_plays = merged_df[merged_df['passResult'] != 'unknown'].copy()
-        
-        # 传球结果分布饼图及分析
-        pass_result_counts = pass_plays['passResult'].value_counts().reset_index()
-        pass_result_counts.columns = ['结果', '数量']
-        
-        fig_pie = px.pie(
-            pass_result_counts,
-            values='数量',
-            names='结果',
-            title='传球结果分布',
-            hole=0.3,
-            color_discrete_map={
-                'C': PRIMARY_COLOR,  # 成功传球
-                'I': '#64748B',      # 未完成
-                'IN': SECONDARY_COLOR, # 拦截
-                'TD': ACCENT_COLORS[0], # 达阵
-                'S': ACCENT_COLORS[1]  # 被 sacks
-            }
-        )
+        if metrics['pass_count'] == 0:
+            with ui.card().classes('w-full bg-yellow-50 p-4'):
+                ui.label('警告: 当前筛选条件下没有找到有效的传球数据').classes('text-yellow-800')
+            return
+        
+        # 传球结果分布饼图及分析（聚合结果来自共享指标引擎）
+        def build_result_pie():
+            px, _ = plotly_modules()
+            pass_result_counts = metrics['by_result'][['passResult', 'plays']]
+            pass_result_counts.columns = ['结果', '数量']
+        
+            fig_pie = px.pie(
+                pass_result_counts,
+                values='数量',
+                names='结果',
+                title='传球结果分布',
+                hole=0.3,
+                color_discrete_map={
+                    'C': PRIMARY_COLOR,  # 成功传球
+                    'I': '#64748B',      # 未完成
+                    'IN': SECONDARY_COLOR, # 拦截
+                    'TD': ACCENT_COLORS[0], # 达阵
+                    'S': ACCENT_COLORS[1]  # 被 sacks
+                }
+            )
+            return fig_pie
+        
+        fig_pie = cached_figure('pass-analysis', 'result-pie', build_result_pie, filters)
         
         # 各节传球次数和成功率分析
-        quarter_data = pass_plays.groupby('quarter').agg(
-            pass_count=('playId', 'count'),
-            completion_rate=('passResult', lambda x: (x == 'C').mean() * 100)
-        ).reset_index()
-        
-        fig_bar = go.Figure()
-        fig_bar.add_trace(go.Bar(
-            x=quarter_data['quarter'],
-            y=quarter_data['pass_count'],
-            name='传球次数',
-            marker_color=PRIMARY_COLOR,
-            yaxis='y'
-        ))
-        fig_bar.add_trace(go.Scatter(
-            x=quarter_data['quarter'],
-            y=quarter_data['completion_rate'],
-            name='完成率(%)',
-            marker_color=SECONDARY_COLOR,
-            yaxis='y2'
-        ))
-        fig_bar.update_layout(
-            title='各节传球次数和完成率',
-            xaxis_title='节次',
-            yaxis=dict(
-                title='传球次数',
-                titlefont=dict(color=PRIMARY_COLOR),
-                tickfont=dict(color=PRIMARY_COLOR)
-            ),
-            yaxis2=dict(
-                title='完成率(%)',
-                titlefont=dict(color=SECONDARY_COLOR),
-                tickfont=dict(color=SECONDARY_COLOR),
-                anchor='free',
-                overlaying='y',
-                side='right',
-                position=1
-            ),
-            legend=dict(x=0, y=1)
-        )
+        def build_quarter_figure():
+            _, go = plotly_modules()
+            quarter_data = metrics['by_quarter'].rename(columns={'plays': 'pass_count'})
+        
+            fig_bar = go.Figure()
+            fig_bar.add_trace(go.Bar(
+                x=quarter_data['quarter'],
+                y=quarter_data['pass_count'],
+                name='传球次数',
+                marker_color=PRIMARY_COLOR,
+                yaxis='y'
+            ))
+            fig_bar.add_trace(go.Scatter(
+                x=quarter_data['quarter'],
+                y=quarter_data['completion_rate'],
+                name='完成率(%)',
+                marker_color=SECONDARY_COLOR,
+                yaxis='y2'
+            ))
+            fig_bar.update_layout(
+                title='各节传球次数和完成率',
+                xaxis_title='节次',
+                yaxis=dict(
+                    title='传球次数',
+                    titlefont=dict(color=PRIMARY_COLOR),
+                    tickfont=dict(color=PRIMARY_COLOR)
+                ),
+                yaxis2=dict(
+                    title='完成率(%)',
+                    titlefont=dict(color=SECONDARY_COLOR),
+                    tickfont=dict(color=SECONDARY_COLOR),
+                    anchor='free',
+                    overlaying='y',
+                    side='right',
+                    position=1
+                ),
+                legend=dict(x=0, y=1)
+            )
+            return fig_bar
+        
+        fig_bar = cached_figure('pass-analysis', 'quarter-bar', build_quarter_figure, filters)
         
         # 显示图表
         with ui.row().classes('w-full'):
@@ -212,30 +479,19 @@ def create_pass_analysis_section(merged_df):
                 ui.label('1. 第四节传球次数显著增加（约50k），反映比赛末段通过传球追分的战术倾向。')
                 ui.label('2. 完成率随节次下降（从54.5%降至52%），可能与体能下降和防守强度提升有关。')
         
-        # 传球码数分布及分析
-        if 'playResult' in pass_plays.columns:
-            pass_plays_filtered = pass_plays[(pass_plays['playResult'] > -30) & (pass_plays['playResult'] < 80)]
-            
-            fig_box = px.box(
-                pass_plays_filtered,
-                x='passResult',
-                y='playResult',
-                title='不同传球结果的码数分布',
-                labels={'passResult': '传球结果', 'playResult': '推进码数'},
-                color='passResult',
-                color_discrete_map={
-                    'C': PRIMARY_COLOR, 
-                    'I': '#64748B', 
-                    'IN': SECONDARY_COLOR,
-                    'TD': ACCENT_COLORS[0],
-                    'S': ACCENT_COLORS[1]
-                }
-            )
-            fig_box.update_layout(showlegend=False)
+        # 传球码数分布及分析（分位数、须和离群点均在服务端由码数计数求得，图表体积与数据量无关）
+        yard_counts = metrics['yard_counts']
+        if not yard_counts.empty:
+            def yards_figure(mode):
+                return cached_figure('pass-analysis', 'yards-distribution',
+                                     lambda: build_yards_distribution_figure(yard_counts, mode),
+                                     {**(filters or {}), 'mode': mode})
             
             with ui.card().classes('w-full mt-4'):
                 ui.label('不同传球结果的码数分布').classes('text-xl font-semibold mb-2')
-                ui.plotly(fig_box)
+                yards_plot = ui.plotly(yards_figure('box'))
+                ui.toggle(DISTRIBUTION_MODES, value='box',
+                          on_change=lambda e: yards_plot.update_figure(yards_figure(e.value)))
                 # 码数分布分析
                 ui.label('数据分析：').classes('text-lg font-medium mt-3')
                 ui.label('1. 达阵（TD）平均推进码数最高（约30码），但离散度大，反映长传战术的高风险高回报特性。')
@@ -243,9 +499,9 @@ def create_pass_analysis_section(merged_df):
                 ui.label('3. 被 sacks（S）和拦截（IN）均为负码数，需通过加强保护减少此类失误。')
 
 # 3. 比赛战术分布板块（含数据分析）
-def create_play_type_section(merged_df):
+def create_play_type_section(metrics, filters=None):
     """创建比赛战术分布板块，分析传球战术效果"""
-    if merged_df.empty:
+    if metrics is None:
         with ui.card().classes('w-full max-w-4xl mx-auto'):
             ui.label('数据加载失败').classes('text-2xl font-bold mb-4 text-red-500')
         return
@@ -253,31 +509,35 @@ def create_play_type_section(merged_df):
     with ui.card().classes('w-full max-w-4xl mx-auto'):
         ui.label('比赛战术分布（基于传球数据）').classes('text-2xl font-bold mb-4')
         
-        if 'passResult' not in merged_df.columns:
+        if not metrics['has_pass_result']:
             with ui.card().classes('w-full bg-yellow-50 p-4'):
                 ui.label('警告: 数据中不存在 passResult 列，无法分析传球相关战术分布').classes('text-yellow-800')
             return
         
-        # 筛选有效传球数据
-        pass_related_plays = merged_df[merged_df['passResult'] != 'unknown'].copy()
-        if pass_related_plays.empty:
+        # 有效传球数据
+        if metrics['pass_count'] == 0:
             with ui.card().classes('w-full bg-yellow-50 p-4'):
                 ui.label('警告: 没有找到有效的传球相关数据').classes('text-yellow-800')
             return
         
         # 传球结果分布（战术基础分析）
-        pass_result_counts = pass_related_plays['passResult'].value_counts().reset_index()
-        pass_result_counts.columns = ['传球结果', '数量']
-        
-        fig = px.bar(
-            pass_result_counts,
-            x='传球结果',
-            y='数量',
-            title='传球结果分布（战术关联分析）',
-            labels={'传球结果': '传球结果类型', '数量': '出现次数'},
-            color_discrete_sequence=[PRIMARY_COLOR]
-        )
-        fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+        def build_result_bar():
+            px, _ = plotly_modules()
+            pass_result_counts = metrics['by_result'][['passResult', 'plays']]
+            pass_result_counts.columns = ['传球结果', '数量']
+        
+            fig = px.bar(
+                pass_result_counts,
+                x='传球结果',
+                y='数量',
+                title='传球结果分布（战术关联分析）',
+                labels={'传球结果': '传球结果类型', '数量': '出现次数'},
+                color_discrete_sequence=[PRIMARY_COLOR]
+            )
+            fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+        
+        fig = cached_figure('play-type', 'result-bar', build_result_bar, filters)
         
         with ui.card().classes('w-full mt-4'):
             ui.label('传球结果分布（作为战术分析参考）').classes('text-xl font-semibold mb-2')
@@ -288,18 +548,23 @@ def create_play_type_section(merged_df):
             ui.label('2. 未完成传球（I）占比约30%，需结合防守 Coverage 数据进一步分析失败原因。')
 
         # 传球结果与推进码数关联分析（战术效果评估）
-        avg_yards_by_pass_result = pass_related_plays.groupby('passResult')['playResult'].mean().reset_index()
-        avg_yards_by_pass_result.columns = ['传球结果', '平均推进码数']
-        
-        fig_yards = px.bar(
-            avg_yards_by_pass_result,
-            x='传球结果',
-            y='平均推进码数',
-            title='不同传球结果的平均推进码数',
-            labels={'传球结果': '传球结果类型', '平均推进码数': '平均推进码数'},
-            color_discrete_sequence=[SECONDARY_COLOR]
-        )
-        fig_yards.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+        def build_avg_yards_figure():
+            px, _ = plotly_modules()
+            avg_yards_by_pass_result = metrics['by_result'].sort_values('passResult')[['passResult', 'avg_yards']]
+            avg_yards_by_pass_result.columns = ['传球结果', '平均推进码数']
+        
+            fig_yards = px.bar(
+                avg_yards_by_pass_result,
+                x='传球结果',
+                y='平均推进码数',
+                title='不同传球结果的平均推进码数',
+                labels={'传球结果': '传球结果类型', '平均推进码数': '平均推进码数'},
+                color_discrete_sequence=[SECONDARY_COLOR]
+            )
+            fig_yards.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+            return fig_yards
+        
+        fig_yards = cached_figure('play-type', 'avg-yards', build_avg_yards_figure, filters)
         
         with ui.card().classes('w-full mt-4'):
             ui.label('不同传球结果的平均推进码数').classes('text-xl font-semibold mb-2')
@@ -310,10 +575,75 @@ def create_play_type_section(merged_df):
             ui.label('2. 成功传球（C）平均推进10.5码，效率稳定，可作为常规进攻选择。')
             ui.label('3. 建议增加中距离传球战术（15-20码），平衡效率与风险。')
 
+        # 传球深度×方向战术分析（由回合描述解析）
+        tactics = metrics.get('by_tactic')
+        if tactics is None or tactics.empty:
+            with ui.card().classes('w-full bg-yellow-50 p-4 mt-4'):
+                ui.label('提示: 回合描述中未解析到传球深度与方向，无法生成战术分析').classes('text-yellow-800')
+            return
+        tactics = tactics.assign(
+            depth=tactics['pass_depth'].map(PASS_DEPTH_LABELS).astype(str),
+            direction=tactics['pass_direction'].map(PASS_DIRECTION_LABELS).astype(str),
+        )
+
+        def build_tactic_heatmap():
+            _, go = plotly_modules()
+            attempts = tactics.pivot(index='depth', columns='direction', values='plays')
+            rates = tactics.pivot(index='depth', columns='direction', values='completion_rate')
+            rows = [label for label in PASS_DEPTH_LABELS.values() if label in attempts.index]
+            columns = [label for label in PASS_DIRECTION_LABELS.values() if label in attempts.columns]
+            attempts, rates = attempts.loc[rows, columns], rates.loc[rows, columns]
+            text = [[f"{int(n)}次<br>完成率 {r:.1f}%" if pd.notna(n) else '' for n, r in zip(n_row, r_row)]
+                    for n_row, r_row in zip(attempts.to_numpy(), rates.to_numpy())]
+
+            fig = go.Figure(go.Heatmap(
+                z=attempts.to_numpy(), x=columns, y=rows, text=text, texttemplate='%{text}',
+                colorscale='Blues', colorbar=dict(title='传球次数'),
+                hovertemplate='%{y} %{x}<br>%{text}<extra></extra>'
+            ))
+            fig.update_layout(title='传球深度×方向：出手次数与完成率', xaxis_title='传球方向', yaxis_title='传球深度',
+                              margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+
+        def build_tactic_yards():
+            px, _ = plotly_modules()
+            fig = px.bar(
+                tactics,
+                x='direction',
+                y='avg_yards',
+                color='depth',
+                barmode='group',
+                category_orders={'direction': list(PASS_DIRECTION_LABELS.values()),
+                                 'depth': list(PASS_DEPTH_LABELS.values())},
+                title='不同深度与方向的平均推进码数',
+                labels={'direction': '传球方向', 'avg_yards': '平均推进码数', 'depth': '传球深度'},
+                color_discrete_sequence=[PRIMARY_COLOR, SECONDARY_COLOR]
+            )
+            fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+
+        fig_heatmap = cached_figure('play-type', 'tactic-heatmap', build_tactic_heatmap, filters)
+        fig_tactic_yards = cached_figure('play-type', 'tactic-yards', build_tactic_yards, filters)
+
+        with ui.card().classes('w-full mt-4'):
+            ui.label('传球深度与方向战术分析').classes('text-xl font-semibold mb-2')
+            ui.plotly(fig_heatmap)
+            ui.plotly(fig_tactic_yards)
+            # 由当前筛选范围内的数据生成的分析
+            most_used = tactics.loc[tactics['plays'].idxmax()]
+            best_yards = tactics.loc[tactics['avg_yards'].idxmax()]
+            deep_share = tactics.loc[tactics['pass_depth'] == 'deep', 'plays'].sum() / tactics['plays'].sum() * 100
+            ui.label('数据分析：').classes('text-lg font-medium mt-3')
+            ui.label(f"1. 最常用的组合是{most_used['depth']}{most_used['direction']}路"
+                     f"（{int(most_used['plays'])}次，完成率{most_used['completion_rate']:.1f}%）。")
+            ui.label(f"2. 平均推进最多的组合是{best_yards['depth']}{best_yards['direction']}路"
+                     f"（{best_yards['avg_yards']:.1f}码/次）。")
+            ui.label(f"3. 长传占可解析传球的{deep_share:.1f}%，可结合完成率评估长传的风险收益。")
+
 # 4. 球队进攻效率对比板块（含数据分析）
-def create_team_comparison_section(merged_df):
+def create_team_comparison_section(metrics, filters=None):
     """创建球队进攻效率对比板块，多维度评估球队表现"""
-    if merged_df.empty:
+    if metrics is None:
         with ui.card().classes('w-full max-w-4xl mx-auto'):
             ui.label('数据加载失败').classes('text-2xl font-bold mb-4 text-red-500')
         return
@@ -321,60 +651,64 @@ def create_team_comparison_section(merged_df):
     with ui.card().classes('w-full max-w-4xl mx-auto'):
         ui.label('球队进攻效率对比').classes('text-2xl font-bold mb-4')
         
-        if 'passResult' not in merged_df.columns:
+        if not metrics['has_pass_result']:
             with ui.card().classes('w-full bg-yellow-50 p-4'):
                 ui.label('警告: 数据中不存在 passResult 列，无法分析传球效率').classes('text-yellow-800')
             return
         
-        # 筛选有效传球数据
-        pass_plays = merged_df[merged_df['passResult'] != 'unknown'].copy()
-        
-        if pass_plays.empty:
+        # 有效传球数据
+        if metrics['pass_count'] == 0:
             with ui.card().classes('w-full bg-yellow-50 p-4'):
                 ui.label('警告: 没有找到有效的传球数据').classes('text-yellow-800')
             return
         
-        # 计算各球队传球效率指标
-        team_stats = pass_plays.groupby('possessionTeam').agg(
-            pass_attempts=('playId', 'count'),
-            completion_rate=('passResult', lambda x: (x == 'C').mean() * 100),
-            avg_yards=('playResult', 'mean'),
-            td_percentage=('passResult', lambda x: (x == 'TD').mean() * 100),
-            int_percentage=('passResult', lambda x: (x == 'IN').mean() * 100)
-        ).reset_index()
+        # 各球队传球效率指标
+        team_stats = metrics['by_team'].rename(columns={'plays': 'pass_attempts'})
         
         # 筛选传球次数较多的前10支球队（避免小样本偏差）
         if len(team_stats) > 10:
             team_stats = team_stats.sort_values('pass_attempts', ascending=False).head(10)
         
+        # 推进指标（每次推进得分、红区达阵率）从推进立方体按同样的筛选条件汇总
+        drives = metrics.get('drives_by_team')
+        if drives is not None:
+            drive_columns = ['drives', 'points_per_drive', 'red_zone_drives', 'red_zone_td_rate']
+            team_stats = team_stats.join(drives.set_index(drives['possessionTeam'].astype(str))[drive_columns],
+                                         on=team_stats['possessionTeam'].astype(str))
+        
         # 创建雷达图对比球队传球效率
-        categories = ['完成率(%)', '平均码数', '达阵率(%)', '低拦截率(%)']
+        def build_radar_figure():
+            _, go = plotly_modules()
+            categories = ['完成率(%)', '平均码数', '达阵率(%)', '低拦截率(%)']
         
-        fig = go.Figure()
+            fig = go.Figure()
         
-        for index, row in team_stats.iterrows():
-            values = [
-                row['completion_rate'],
-                row['avg_yards'] / team_stats['avg_yards'].max() * 100,  # 归一化处理
-                row['td_percentage'],
-                100 - row['int_percentage']  # 转换为正向指标（拦截率越低越好）
-            ]
+            for index, row in team_stats.iterrows():
+                values = [
+                    row['completion_rate'],
+                    row['avg_yards'] / team_stats['avg_yards'].max() * 100,  # 归一化处理
+                    row['td_percentage'],
+                    100 - row['int_percentage']  # 转换为正向指标（拦截率越低越好）
+                ]
             
-            fig.add_trace(go.Scatterpolar(
-                r=values,
-                theta=categories,
-                fill='toself',
-                name=row['possessionTeam'],
-                line=dict(width=2)
-            ))
+                fig.add_trace(go.Scatterpolar(
+                    r=values,
+                    theta=categories,
+                    fill='toself',
+                    name=row['possessionTeam'],
+                    line=dict(width=2)
+                ))
         
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, 100])
-            ),
-            title='球队传球效率对比',
-            showlegend=True
-        )
+            fig.update_layout(
+                polar=dict(
+                    radialaxis=dict(visible=True, range=[0, 100])
+                ),
+                title='球队传球效率对比',
+                showlegend=True
+            )
+            return fig
+        
+        fig = cached_figure('team-comparison', 'radar', build_radar_figure, filters)
         
         # 显示雷达图
         with ui.card().classes('w-full'):
@@ -396,8 +730,15 @@ def create_team_comparison_section(merged_df):
                 {'name': 'completion', 'label': '完成率(%)', 'field': 'completion', 'sortable': True},
                 {'name': 'yards', 'label': '平均码数', 'field': 'yards', 'sortable': True},
                 {'name': 'td', 'label': '达阵率(%)', 'field': 'td', 'sortable': True},
-                {'name': 'int', 'label': '拦截率(%)', 'field': 'int', 'sortable': True}
+                {'name': 'int', 'label': '拦截率(%)', 'field': 'int', 'sortable': True},
+                {'name': 'pressure', 'label': '受压率(%)', 'field': 'pressure', 'sortable': True}
             ]
+            if drives is not None:
+                columns += [
+                    {'name': 'drives', 'label': '推进次数', 'field': 'drives', 'sortable': True},
+                    {'name': 'points_per_drive', 'label': '每次推进得分', 'field': 'points_per_drive', 'sortable': True},
+                    {'name': 'red_zone', 'label': '红区达阵率(%)', 'field': 'red_zone', 'sortable': True},
+                ]
             
             rows = []
             for index, row in team_stats.iterrows():
@@ -407,8 +748,15 @@ def create_team_comparison_section(merged_df):
                     'completion': f"{row['completion_rate']:.1f}",
                     'yards': f"{row['avg_yards']:.1f}",
                     'td': f"{row['td_percentage']:.1f}",
-                    'int': f"{row['int_percentage']:.1f}"
+                    'int': f"{row['int_percentage']:.1f}",
+                    'pressure': f"{row['pressure_rate']:.1f}"
                 })
+                if drives is not None:
+                    rows[-1].update({
+                        'drives': int(row['drives']) if pd.notna(row['drives']) else 0,
+                        'points_per_drive': f"{row['points_per_drive']:.2f}" if pd.notna(row['points_per_drive']) else '-',
+                        'red_zone': f"{row['red_zone_td_rate']:.1f}" if pd.notna(row['red_zone_td_rate']) else '-',
+                    })
             
             ui.table(columns=columns, rows=rows).classes('w-full')
             
@@ -417,6 +765,472 @@ def create_team_comparison_section(merged_df):
             ui.label('1. 传球次数多的球队（如KC、DET）倾向于以传球为核心战术。')
             ui.label('2. 完成率高的球队（如ATL、NE）传球精准度强，适合控制比赛节奏。')
             ui.label('3. 达阵率与拦截率需平衡，建议关注达阵率高且拦截率高的球队（如WAS、KC)。')
+        
+        if drives is None:
+            return
+        
+        # 推进效率：每次推进得分与红区达阵率
+        def build_drive_figure():
+            px, _ = plotly_modules()
+            ranked = drives.sort_values('points_per_drive', ascending=False)
+            fig = px.scatter(
+                ranked,
+                x='red_zone_td_rate',
+                y='points_per_drive',
+                size='drives',
+                text='possessionTeam',
+                title='各球队每次推进得分与红区达阵率',
+                labels={'red_zone_td_rate': '红区达阵率(%)', 'points_per_drive': '每次推进得分', 'drives': '推进次数',
+                        'possessionTeam': '球队'},
+                color_discrete_sequence=[PRIMARY_COLOR]
+            )
+            fig.update_traces(textposition='top center')
+            fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+        
+        fig_drives = cached_figure('team-comparison', 'drive-efficiency', build_drive_figure, filters)
+        
+        with ui.card().classes('w-full mt-4'):
+            ui.label('推进效率对比').classes('text-xl font-semibold mb-2')
+            ui.plotly(fig_drives)
+            # 由当前筛选范围内的数据生成的分析
+            best = drives.loc[drives['points_per_drive'].idxmax()]
+            total_red_zone = drives['red_zone_drives'].sum()
+            red_zone_rate = drives['red_zone_touchdowns'].sum() / total_red_zone * 100 if total_red_zone else float('nan')
+            ui.label('数据分析：').classes('text-lg font-medium mt-3')
+            ui.label(f"1. 每次推进得分最高的是{best['possessionTeam']}（{best['points_per_drive']:.2f}分，"
+                     f"共{int(best['drives'])}次推进）。")
+            ui.label(f"2. 当前范围内进入红区的推进共{int(total_red_zone)}次，其中{red_zone_rate:.1f}%以达阵结束。")
+            ui.label('3. 推进由传球回合重建，只有跑球的推进不在数据中，得分以下一次推进开始时的比分变化计。')
+
+# 5. 球员检索与下钻板块
+def create_player_lookup_section(player_index):
+    """创建球员检索板块：输入姓名时从球员索引给出候选，选中后展示该球员的球探汇总与犯规明细"""
+    with ui.card().classes('w-full max-w-4xl mx-auto'):
+        ui.label('球员检索').classes('text-2xl font-bold mb-4')
+        if not player_index.has_scouting:
+            with ui.card().classes('w-full bg-yellow-50 p-4 mb-2'):
+                ui.label('提示: 当前没有逐球员的球探与犯规汇总（流式模式或传球数据未加载），仅提供球员基本信息').classes('text-yellow-800')
+        
+        # 输入停顿后才在索引上做前缀/模糊检索，不扫描数据表
+        search = ui.input('输入球员姓名或姓氏（支持拼写容错）').props('clearable debounce=300').classes('w-full')
+        suggestions = ui.column().classes('w-full gap-0')
+        detail = ui.column().classes('w-full mt-4')
+        
+        def show_suggestions(records):
+            suggestions.clear()
+            with suggestions:
+                for record, extra in records:
+                    label = f"{record['displayName']} · {record.get('officialPosition') or '-'}{extra}"
+                    ui.button(label, on_click=lambda nfl_id=record['nflId']: show_player(nfl_id)) \
+                        .props('flat no-caps align=left').classes('w-full')
+        
+        def show_player(nfl_id):
+            suggestions.clear()
+            detail.clear()
+            with detail:
+                create_player_detail(player_index.get(nfl_id))
+        
+        # 检索在线程中执行（模糊匹配较慢，不阻塞事件循环）；结果返回时输入已变化则丢弃
+        latest = {'query': None}
+        
+        async def on_search(event):
+            query = event.value or ''
+            latest['query'] = query
+            detail.clear()
+            records = await run.io_bound(player_index.search, query)
+            if latest['query'] == query and not suggestions.is_deleted:
+                show_suggestions([(record, '') for record in records])
+        
+        search.on_value_change(on_search)
+        
+        # 未输入时列出犯规次数最多的球员
+        if player_index.foul_leaders:
+            ui.label('犯规次数最多的球员').classes('text-lg font-medium mt-3')
+            show_suggestions([(record, f" · 犯规 {count} 次") for record, count in player_index.foul_leaders[:PLAYER_LEADER_COUNT]])
+
+# 辅助函数：球员下钻详情
+def create_player_detail(record):
+    """展示球员记录：基本信息、球探汇总指标与犯规明细（均来自索引中预先计算的结果）"""
+    ui.label(record['displayName']).classes('text-xl font-semibold')
+    info = [record.get('officialPosition'), record.get('height') and f"身高 {record['height']}",
+            record.get('weight') and f"体重 {record['weight']} 磅", record.get('collegeName'),
+            record.get('birthDate') and f"生于 {record['birthDate']}"]
+    ui.label(' · '.join(str(item) for item in info if item)).classes('text-sm text-gray-600')
+    
+    scouting = record['scouting']
+    if scouting:
+        with ui.row().classes('flex-wrap justify-center gap-4 mt-2'):
+            create_metric_card('参与回合', scouting['snaps'], 'list-check', PRIMARY_COLOR)
+            create_metric_card('出场比赛', scouting['games'], 'calendar', SECONDARY_COLOR)
+            create_metric_card('造成压迫', scouting.get('pff_pressures', 0), 'bolt', ACCENT_COLORS[0])
+            create_metric_card('擒杀', scouting.get('pff_sacks', 0), 'hand-back-fist', ACCENT_COLORS[1])
+        columns = [{'name': 'stat', 'label': '指标', 'field': 'stat'},
+                   {'name': 'value', 'label': '次数', 'field': 'value', 'sortable': True}]
+        rows = [{'stat': label, 'value': scouting[column]} for column, label in PLAYER_STAT_LABELS.items()
+                if column in scouting]
+        ui.table(columns=columns, rows=rows).classes('w-full mt-2')
+    
+    if record['fouls']:
+        ui.label(f"犯规记录（{len(record['fouls'])} 次）").classes('text-lg font-medium mt-3')
+        ui.label('，'.join(f"{name} {count} 次" for name, count in record['foul_counts'].items())).classes('text-sm')
+        columns = [
+            {'name': 'week', 'label': '周次', 'field': 'week', 'sortable': True},
+            {'name': 'matchup', 'label': '对阵', 'field': 'matchup'},
+            {'name': 'quarter', 'label': '节次', 'field': 'quarter'},
+            {'name': 'foul', 'label': '犯规', 'field': 'foul'},
+            {'name': 'description', 'label': '回合描述', 'field': 'description', 'align': 'left'},
+        ]
+        rows = [{
+            'week': foul.get('week'),
+            'matchup': f"{foul.get('possessionTeam', '')} vs {foul.get('defensiveTeam', '')}",
+            'quarter': foul.get('quarter'),
+            'foul': foul['foulName'],
+            'description': foul.get('playDescription') or '',
+        } for foul in record['fouls']]
+        ui.table(columns=columns, rows=rows, pagination=10).classes('w-full')
+    elif scouting:
+        ui.label('该球员没有犯规记录').classes('text-sm text-gray-500 mt-3')
+
+# 辅助函数：情境指标不可用时的说明
+def create_situational_unavailable(stream):
+    """没有期望得分表时的提示：流式模式不估计期望得分，常规模式下则是数据缺少情境列"""
+    with ui.card().classes('w-full bg-yellow-50 p-4'):
+        if stream:
+            ui.label('提示: 流式模式下不构建完整的合并表，不估计期望得分，也不计算情境指标与EPA').classes('text-yellow-800')
+            ui.label('以常规模式（不加 --stream）启动即可查看本板块').classes('text-sm text-yellow-700')
+        else:
+            ui.label('提示: 数据缺少档数、码线、比分等情境列，无法计算期望得分与EPA').classes('text-yellow-800')
+
+# 6. 情境分析板块（档数×场区）
+def create_situational_section(situations, ep_table, filters=None, stream=False):
+    """创建情境分析板块：按档数与场区展示完成率、每回合EPA与成功率（由情境立方体切片汇总）"""
+    with ui.card().classes('w-full max-w-4xl mx-auto'):
+        ui.label('情境分析（档数×场区）').classes('text-2xl font-bold mb-4')
+        
+        if ep_table is None:
+            create_situational_unavailable(stream)
+            return
+        if situations is None:
+            with ui.card().classes('w-full bg-yellow-50 p-4'):
+                ui.label('警告: 当前筛选条件下没有有效的情境数据').classes('text-yellow-800')
+            return
+        
+        with ui.row().classes('flex-wrap justify-center gap-4'):
+            create_metric_card('回合数', f"{situations['plays']:,}", 'list-ol', PRIMARY_COLOR)
+            create_metric_card('每回合EPA', f"{situations['epa_per_play']:+.3f}", 'chart-line', SECONDARY_COLOR)
+            create_metric_card('成功率', f"{situations['success_rate']:.1f}%", 'check', ACCENT_COLORS[0])
+            create_metric_card('传球完成率', f"{situations['completion_rate']:.1f}%", 'football', ACCENT_COLORS[2])
+        
+        by_zone_down = situations['by_zone_down']
+        zones = [zone for zone in reversed(FIELD_ZONE_LABELS) if zone in set(by_zone_down['field_zone'].astype(str))]
+        downs = sorted(by_zone_down['down'].unique())
+        
+        def build_zone_heatmap(value, title, colorbar, colorscale, fmt, **heatmap):
+            _, go = plotly_modules()
+            grid = by_zone_down.pivot(index='down', columns='field_zone', values=value)
+            plays = by_zone_down.pivot(index='down', columns='field_zone', values='plays')
+            grid = grid.reindex(index=downs, columns=zones)
+            plays = plays.reindex(index=downs, columns=zones)
+            text = [[f"{v:{fmt}}<br>{int(n)}次" if pd.notna(v) else '' for v, n in zip(v_row, n_row)]
+                    for v_row, n_row in zip(grid.to_numpy(), plays.to_numpy())]
+            fig = go.Figure(go.Heatmap(
+                z=grid.to_numpy(), x=zones, y=[DOWN_LABELS[down] for down in downs], text=text,
+                texttemplate='%{text}', colorscale=colorscale, colorbar=dict(title=colorbar),
+                hovertemplate='%{y} 距端区%{x}码<br>%{text}<extra></extra>', **heatmap
+            ))
+            fig.update_layout(title=title, xaxis_title='距对方端区码数（自左向右推进）', yaxis_title='档数',
+                              yaxis_autorange='reversed', margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+        
+        fig_completion = cached_figure('situational', 'completion-heatmap', lambda: build_zone_heatmap(
+            'completion_rate', '各档数与场区的传球完成率', '完成率(%)', 'Blues', '.1f'), filters)
+        fig_epa = cached_figure('situational', 'epa-heatmap', lambda: build_zone_heatmap(
+            'epa_per_play', '各档数与场区的每回合EPA', 'EPA', 'RdBu', '+.2f', zmid=0), filters)
+        
+        with ui.card().classes('w-full mt-4'):
+            ui.label('完成率与EPA热力图').classes('text-xl font-semibold mb-2')
+            ui.plotly(fig_completion)
+            ui.plotly(fig_epa)
+            # 由当前筛选范围内的数据生成的分析
+            cells = by_zone_down[by_zone_down['plays'] >= SITUATION_MIN_PLAYS]
+            ui.label('数据分析：').classes('text-lg font-medium mt-3')
+            if not cells.empty:
+                best = cells.loc[cells['epa_per_play'].idxmax()]
+                worst = cells.loc[cells['epa_per_play'].idxmin()]
+                ui.label(f"1. 每回合EPA最高的情境是{DOWN_LABELS[best['down']]}、距端区{best['field_zone']}码"
+                         f"（{best['epa_per_play']:+.2f}，{int(best['plays'])}次）。")
+                ui.label(f"2. 每回合EPA最低的情境是{DOWN_LABELS[worst['down']]}、距端区{worst['field_zone']}码"
+                         f"（{worst['epa_per_play']:+.2f}，{int(worst['plays'])}次）。")
+            ui.label(f"3. 样本少于{SITUATION_MIN_PLAYS}次的格子波动较大，解读时应结合回合数。")
+        
+        def build_down_bar():
+            px, _ = plotly_modules()
+            by_down = situations['by_down'].assign(label=lambda df: df['down'].map(DOWN_LABELS))
+            fig = px.bar(
+                by_down,
+                x='label',
+                y='success_rate',
+                text=by_down['success_rate'].map('{:.1f}%'.format),
+                title='各档数的成功率（EPA>0的回合占比）',
+                labels={'label': '档数', 'success_rate': '成功率(%)'},
+                color_discrete_sequence=[PRIMARY_COLOR]
+            )
+            fig.update_layout(margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+        
+        fig_down = cached_figure('situational', 'down-success', build_down_bar, filters)
+        
+        with ui.card().classes('w-full mt-4'):
+            ui.label('各档数的成功率').classes('text-xl font-semibold mb-2')
+            ui.plotly(fig_down)
+            ui.label('数据分析：').classes('text-lg font-medium mt-3')
+            ui.label('1. 成功回合指使期望得分增加（EPA>0）的回合，兼顾推进码数与档数、场区。')
+            ui.label('2. 第三档的成功率通常最低，是进攻能否延续的关键。')
+
+# 7. 期望得分与EPA板块
+def create_expected_points_section(situations, ep_table, filters=None, stream=False):
+    """创建期望得分板块：展示期望得分查找表与各球队的每回合EPA排名"""
+    with ui.card().classes('w-full max-w-4xl mx-auto'):
+        ui.label('期望得分与EPA').classes('text-2xl font-bold mb-4')
+        
+        if ep_table is None:
+            create_situational_unavailable(stream)
+            return
+        
+        # 期望得分查找表由全部数据估计，与筛选条件无关
+        def build_ep_heatmap():
+            _, go = plotly_modules()
+            table = ep_table.assign(row=lambda df: df['down'].map(DOWN_LABELS) + ' ' + df['distance_bin'].astype(str) + '码')
+            grid = table.pivot(index='row', columns='field_zone', values='ep')
+            rows = [f"{DOWN_LABELS[down]} {distance}码" for down in sorted(DOWN_LABELS) for distance in DISTANCE_LABELS]
+            grid = grid.reindex(index=[row for row in rows if row in grid.index], columns=list(reversed(FIELD_ZONE_LABELS)))
+            fig = go.Figure(go.Heatmap(
+                z=grid.to_numpy(), x=list(grid.columns), y=list(grid.index), zmid=0, colorscale='RdBu',
+                texttemplate='%{z:.1f}', colorbar=dict(title='期望得分'),
+                hovertemplate='%{y} 距端区%{x}码<br>期望得分 %{z:.2f}<extra></extra>'
+            ))
+            fig.update_layout(title='期望得分查找表（档数×剩余码数×场区）', xaxis_title='距对方端区码数',
+                              yaxis_title='档数与剩余码数', yaxis_autorange='reversed', height=600,
+                              margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+        
+        fig_ep = cached_figure('expected-points', 'ep-table', build_ep_heatmap)
+        
+        with ui.card().classes('w-full'):
+            ui.label('期望得分查找表').classes('text-xl font-semibold mb-2')
+            ui.plotly(fig_ep)
+            ui.label('数据分析：').classes('text-lg font-medium mt-3')
+            ui.label('1. 期望得分为从该情境出发、本半场下一次得分的平均值（对方得分记为负），越接近对方端区越高。')
+            ui.label('2. 同一场区内档数越靠后、剩余码数越长，期望得分越低；每回合EPA即回合前后期望得分之差。')
+        
+        if situations is None:
+            with ui.card().classes('w-full bg-yellow-50 p-4 mt-4'):
+                ui.label('警告: 当前筛选条件下没有有效的情境数据').classes('text-yellow-800')
+            return
+        by_team = situations['by_team'].sort_values('epa_per_play')
+        
+        def build_team_bar():
+            px, _ = plotly_modules()
+            fig = px.bar(
+                by_team,
+                x='epa_per_play',
+                y='possessionTeam',
+                orientation='h',
+                color='success_rate',
+                hover_data={'plays': True, 'success_rate': ':.1f'},
+                title='各球队进攻的每回合EPA',
+                labels={'epa_per_play': '每回合EPA', 'possessionTeam': '球队', 'success_rate': '成功率(%)',
+                        'plays': '回合数'},
+                color_continuous_scale='Blues'
+            )
+            fig.update_layout(height=max(400, 22 * len(by_team)), margin=dict(l=40, r=20, t=50, b=20))
+            return fig
+        
+        fig_team = cached_figure('expected-points', 'team-epa', build_team_bar, filters)
+        
+        with ui.card().classes('w-full mt-4'):
+            ui.label('球队每回合EPA排名').classes('text-xl font-semibold mb-2')
+            ui.plotly(fig_team)
+            best, worst = by_team.iloc[-1], by_team.iloc[0]
+            ui.label('数据分析：').classes('text-lg font-medium mt-3')
+            ui.label(f"1. 每回合EPA最高的是{best['possessionTeam']}（{best['epa_per_play']:+.3f}，"
+                     f"成功率{best['success_rate']:.1f}%）。")
+            ui.label(f"2. 每回合EPA最低的是{worst['possessionTeam']}（{worst['epa_per_play']:+.3f}，"
+                     f"成功率{worst['success_rate']:.1f}%）。")
+            ui.label('3. EPA同时考虑推进码数、档数与场区，比平均码数更能反映进攻对得分的贡献。')
+
+# 辅助函数：由服务端统计量构建码数分布图
+def build_yards_distribution_figure(yard_counts, mode='box'):
+    """根据按码数预先计数的结果构建分布图：box为箱线图，histogram为直方图，violin为小提琴图"""
+    _, go = plotly_modules()
+    counts = clip_counts(yard_counts, 'playResult', -30, 80)
+    fig = go.Figure()
+    
+    if mode == 'box':
+        # 箱线图：直接传入四分位数和须，只附带抽样后的离群点
+        for stat in box_statistics(counts, 'passResult', 'playResult'):
+            color = PASS_RESULT_COLORS.get(stat['group'])
+            fig.add_trace(go.Box(
+                x=[stat['group']],
+                q1=[stat['q1']],
+                median=[stat['median']],
+                q3=[stat['q3']],
+                lowerfence=[stat['lowerfence']],
+                upperfence=[stat['upperfence']],
+                mean=[stat['mean']],
+                name=stat['group'],
+                marker_color=color,
+                boxpoints=False
+            ))
+            if stat['outliers']:
+                fig.add_trace(go.Scatter(
+                    x=[stat['group']] * len(stat['outliers']),
+                    y=stat['outliers'],
+                    customdata=stat['outlier_counts'],
+                    mode='markers',
+                    marker=dict(color=color, size=5),
+                    hovertemplate='%{y} 码：%{customdata} 次<extra></extra>',
+                    showlegend=False
+                ))
+        fig.update_layout(showlegend=False, yaxis_title='推进码数', xaxis_title='传球结果')
+    else:
+        binned = binned_counts(counts, 'passResult', 'playResult', bin_width=DISTRIBUTION_BIN_WIDTH)
+        groups = binned.groupby('passResult', observed=True, sort=True)
+        for position, (group, part) in enumerate(groups):
+            color = PASS_RESULT_COLORS.get(group)
+            if mode == 'histogram':
+                # 直方图：各结果的分箱计数叠加显示
+                fig.add_trace(go.Bar(
+                    x=part['playResult'] + DISTRIBUTION_BIN_WIDTH / 2,
+                    y=part['count'],
+                    width=DISTRIBUTION_BIN_WIDTH,
+                    name=group,
+                    marker_color=color,
+                    opacity=0.6
+                ))
+            else:
+                # 小提琴图：由分箱计数得到密度轮廓，左右镜像成闭合多边形
+                centers = (part['playResult'] + DISTRIBUTION_BIN_WIDTH / 2).tolist()
+                half_width = (part['count'] / part['count'].max() * 0.4).tolist()
+                fig.add_trace(go.Scatter(
+                    x=[position + w for w in half_width] + [position - w for w in reversed(half_width)],
+                    y=centers + centers[::-1],
+                    fill='toself',
+                    mode='lines',
+                    name=group,
+                    line=dict(color=color, width=1),
+                    hoverinfo='name'
+                ))
+        if mode == 'histogram':
+            fig.update_layout(barmode='overlay', xaxis_title='推进码数', yaxis_title='次数')
+        else:
+            group_names = [group for group, _ in groups]
+            fig.update_layout(
+                xaxis=dict(title='传球结果', tickmode='array',
+                           tickvals=list(range(len(group_names))), ticktext=group_names),
+                yaxis_title='推进码数'
+            )
+    
+    fig.update_layout(title='不同传球结果的码数分布')
+    return fig
+
+# 辅助函数：按需导入plotly
+@functools.cache
+def plotly_modules():
+    """首次构建图表时才导入plotly.express并设置默认模板（二者合计接近1秒），返回 (px, go)
+
+    图表只在板块首次渲染且图表缓存未命中时构建，启动阶段无需导入。
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    pio.templates.default = "plotly_white"
+    return px, go
+
+# 辅助函数：共享图表缓存
+def cached_figure(section, name, build, params=None):
+    """从进程级缓存获取图表字典；相同视图在所有会话间只构建和序列化一次"""
+    return FIGURE_CACHE.get(section, name, build, params)
+
+# 辅助函数：延迟加载板块
+def create_lazy_section(section_id, title, render, prepare=None):
+    """创建延迟加载的板块：先显示轻量占位，进入视口或从导航打开时再计算并渲染内容
+
+    prepare 在后台线程中执行（用于耗时的聚合计算），render 在事件循环中构建界面。
+    返回 (load, refresh)：load 重复调用只会加载一次；refresh 在板块已加载时按当前状态重新渲染，
+    同样先在后台线程中执行 prepare，等待期间又有新的刷新时只渲染最新一次。
+    """
+    container = ui.card().classes('w-full').props(f'id={section_id}')
+    with container:
+        with ui.element('q-intersection').props('once').classes('w-full').style('min-height: 16rem') as placeholder:
+            with ui.card().classes('w-full max-w-4xl mx-auto'):
+                ui.label(title).classes('text-2xl font-bold mb-4')
+                ui.skeleton(height='12rem').classes('w-full')
+    state = {'loaded': False, 'generation': 0}
+
+    async def prepared():
+        state['generation'] += 1
+        generation = state['generation']
+        if prepare is not None:
+            await run.io_bound(prepare)
+        return generation == state['generation'] and not container.is_deleted
+
+    async def load():
+        if state['loaded']:
+            return
+        state['loaded'] = True
+        if not await prepared():
+            return
+        placeholder.delete()
+        with container, STARTUP_PROFILER.phase(f'section:{section_id}', once=True), \
+                METRICS.timer('nfl_section_render_seconds', section=section_id, trigger='load'):
+            render()
+
+    async def on_visibility(event):
+        if event.args:
+            await load()
+
+    async def update():
+        if not await prepared():
+            return
+        container.clear()
+        with container, METRICS.timer('nfl_section_render_seconds', section=section_id, trigger='refresh'):
+            render()
+
+    def refresh():
+        if not state['loaded']:
+            return
+        background_tasks.create(update(), name=f'refresh:{section_id}')
+
+    placeholder.on('visibility', on_visibility)
+    return load, refresh
+
+# 全局筛选栏
+def create_filter_bar(options, on_change):
+    """创建赛季、周次、进攻球队、防守球队筛选控件，任一变化时以新的筛选条件回调on_change"""
+    filters = {'seasons': [], 'weeks': options['weeks'], 'offense': [], 'defense': []}
+    
+    def update(key, value):
+        filters[key] = value
+        on_change(dict(filters))
+    
+    with ui.card().classes('w-full max-w-4xl mx-auto'):
+        ui.label('数据筛选').classes('text-lg font-semibold')
+        with ui.row().classes('w-full items-center gap-4'):
+            ui.select(options['seasons'], multiple=True, label='赛季',
+                      on_change=lambda e: update('seasons', e.value)).classes('w-40').props('clearable use-chips')
+            ui.select(options['teams'], multiple=True, label='进攻球队',
+                      on_change=lambda e: update('offense', e.value)).classes('w-56').props('clearable use-chips')
+            ui.select(options['teams'], multiple=True, label='防守球队',
+                      on_change=lambda e: update('defense', e.value)).classes('w-56').props('clearable use-chips')
+        low, high = options['weeks']
+        with ui.row().classes('w-full items-center gap-4'):
+            ui.label('周次范围').classes('text-sm text-gray-500')
+            ui.range(min=low, max=high, step=1, value={'min': low, 'max': high},
+                     on_change=lambda e: update('weeks', (e.value['min'], e.value['max']))) \
+                .classes('flex-1').props('label markers snap')
+    return filters
 
 # 辅助函数：创建指标卡片
 def create_metric_card(title, value, icon_name, color):
@@ -427,80 +1241,373 @@ def create_metric_card(title, value, icon_name, color):
         ui.icon(icon_name).classes(f'text-{color} text-xl mt-3')
 
 # 主页内容
-def create_home_page():
-    """创建带图片的主页"""
+def create_home_page(assets):
+    """创建带图片的主页；图片为本地构建、按显示尺寸生成的资源（assets 为资源清单）"""
     with ui.card().classes('w-full max-w-7xl mx-auto'):
         # 顶部大型横幅图片
         with ui.row().classes('w-full mb-6'):
-            ui.image('https://static.www.nfl.com/image/upload/t_q-best/league/rtnvdxwvnde041y3a7t8').classes('w-full h-64 object-cover rounded-lg shadow-md')
+            create_asset_image(assets['banner'], 'w-full h-64 object-cover rounded-lg shadow-md')
         
         # 图片网格展示
         with ui.row().classes('w-full gap-2 mb-8'):
-            with ui.column().classes('w-1/4'):
-                ui.image('https://pic1.zhimg.com/v2-435904cdd13640d507ca59edc5a98a42_1440w.jpg').classes('w-full h-48 object-cover rounded-lg shadow-md')
-                ui.label('NFL球员风采').classes('text-center mt-2 font-medium')
-            
-            with ui.column().classes('w-1/4'):
-                ui.image('https://static.www.nfl.com/image/upload/f_auto,q_auto,dpr_2.0/league/lu2uwwwknoaxjahas6ni').classes('w-full h-48 object-cover rounded-lg shadow-md')
-                ui.label('精彩比赛瞬间').classes('text-center mt-2 font-medium')
-            
-            with ui.column().classes('w-1/4'):
-                ui.image('https://ts1.tc.mm.bing.net/th/id/OIP-C.MH4CP4_l6en7cJvrF2nXgQHaJ-?r=0&rs=1&pid=ImgDetMain').classes('w-full h-48 object-cover rounded-lg shadow-md')
-                ui.label('战术数据分析').classes('text-center mt-2 font-medium')
+            for name in ('players', 'highlights', 'tactics'):
+                with ui.column().classes('w-1/4'):
+                    create_asset_image(assets[name], 'w-full h-48 object-cover rounded-lg shadow-md')
+                    ui.label(assets[name]['label']).classes('text-center mt-2 font-medium')
         
         # 平台介绍
         with ui.card().classes('w-full p-6 bg-gray-50 rounded-lg'):
             ui.label('NFL比赛数据分析平台').classes('text-2xl font-bold mb-3 text-center')
             ui.label('本平台提供NFL比赛数据的全面分析与可视化展示，帮助您深入了解球员表现、比赛战术和球队效率。通过左侧导航菜单，您可以浏览不同类型的数据分析结果，包括球员数据概览、传球结果分析、比赛战术分布和球队进攻效率对比等内容。').classes('text-base leading-relaxed')
 
-# 主函数
-def main():
-    """主函数：初始化应用并启动"""
-    # 设置页面标题和布局
+# 辅助函数：本地图片资源
+def create_asset_image(entry, classes):
+    """以 <picture> 展示构建好的图片：浏览器支持时使用WebP，否则回退到JPEG；占位图与未缩放的原图直接展示"""
+    files = entry['files']
+    with ui.element('picture').classes('block w-full'):
+        if 'webp' in files:
+            ui.element('source').props(f'srcset="{asset_url(files["webp"])}" type="image/webp"')
+        src = files.get('jpeg') or files.get('original') or files['svg']
+        ui.element('img').props(f'src="{asset_url(src)}" alt="{entry["label"]}" width={entry["width"]} '
+                                f'height={entry["height"]} decoding=async').classes(classes)
+
+# 辅助函数：按数据就绪状态渲染板块
+def render_when_ready(dataset, part, title, render):
+    """返回板块的渲染函数：依赖的数据仍在加载时显示占位，加载失败时显示原因，就绪后调用render"""
+    def wrapped():
+        status = dataset.status[part]
+        if status == 'ready':
+            render()
+            return
+        with ui.card().classes('w-full max-w-4xl mx-auto'):
+            ui.label(title).classes('text-2xl font-bold mb-4')
+            if status == 'failed':
+                ui.label('数据加载失败').classes('text-lg font-semibold text-red-500')
+                ui.label(dataset.errors[part]).classes('text-sm text-gray-600')
+            else:
+                ui.label('数据加载中...').classes('text-sm text-gray-500')
+                ui.skeleton(height='12rem').classes('w-full')
+    return wrapped
+
+# 仪表盘页面
+def create_dashboard_page(dataset, home_assets):
+    """为每个客户端创建仪表盘页面；筛选条件按会话独立，聚合结果从共享的数据立方体查询
+
+    数据在后台加载期间各板块先显示占位，所依赖的部分就绪后自动填充，加载失败时在板块内说明原因；
+    数据热更新后已加载的板块按当前筛选条件重新渲染。
+    """
     ui.page_title('NFL比赛数据分析平台')
+    client = ui.context.client
+    
+    # 当前会话的筛选条件；立方体查询结果按 (筛选条件, 数据集版本) 保存，同一筛选条件下各板块共用一次查询
+    view = {'filters': {}, 'filter_bar': False, 'results': {}}
+    cube_queries = {'pass': query_pass_metrics, 'situational': query_situational_metrics}
+    query_lock = threading.Lock()
+    
+    def cube_metrics(kind, section_id):
+        """返回当前筛选条件下的立方体查询结果；筛选条件与数据集版本不变时直接复用上一次的结果"""
+        filters = view['filters']
+        key = (freeze_params(filters), dataset.version)
+        with query_lock:
+            cached = view['results'].get(kind)
+            if cached is None or cached[0] != key:
+                with METRICS.timer('nfl_section_compute_seconds', section=section_id):
+                    cached = (key, cube_queries[kind](dataset.pass_cube, filters))
+                view['results'][kind] = cached
+        return cached[1]
+    
+    def prepare_query(kind, section_id):
+        # 在后台线程中预先查询，渲染时直接取用结果，不阻塞其它会话
+        def prepare():
+            if dataset.status['pass_cube'] == 'ready':
+                cube_metrics(kind, section_id)
+        return prepare
+    
+    # 板块定义：(锚点id, 导航标题, 依赖的数据, 立方体查询, 渲染函数)
+    sections = [
+        ('player-overview', '球员数据概览', 'players', None,
+         lambda: create_player_overview_section(dataset.players_df)),
+        ('pass-analysis', '传球结果分析', 'pass_cube', 'pass',
+         lambda: create_pass_analysis_section(cube_metrics('pass', 'pass-analysis'), view['filters'])),
+        ('play-type', '比赛战术分布', 'pass_cube', 'pass',
+         lambda: create_play_type_section(cube_metrics('pass', 'play-type'), view['filters'])),
+        ('team-comparison', '球队进攻效率对比', 'pass_cube', 'pass',
+         lambda: create_team_comparison_section(cube_metrics('pass', 'team-comparison'), view['filters'])),
+        ('player-lookup', '球员检索', 'player_index', None,
+         lambda: create_player_lookup_section(dataset.player_index)),
+        ('situational', '情境分析', 'pass_cube', 'situational',
+         lambda: create_situational_section(cube_metrics('situational', 'situational'), dataset.ep_table,
+                                            view['filters'], dataset.stream)),
+        ('expected-points', '期望得分与EPA', 'pass_cube', 'situational',
+         lambda: create_expected_points_section(cube_metrics('situational', 'expected-points'), dataset.ep_table,
+                                                view['filters'], dataset.stream)),
+    ]
+    loaders = {}
+    refreshers = {part: [] for part in dataset.PARTS}
+    
+    def apply_filters(filters):
+        view['filters'] = filters
+        for refresh in refreshers['pass_cube']:
+            refresh()
+    
+    def show_filter_bar():
+        # 全局筛选（球员数据概览为联盟名册，不受比赛筛选影响）；立方体就绪后才能给出可选值
+        if view['filter_bar'] or dataset.pass_cube is None:
+            return
+        view['filter_bar'] = True
+        with filter_container:
+            view['filters'] = create_filter_bar(filter_options(dataset.pass_cube), apply_filters)
     
-    # 加载和预处理数据
-    players_df, plays_df, games_df, scouting_df = load_data()
-    players_df, merged_df, games_df, scouting_df = preprocess_data(players_df, plays_df, games_df, scouting_df)
+    def on_dataset_update(part):
+        # 会话已结束时不再接收更新
+        if client.id not in Client.instances:
+            dataset.unsubscribe(on_dataset_update)
+            return
+        with client:
+            if part == 'pass_cube':
+                show_filter_bar()
+            for refresh in refreshers[part]:
+                refresh()
+    
+    dataset.subscribe(on_dataset_update)
 
     # 页面头部
     with ui.header(elevated=True).classes('bg-primary text-white max-w-7xl mx-auto flex justify-center items-center'):
         ui.label('NFL比赛数据分析平台').classes('text-2xl font-bold')
     
-    # 导航菜单
+    # 导航菜单（点击时同时触发对应板块的加载）
     with ui.left_drawer(fixed=True).classes('bg-gray-50'):
         ui.label('导航菜单').classes('text-lg font-semibold p-4')
         ui.separator().classes('my-2')
         ui.link('首页', '#home').classes('block p-2 pl-4 hover:bg-gray-200 hover:scale-105 hover:shadow transition-all')
-        ui.link('球员数据概览', '#player-overview').classes('block p-2 pl-4 hover:bg-gray-200 hover:scale-105 hover:shadow transition-all')
-        ui.link('传球结果分析', '#pass-analysis').classes('block p-2 pl-4 hover:bg-gray-200 hover:scale-105 hover:shadow transition-all')
-        ui.link('比赛战术分布', '#play-type').classes('block p-2 pl-4 hover:bg-gray-200 hover:scale-105 hover:shadow transition-all')
-        ui.link('球队进攻效率对比', '#team-comparison').classes('block p-2 pl-4 hover:bg-gray-200 hover:scale-105 hover:shadow transition-all')
+        for section_id, title, _, _, _ in sections:
+            ui.link(title, f'#{section_id}').classes('block p-2 pl-4 hover:bg-gray-200 hover:scale-105 hover:shadow transition-all') \
+                .on('click', lambda section_id=section_id: loaders[section_id]())
     
     # 主内容区域
     with ui.row().classes('max-w-7xl mx-auto py-8 flex flex-col gap-8'):
         # 主页
         with ui.card().classes('w-full').props('id=home'):
-            create_home_page()
+            create_home_page(home_assets)
         
-        # 球员数据概览
-        with ui.card().classes('w-full').props('id=player-overview'):
-            create_player_overview_section(players_df)
+        # 全局筛选
+        filter_container = ui.element('div').classes('w-full')
+        show_filter_bar()
+        
+        # 数据板块：先渲染占位，进入视口或从导航打开时再计算；数据未就绪时显示加载状态
+        for section_id, title, part, query, render in sections:
+            prepare = prepare_query(query, section_id) if query else None
+            load, refresh = create_lazy_section(section_id, title, render_when_ready(dataset, part, title, render),
+                                                prepare)
+            loaders[section_id] = load
+            refreshers[part].append(refresh)
+
+# 运行时指标
+def trace_context():
+    """追踪记录附带的上下文：在页面或板块的事件中执行时记录所属会话"""
+    stack = ui.context.slot_stack
+    if not stack or stack[-1].parent.client.is_auto_index_client:
+        return {}
+    return {'client': stack[-1].parent.client.id}
+
+def enable_metrics(trace_path=None, token=None, port=8080):
+    """启用指标收集并注册 /metrics 路由；给出trace_path时同时记录每个HTTP请求
+
+    默认只允许本机访问；给出token时（多进程模式，经负载均衡转发的请求都来自本机）改为校验 Bearer 令牌。
+    """
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+    
+    METRICS.enable(trace_path, trace_context)
+    
+    def figure_cache_stats():
+        return FIGURE_CACHE.stats()
+    METRICS.gauge('nfl_figure_cache_hits_total', lambda: figure_cache_stats()['hits'])
+    METRICS.gauge('nfl_figure_cache_misses_total', lambda: figure_cache_stats()['misses'])
+    METRICS.gauge('nfl_figure_cache_hit_ratio', lambda: figure_cache_stats()['hit_rate'])
+    METRICS.gauge('nfl_figure_cache_entries', lambda: figure_cache_stats()['size'])
+    METRICS.gauge('nfl_active_clients', lambda: sum(client.has_socket_connection for client in Client.instances.values()))
+    
+    @app.get('/metrics')
+    def metrics_endpoint(request: Request):
+        if token is not None:
+            allowed = secrets.compare_digest(request.headers.get('authorization', ''), f'Bearer {token}')
+        else:
+            allowed = request.client is not None and request.client.host in ('127.0.0.1', '::1', 'localhost')
+        if not allowed:
+            return PlainTextResponse('forbidden\n', status_code=403)
+        return PlainTextResponse(METRICS.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+    
+    if trace_path:
+        @app.middleware('http')
+        async def trace_requests(request: Request, call_next):
+            start = time.perf_counter()
+            response = await call_next(request)
+            seconds = time.perf_counter() - start
+            METRICS.observe('nfl_http_request_seconds', seconds, method=request.method)
+            METRICS.trace('http', method=request.method, path=request.url.path,
+                          status=response.status_code, seconds=round(seconds, 6))
+            return response
+    print(f"运行时指标已启用：http://127.0.0.1:{port}/metrics" + (f"，追踪日志写入 {trace_path}" if trace_path else ''))
+
+# 单进程模式：后台加载数据
+def load_in_background(args, dataset):
+    """注册启动任务：服务立即启动，数据在后台并发加载，各板块在所依赖的数据就绪后填充"""
+    cache = DataCache(rebuild=args.rebuild_cache)
+    
+    async def load_data_in_background():
+        # 监视数据文件时在加载前记录文件快照，加载期间发生的变化在第一次轮询时处理
+        reloader = None
+        if args.watch:
+            try:
+                reloader = HotReloader(dataset, DATA_FILES, chunk_size=args.chunk_size if args.stream else None)
+            except FileNotFoundError as e:
+                print(f"提示：找不到数据文件 {e.filename}，不监视数据变化")
+        await populate_dataset(dataset, cache, stream=args.stream, chunk_size=args.chunk_size,
+                               keep_player_scouting=not args.drop_player_scouting)
+        base_version = cache.dataset_version(list(DATA_FILES))
+        FIGURE_CACHE.set_dataset_version(base_version)
+        STARTUP_PROFILER.summary()
+        
+        # 监视数据文件：只读取追加或变化的部分，更新立方体后切换图表缓存版本并通知各会话
+        if reloader is not None and dataset.pass_cube is not None:
+            await run.io_bound(reloader.prepare)
+            
+            async def on_update():
+                FIGURE_CACHE.set_dataset_version((base_version, dataset.version))
+                dataset.notify('pass_cube')
+                # 犯规明细随受影响的比赛在线程中更新；逐球员球探汇总不随热更新维护，保留启动时的结果
+                if dataset.merged_df is not None and dataset.player_stats is not None and dataset.player_index is not None:
+                    player_stats, player_index = await run.io_bound(update_player_fouls, dataset,
+                                                                    reloader.updated_games)
+                    dataset.mark_ready('player_index', player_stats=player_stats, player_index=player_index)
+            
+            await reloader.run(args.watch_interval, on_update)
+    
+    app.on_startup(load_data_in_background)
+
+# 多进程服务
+def worker_trace_path(trace_path, index):
+    root, ext = os.path.splitext(trace_path)
+    return f"{root}.worker{index}{ext}"
+
+def serve_with_workers(args):
+    """多进程模式：本进程加载数据并写入共享存储，各工作进程以内存映射方式挂载同一份数据，
+    本进程随后在对外端口上运行会话粘滞的负载均衡，工作进程只监听本机端口 port+1 起的连续端口"""
+    if args.watch:
+        print("提示：多进程模式暂不支持 --watch，已忽略")
+    # 主页图片在启动工作进程前构建一次，各工作进程直接读取清单
+    with STARTUP_PROFILER.phase('home_assets'):
+        prepare_assets()
+    cache = DataCache(rebuild=args.rebuild_cache)
+    dataset = LiveDataset()
+    asyncio.run(populate_dataset(dataset, cache, stream=args.stream, chunk_size=args.chunk_size,
+                                 keep_player_scouting=False))
+    store_dir = os.path.join(SHARED_STORE_DIR, str(os.getpid()))
+    with STARTUP_PROFILER.phase('export_shared_store'):
+        export_dataset(dataset, store_dir, cache.dataset_version(list(DATA_FILES)))
+    # 合并表只在构建立方体时需要，写入共享存储后即可释放
+    del dataset
+    
+    env = dict(os.environ)
+    if args.metrics or args.trace_log:
+        env[METRICS_TOKEN_ENV] = secrets.token_urlsafe(24)
+        token_path = os.path.join(store_dir, 'metrics.token')
+        with open(os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            f.write(env[METRICS_TOKEN_ENV])
+        print(f"各工作进程的 /metrics 需携带 Bearer 令牌访问，令牌见 {token_path}")
+    
+    backends = [('127.0.0.1', args.port + 1 + index) for index in range(args.workers)]
+    commands = []
+    for index, (_, port) in enumerate(backends):
+        command = [sys.executable, os.path.abspath(__file__), '--worker-store', store_dir,
+                   '--worker-index', str(index), '--port', str(port),
+                   '--figure-cache-size', str(args.figure_cache_size)]
+        if args.metrics:
+            command.append('--metrics')
+        if args.trace_log:
+            command += ['--trace-log', worker_trace_path(args.trace_log, index)]
+        if args.profile_startup:
+            command.append('--profile-startup')
+        commands.append(command)
+    
+    # 收到SIGTERM时同样走清理流程：停止工作进程并删除共享存储
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    processes = start_workers(commands, env)
+    try:
+        wait_for_workers(processes, backends)
+        print(f"{args.workers} 个工作进程已就绪，负载均衡监听 http://0.0.0.0:{args.port}")
+        asyncio.run(StickyBalancer(backends).serve('0.0.0.0', args.port))
+    except RuntimeError as e:
+        print(f"错误：{e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(processes)
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+# 主函数
+def main():
+    """主函数：初始化应用并启动"""
+    # 命令行参数
+    parser = argparse.ArgumentParser(description='NFL比赛数据分析平台')
+    parser.add_argument('--rebuild-cache', action='store_true', help='忽略磁盘缓存，强制重新解析所有CSV')
+    parser.add_argument('--drop-player-scouting', action='store_true', help='不保留逐球员球探表（仅保留回合级聚合）')
+    parser.add_argument('--figure-cache-size', type=int, default=DEFAULT_FIGURE_CACHE_SIZE, help='进程级图表缓存最多保存的图表数量')
+    parser.add_argument('--stream', action='store_true', help='流式模式：分块读取plays与球探数据，内存占用由块大小决定')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='流式模式下每块读取的行数')
+    parser.add_argument('--watch', action='store_true', help='监视数据文件，变化时增量更新数据并刷新已打开的页面')
+    parser.add_argument('--watch-interval', type=float, default=DEFAULT_POLL_INTERVAL, help='监视数据文件的轮询间隔（秒）')
+    parser.add_argument('--profile-startup', action='store_true', help='输出启动各阶段（导入、加载、预处理、板块首次渲染、服务就绪）的耗时与内存')
+    parser.add_argument('--metrics', action='store_true', help='收集运行时指标（加载、板块计算与渲染耗时、图表大小、缓存命中率），在本机 /metrics 以Prometheus格式提供')
+    parser.add_argument('--trace-log', default=None, metavar='PATH', help='将每次计时和HTTP请求以JSON行追加写入该文件（隐含 --metrics）')
+    parser.add_argument('--port', type=int, default=8080, help='服务端口')
+    parser.add_argument('--workers', type=int, default=1, help='工作进程数；大于1时由本进程加载数据并写入共享内存映射存储，各工作进程挂载同一份数据，对外端口上运行会话粘滞的负载均衡')
+    parser.add_argument('--worker-store', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-index', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--reload', action='store_true', help='开发模式：代码变化时自动重启服务')
+    args, _ = parser.parse_known_args()
+    
+    # 自动重载模式下主进程只负责监视代码并启动服务子进程，数据只在子进程中加载
+    if args.reload and __name__ == '__main__':
+        ui.run(title='NFL比赛数据分析平台', port=args.port, reload=True)
+        return
+    
+    if args.profile_startup:
+        STARTUP_PROFILER.enable()
+    if args.workers > 1 and args.worker_store is None:
+        serve_with_workers(args)
+        return
     
-        # 传球结果分析
-        with ui.card().classes('w-full').props('id=pass-analysis'):
-            create_pass_analysis_section(merged_df)
+    # 主页图片：资源清单是最新的则直接使用（多进程模式下由加载进程预先构建），否则在本地构建
+    with STARTUP_PROFILER.phase('home_assets'):
+        home_assets = prepare_assets()
+    app.add_static_files(ASSET_URL_PATH, BUILD_DIR, max_cache_age=ASSET_CACHE_AGE)
+    if args.metrics or args.trace_log:
+        enable_metrics(args.trace_log, os.environ.get(METRICS_TOKEN_ENV), args.port)
+    FIGURE_CACHE.resize(args.figure_cache_size)
     
-        # 比赛战术分布
-        with ui.card().classes('w-full').props('id=play-type'):
-            create_play_type_section(merged_df)
+    if args.worker_store is not None:
+        # 工作进程：挂载加载进程写好的共享存储，所有部分的状态已确定
+        with STARTUP_PROFILER.phase('attach_shared_store'):
+            dataset, version = import_dataset(args.worker_store)
+        FIGURE_CACHE.set_dataset_version(version)
+        install_session_cookie(app, args.worker_index)
+    else:
+        dataset = LiveDataset()
+        load_in_background(args, dataset)
     
-        # 球队进攻效率对比
-        with ui.card().classes('w-full').props('id=team-comparison'):
-            create_team_comparison_section(merged_df)
+    # 每个客户端独立的页面（筛选状态按会话隔离）
+    @ui.page('/')
+    def index():
+        create_dashboard_page(dataset, home_assets)
     
-    # 运行应用
-    ui.run(title='NFL比赛数据分析平台', port=8080)
+    # 运行应用（数据全部就绪后输出启动分析汇总）
+    if args.profile_startup:
+        app.on_startup(lambda: STARTUP_PROFILER.end('ui.run'))
+        STARTUP_PROFILER.begin('ui.run')
+    ui.run(title='NFL比赛数据分析平台', host='127.0.0.1' if args.worker_store else None, port=args.port,
+           reload=args.reload, show=args.worker_store is None)
 
 if __name__  in {"__main__","__mp_main__"}:
     main()
@@ -0,0 +1,182 @@
+import bisect
+import copy
+import difflib
+
+import pandas as pd
+
+from scouting import PLAY_KEYS, scouting_indicators
+
+# plays表中的犯规球员列：(犯规名称列, 犯规球员id列)
+FOUL_COLUMNS = [('foulName1', 'foulNFLId1'), ('foulName2', 'foulNFLId2'), ('foulName3', 'foulNFLId3')]
+
+# 犯规长表保留的回合信息（存在时）
+FOUL_PLAY_COLUMNS = ['season', 'week', 'quarter', 'possessionTeam', 'defensiveTeam', 'playDescription']
+
+# 球员记录中保留的球员表字段
+PLAYER_COLUMNS = ['nflId', 'displayName', 'officialPosition', 'height', 'weight', 'birthDate', 'collegeName']
+
+# 自动补全默认返回的候选数与模糊匹配的相似度下限
+DEFAULT_SEARCH_LIMIT = 10
+FUZZY_CUTOFF = 0.6
+
+
+def aggregate_scouting_by_player(scouting_df):
+    """将逐球员的球探数据汇总为每名球员一行：参与回合数、比赛数、各角色次数与压迫/护传指标"""
+    if scouting_df is None or scouting_df.empty or 'nflId' not in scouting_df.columns:
+        return pd.DataFrame(columns=['nflId'])
+
+    per_row = scouting_indicators(scouting_df)
+    by_player = per_row.groupby(scouting_df['nflId'], sort=True).sum().astype('int32')
+    by_player = by_player.rename(columns={'pff_playersScouted': 'snaps'})
+    by_player['games'] = scouting_df.groupby('nflId', sort=True)['gameId'].nunique().astype('int16')
+    return by_player.reset_index()
+
+
+def collect_fouls(plays_df):
+    """把 foulNFLId1..3 / foulName1..3 展开为每次犯规一行的长表，按 (nflId, gameId, playId) 排序"""
+    if plays_df is None or plays_df.empty:
+        return pd.DataFrame(columns=['nflId', *PLAY_KEYS, 'foulName'])
+
+    context = [c for c in FOUL_PLAY_COLUMNS if c in plays_df.columns]
+    frames = []
+    for name_column, id_column in FOUL_COLUMNS:
+        if id_column not in plays_df.columns:
+            continue
+        fouled = plays_df[plays_df[id_column].notna()]
+        frame = fouled[PLAY_KEYS + context].copy()
+        frame.insert(0, 'nflId', fouled[id_column].astype('int32'))
+        frame['foulName'] = fouled[name_column].astype(str) if name_column in fouled.columns else ''
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['nflId', *PLAY_KEYS, 'foulName'])
+    fouls = pd.concat(frames, ignore_index=True)
+    for column in ('possessionTeam', 'defensiveTeam'):
+        if column in fouls.columns:
+            fouls[column] = fouls[column].astype(str)
+    return fouls.sort_values(['nflId', *PLAY_KEYS], ignore_index=True)
+
+
+def replace_game_fouls(fouls, games, game_fouls):
+    """用受影响比赛重新展开的犯规（collect_fouls的结果）替换犯规长表中这些比赛的行
+
+    返回 (新的犯规长表, 犯规记录有变化的球员id集合)；只有这些球员的索引记录需要更新。
+    """
+    stale = fouls['gameId'].isin(games)
+    nfl_ids = {int(nfl_id) for nfl_id in fouls.loc[stale, 'nflId']} | {int(nfl_id) for nfl_id in game_fouls['nflId']}
+    frames = [frame for frame in (fouls[~stale], game_fouls) if not frame.empty]
+    if len(frames) < 2:
+        return (frames[0] if frames else fouls.iloc[:0]).reset_index(drop=True), nfl_ids
+    fouls = pd.concat(frames, ignore_index=True)
+    return fouls.sort_values(['nflId', *PLAY_KEYS], ignore_index=True), nfl_ids
+
+
+def build_player_stats(merged_df, scouting_df):
+    """由合并表与逐球员球探表预先计算球员下钻使用的聚合：{'scouting': 每名球员一行, 'fouls': 犯规长表}"""
+    return {'scouting': aggregate_scouting_by_player(scouting_df), 'fouls': collect_fouls(merged_df)}
+
+
+def _normalize(text):
+    return ' '.join(str(text).casefold().split())
+
+
+class PlayerIndex:
+    """加载时构建的球员索引：按nflId常数时间取记录，按显示名前缀或模糊匹配检索
+
+    每名球员的记录（球员表字段、球探汇总、犯规次数与明细）在构建时一次算好，
+    检索只在排序的名字键上二分查找，没有前缀候选时再对名字键做模糊匹配，不扫描任何数据表。
+    """
+
+    def __init__(self, players_df, player_stats=None):
+        """player_stats 为 build_player_stats 的结果；缺省时（如流式模式）只提供球员表字段"""
+        columns = [c for c in PLAYER_COLUMNS if c in players_df.columns]
+        self._records = {}
+        for record in players_df[columns].to_dict('records'):
+            nfl_id = int(record['nflId'])
+            record = {k: (None if pd.isna(v) else v) for k, v in record.items()}
+            record.update(nflId=nfl_id, scouting=None, fouls=[], foul_counts={})
+            self._records[nfl_id] = record
+
+        player_scouting = player_stats.get('scouting') if player_stats else None
+        fouls = player_stats.get('fouls') if player_stats else None
+        self.has_scouting = player_scouting is not None and not player_scouting.empty
+        if self.has_scouting:
+            for row in player_scouting.to_dict('records'):
+                record = self._records.get(int(row.pop('nflId')))
+                if record is not None:
+                    record['scouting'] = {k: int(v) for k, v in row.items()}
+
+        self.has_fouls = fouls is not None
+        self.foul_leaders = []
+        if self.has_fouls and not fouls.empty:
+            self._assign_fouls(fouls)
+
+        # 名字键：完整显示名及其后各段（可直接按姓检索），二分查找前缀
+        keys = []
+        for nfl_id, record in self._records.items():
+            tokens = _normalize(record.get('displayName') or '').split()
+            keys.extend((' '.join(tokens[i:]), nfl_id) for i in range(len(tokens)))
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._key_ids = [nfl_id for _, nfl_id in keys]
+        self._ids_by_key = {}
+        for key, nfl_id in keys:
+            self._ids_by_key.setdefault(key, []).append(nfl_id)
+
+    def _assign_fouls(self, fouls):
+        """把犯规长表分配给各球员记录并重排犯规次数榜"""
+        # 犯规表已按nflId排序，一次转换为记录后依次分配给各球员
+        for row in fouls.to_dict('records'):
+            record = self._records.get(int(row.pop('nflId')))
+            if record is not None:
+                record['fouls'].append(row)
+        for (nfl_id, foul_name), count in fouls.groupby(['nflId', 'foulName'], sort=False).size().items():
+            record = self._records.get(int(nfl_id))
+            if record is not None:
+                record['foul_counts'][foul_name] = int(count)
+        leaders = sorted((r for r in self._records.values() if r['fouls']), key=lambda r: -len(r['fouls']))
+        self.foul_leaders = [(record, len(record['fouls'])) for record in leaders]
+
+    def with_fouls(self, fouls, nfl_ids):
+        """返回只替换了nfl_ids中球员犯规记录的新索引（热更新使用）
+
+        名字键与其余球员的记录与原索引共享，原索引保持不变，正在使用它的会话不受影响。
+        """
+        index = copy.copy(self)
+        index._records = dict(self._records)
+        for nfl_id in nfl_ids:
+            if nfl_id in index._records:
+                index._records[nfl_id] = {**index._records[nfl_id], 'fouls': [], 'foul_counts': {}}
+        index.has_fouls = True
+        index._assign_fouls(fouls[fouls['nflId'].isin(nfl_ids)])
+        return index
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, nfl_id):
+        """按nflId返回球员记录，不存在时返回 None"""
+        try:
+            return self._records.get(int(nfl_id))
+        except (TypeError, ValueError):
+            return None
+
+    def display_name(self, nfl_id):
+        record = self.get(nfl_id)
+        return record['displayName'] if record is not None else f'#{nfl_id}'
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """返回显示名（或从某段开始的部分）以query开头的球员；没有前缀匹配时返回名字相近的球员（容忍拼写错误）"""
+        query = _normalize(query)
+        if not query:
+            return []
+        found = []
+        start = bisect.bisect_left(self._keys, query)
+        for position in range(start, len(self._keys)):
+            if not self._keys[position].startswith(query) or len(found) >= limit:
+                break
+            if self._key_ids[position] not in found:
+                found.append(self._key_ids[position])
+        if not found:
+            for key in difflib.get_close_matches(query, self._ids_by_key, n=limit, cutoff=FUZZY_CUTOFF):
+                found.extend(nfl_id for nfl_id in self._ids_by_key[key] if nfl_id not in found)
+        return [self._records[nfl_id] for nfl_id in found[:limit]]
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from drives import add_game_state_columns
+from play_parser import add_description_columns
+from scouting import PLAY_KEYS
+
+# 传球结果缺失时使用的标记
+UNKNOWN_PASS_RESULT = 'unknown'
+
+
+def add_height_columns(players_df):
+    """处理players数据：身高单位转换（英尺-英寸→总英寸）"""
+    if 'height' in players_df.columns:
+        height_split = players_df['height'].str.split('-', n=1, expand=True)
+        players_df['height_feet'] = height_split[0].astype(float)
+        players_df['height_inches'] = height_split[1].astype(float)
+        players_df['height_total_inches'] = players_df['height_feet'] * 12 + players_df['height_inches']
+    return players_df
+
+
+def clean_plays(plays_df):
+    """处理plays数据：填充缺失值+类型转换，并解析回合描述（传球深度与方向、阵型与犯规等标记）"""
+    pass_result = plays_df['passResult']
+    if isinstance(pass_result.dtype, pd.CategoricalDtype) and UNKNOWN_PASS_RESULT not in pass_result.cat.categories:
+        pass_result = pass_result.cat.add_categories(UNKNOWN_PASS_RESULT)
+    plays_df['passResult'] = pass_result.fillna(UNKNOWN_PASS_RESULT)  # 传球结果缺失值用'unknown'标记
+    plays_df['quarter'] = plays_df['quarter'].astype('int8')  # 确保节次为整数
+    return add_description_columns(plays_df)
+
+
+def merge_play_tables(plays_df, games_df, play_scouting):
+    """关联比赛元数据，按排序后的 (gameId, playId) 索引连接回合级球探汇总，并追加推进与比分、剩余时间等比赛状态列
+
+    比赛状态按整场比赛计算，传入的回合须包含所涉比赛的全部回合。
+    """
+    merged_df = pd.merge(plays_df, games_df, on='gameId', how='left')
+    merged_df = merged_df.set_index(PLAY_KEYS).sort_index().join(play_scouting, how='left').reset_index()
+    return add_game_state_columns(merged_df)
@@ -0,0 +1,151 @@
+import pandas as pd
+
+# 各表的列类型声明：只加载这里列出的列
+# 低基数字符串用category，小整数用窄整型（含缺失值的列用可空整型）
+TABLE_SCHEMAS = {
+    'players': {
+        'nflId': 'int32',
+        'height': 'string',
+        'weight': 'int16',
+        'officialPosition': 'category',
+        'birthDate': 'string',
+        'collegeName': 'string',
+        'displayName': 'string',
+    },
+    'plays': {
+        'gameId': 'int64',
+        'playId': 'int16',
+        'playDescription': 'string',
+        'quarter': 'int8',
+        'down': 'Int8',
+        'yardsToGo': 'Int8',
+        'possessionTeam': 'category',
+        'defensiveTeam': 'category',
+        'yardlineSide': 'category',
+        'yardlineNumber': 'Int8',
+        'gameClock': 'string',
+        'preSnapHomeScore': 'Int8',
+        'preSnapVisitorScore': 'Int8',
+        'passResult': 'category',
+        'playResult': 'Int16',
+        'foulName1': 'category',
+        'foulNFLId1': 'Int32',
+        'foulName2': 'category',
+        'foulNFLId2': 'Int32',
+        'foulName3': 'category',
+        'foulNFLId3': 'Int32',
+        'offenseFormation': 'category',
+        'personnelO': 'category',
+        'defendersInBox': 'Int8',
+        'personnelD': 'category',
+        'dropBackType': 'category',
+        'pff_passCoverage': 'category',
+    },
+    'games': {
+        'gameId': 'int64',
+        'season': 'int16',
+        'week': 'int8',
+        'gameDate': 'string',
+        'gameTimeEastern': 'string',
+        'homeTeamAbbr': 'category',
+        'visitorTeamAbbr': 'category',
+    },
+    'scouting': {
+        'gameId': 'int64',
+        'playId': 'int16',
+        'nflId': 'int32',
+        'pff_role': 'category',
+        'pff_positionLinedUp': 'category',
+        'pff_hit': 'Int8',
+        'pff_hurry': 'Int8',
+        'pff_sack': 'Int8',
+        'pff_beatenByDefender': 'Int8',
+        'pff_hitAllowed': 'Int8',
+        'pff_hurryAllowed': 'Int8',
+        'pff_sackAllowed': 'Int8',
+        'pff_nflIdBlockedPlayer': 'Int32',
+        'pff_blockType': 'category',
+        'pff_backFieldBlock': 'Int8',
+    },
+}
+
+
+def parse_game_times(games_df):
+    """比赛日期解析为datetime，开球时间（美东）解析为当日时刻的timedelta"""
+    if 'gameDate' in games_df.columns:
+        games_df['gameDate'] = pd.to_datetime(games_df['gameDate'], format='%m/%d/%Y')
+    if 'gameTimeEastern' in games_df.columns:
+        games_df['gameTimeEastern'] = pd.to_timedelta(games_df['gameTimeEastern'])
+    return games_df
+
+
+# 读取后的额外类型转换
+TABLE_CONVERTERS = {
+    'games': parse_game_times,
+}
+
+
+def read_table(name, path):
+    """按声明的schema读取CSV：只加载声明的列并直接解析为紧凑类型"""
+    schema = TABLE_SCHEMAS[name]
+    df = pd.read_csv(path, usecols=lambda column: column in schema, dtype=schema)
+    converter = TABLE_CONVERTERS.get(name)
+    return converter(df) if converter else df
+
+
+def read_table_chunks(name, path, chunk_size):
+    """按声明的schema分块读取CSV，逐块产出DataFrame，内存占用由块大小决定"""
+    schema = TABLE_SCHEMAS[name]
+    converter = TABLE_CONVERTERS.get(name)
+    with pd.read_csv(path, usecols=lambda column: column in schema, dtype=schema, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield converter(chunk) if converter else chunk
+
+
+def can_hold_na(dtype):
+    """该类型能否表示缺失值（numpy的整数与布尔类型不能，全缺失的列不能转换为这些类型）"""
+    return not (pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)) \
+        or pd.api.types.is_extension_array_dtype(dtype)
+
+
+def _common_dtypes(frames):
+    """各列拼接后应有的类型：取第一张该列不全为缺失的表的类型，分类列的类别取各表的并集"""
+    dtypes = {}
+    for df in frames:
+        for column, dtype in df.dtypes.items():
+            current = dtypes.get(column)
+            if current is None:
+                if not df[column].isna().all():
+                    dtypes[column] = dtype
+            elif isinstance(current, pd.CategoricalDtype) and isinstance(dtype, pd.CategoricalDtype):
+                added = dtype.categories.difference(current.categories)
+                if len(added):
+                    dtypes[column] = pd.CategoricalDtype(current.categories.append(added), ordered=current.ordered)
+    return dtypes
+
+
+def concat_aligned(frames, **kwargs):
+    """拼接前对齐各表的列类型：分类列统一类别，全为缺失的列取其它表中的类型
+
+    避免分类列因各块类别不同退化为object，以及pandas对全缺失列推断类型的方式变化。
+    """
+    dtypes = _common_dtypes(frames)
+    aligned = []
+    for df in frames:
+        casts = {}
+        for column, dtype in dtypes.items():
+            if column not in df.columns or df[column].dtype == dtype:
+                continue
+            both_categorical = isinstance(dtype, pd.CategoricalDtype) and isinstance(df[column].dtype, pd.CategoricalDtype)
+            if both_categorical or (df[column].isna().all() and can_hold_na(dtype)):
+                casts[column] = dtype
+        aligned.append(df.astype(casts) if casts else df)
+    return pd.concat(aligned, **kwargs)
+
+
+def print_memory_report(frames):
+    """打印各表的内存占用（含字符串等对象列的实际大小）"""
+    print("内存占用:")
+    for name, df in frames.items():
+        size_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+        print(f"  - {name}: {size_mb:.2f} MB ({len(df)} 行 × {len(df.columns)} 列)")
@@ -0,0 +1,68 @@
+import functools
+import operator
+
+import pandas as pd
+
+# 回合主键
+PLAY_KEYS = ['gameId', 'playId']
+
+# 逐球员的0/1标记列 → 回合级计数列
+SCOUTING_FLAG_COLUMNS = {
+    'pff_hit': 'pff_hits',
+    'pff_hurry': 'pff_hurries',
+    'pff_sack': 'pff_sacks',
+    'pff_hitAllowed': 'pff_hitsAllowed',
+    'pff_hurryAllowed': 'pff_hurriesAllowed',
+    'pff_sackAllowed': 'pff_sacksAllowed',
+    'pff_beatenByDefender': 'pff_beatenBlocks',
+}
+
+# 施压标记（任一为1即视为该球员造成压迫）
+PRESSURE_FLAGS = ['pff_hit', 'pff_hurry', 'pff_sack']
+
+# 球员角色 → 回合级人数列
+SCOUTING_ROLE_COLUMNS = {
+    'Pass Block': 'pff_passBlockers',
+    'Pass Rush': 'pff_passRushers',
+}
+
+# 回合级汇总输出的全部列
+PLAY_SCOUTING_COLUMNS = (
+    list(SCOUTING_FLAG_COLUMNS.values())
+    + ['pff_pressures']
+    + list(SCOUTING_ROLE_COLUMNS.values())
+    + ['pff_playersScouted']
+)
+
+
+def scouting_indicators(scouting_df):
+    """逐球员行的布尔指标（各标记、是否造成压迫、所属角色），列名与 PLAY_SCOUTING_COLUMNS 一致，求和即为计数"""
+    flag_columns = [c for c in SCOUTING_FLAG_COLUMNS if c in scouting_df.columns]
+    flags = scouting_df[flag_columns].fillna(0).gt(0)
+
+    per_player = pd.DataFrame(index=scouting_df.index)
+    for column in flag_columns:
+        per_player[SCOUTING_FLAG_COLUMNS[column]] = flags[column]
+
+    pressure_columns = [c for c in PRESSURE_FLAGS if c in flag_columns]
+    if pressure_columns:
+        # 逐列按位或，比 any(axis=1) 的逐行归约快一个数量级
+        per_player['pff_pressures'] = functools.reduce(operator.or_, (flags[c] for c in pressure_columns))
+
+    if 'pff_role' in scouting_df.columns:
+        for role, column in SCOUTING_ROLE_COLUMNS.items():
+            per_player[column] = scouting_df['pff_role'] == role
+
+    per_player['pff_playersScouted'] = True
+    return per_player
+
+
+def aggregate_scouting_by_play(scouting_df):
+    """将逐球员的球探数据压缩为每回合一行，返回按 (gameId, playId) 排序的MultiIndex表"""
+    per_player = scouting_indicators(scouting_df)
+    for key in PLAY_KEYS:
+        per_player[key] = scouting_df[key]
+
+    # 布尔列求和即为计数，全部在向量化的groupby中完成
+    play_scouting = per_player.groupby(PLAY_KEYS, sort=True).sum()
+    return play_scouting.astype('int16')
@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+import re
+import socket
+import subprocess
+import time
+
+# 工作进程写入的会话粘滞cookie：同一浏览器的页面请求和websocket连接必须落到创建该会话的进程
+WORKER_COOKIE = 'nfl_worker'
+# 负载均衡读取请求头的上限与转发时每次读取的字节数
+MAX_HEAD_BYTES = 64 * 1024
+PIPE_CHUNK_SIZE = 64 * 1024
+# 等待工作进程开始监听的超时（秒）
+WORKER_START_TIMEOUT = 60.0
+
+_COOKIE_PATTERN = re.compile(rb'^cookie:[^\r\n]*\b' + WORKER_COOKIE.encode() + rb'=(\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+def install_session_cookie(app, index):
+    """在工作进程的HTTP响应中写入本进程编号，负载均衡据此把后续连接转发回同一进程"""
+    @app.middleware('http')
+    async def pin_session_to_worker(request, call_next):
+        response = await call_next(request)
+        if request.cookies.get(WORKER_COOKIE) != str(index):
+            response.set_cookie(WORKER_COOKIE, str(index), httponly=True, samesite='lax')
+        return response
+
+
+async def _pipe(reader, writer):
+    """单向转发直到一端关闭"""
+    try:
+        while data := await reader.read(PIPE_CHUNK_SIZE):
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+class StickyBalancer:
+    """本机TCP负载均衡：带工作进程cookie的连接转发到对应进程，新会话分给当前连接数最少的进程
+
+    只解析每个连接的第一个请求头，之后双向透传字节（包括websocket升级后的数据）。
+    目标进程无法连接时依次尝试其它进程，浏览器会在新进程上重建会话。
+    """
+
+    def __init__(self, backends, report=print):
+        self.backends = backends
+        self.report = report
+        self.connections = [0] * len(backends)
+        self._next = 0
+
+    def choose(self, head):
+        match = _COOKIE_PATTERN.search(head)
+        if match and int(match.group(1)) < len(self.backends):
+            return int(match.group(1))
+        # 连接数相同时轮流分配
+        count = len(self.backends)
+        index = min(range(count), key=lambda i: (self.connections[i], (i - self._next) % count))
+        self._next = (index + 1) % count
+        return index
+
+    async def _connect(self, preferred):
+        candidates = [preferred] + sorted((i for i in range(len(self.backends)) if i != preferred),
+                                          key=self.connections.__getitem__)
+        for index in candidates:
+            try:
+                return index, await asyncio.open_connection(*self.backends[index])
+            except OSError as e:
+                self.report(f"工作进程 {index} 无法连接: {e}")
+        return None, (None, None)
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError as e:
+            # 请求头过长：按已读到的部分选择进程
+            head = await reader.readexactly(e.consumed)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+
+        index, (upstream_reader, upstream_writer) = await self._connect(self.choose(head))
+        if index is None:
+            writer.close()
+            return
+        self.connections[index] += 1
+        try:
+            upstream_writer.write(head)
+            await asyncio.gather(_pipe(reader, upstream_writer), _pipe(upstream_reader, writer))
+        finally:
+            self.connections[index] -= 1
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD_BYTES)
+        async with server:
+            await server.serve_forever()
+
+
+def start_workers(commands, env=None):
+    """按命令列表启动工作进程（输出直接继承到当前终端）"""
+    return [subprocess.Popen(command, env=env) for command in commands]
+
+
+def wait_for_workers(processes, backends, timeout=WORKER_START_TIMEOUT):
+    """等待全部工作进程开始监听；有进程提前退出或超时时抛出 RuntimeError"""
+    deadline = time.monotonic() + timeout
+    pending = dict(enumerate(backends))
+    while pending:
+        for index, address in list(pending.items()):
+            if processes[index].poll() is not None:
+                raise RuntimeError(f"工作进程 {index} 启动失败（退出码 {processes[index].returncode}）")
+            with contextlib.suppress(OSError), socket.create_connection(address, timeout=0.5):
+                del pending[index]
+        if pending and time.monotonic() > deadline:
+            raise RuntimeError(f"等待工作进程启动超时: {sorted(pending)}")
+        if pending:
+            time.sleep(0.2)
+
+
+def stop_workers(processes, timeout=10.0):
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
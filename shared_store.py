@@ -0,0 +1,85 @@
+import json
+import os
+
+from data_cache import CACHE_DIR
+from hot_reload import LiveDataset
+from player_index import PlayerIndex
+
+# 共享数据集的存放目录（每个多进程服务实例一个子目录，退出时删除）
+SHARED_STORE_DIR = os.path.join(CACHE_DIR, 'shared')
+STORE_MANIFEST = 'store.json'
+
+
+def _table_path(store_dir, name):
+    return os.path.join(store_dir, f'{name}.arrow')
+
+
+def write_store(store_dir, frames, meta=None):
+    """把 {表名: DataFrame} 写成未压缩的Arrow IPC文件，供多个进程以内存映射方式读取
+
+    清单最后写入，读取方以清单存在作为数据完整的标志。
+    """
+    import pyarrow as pa
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, df in frames.items():
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(_table_path(store_dir, name), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    manifest_path = os.path.join(store_dir, STORE_MANIFEST)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'tables': list(frames), **(meta or {})}, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def open_store(store_dir):
+    """以内存映射方式打开共享存储，返回 ({表名: DataFrame}, 清单)
+
+    数值列和分类列的编码直接引用映射的文件页，不复制数据，所有进程共用操作系统页缓存中的同一份；
+    字符串列和可空整数列在转换为pandas时仍会在每个进程中复制一份。
+    """
+    import pyarrow as pa
+
+    with open(os.path.join(store_dir, STORE_MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    frames = {}
+    for name in manifest['tables']:
+        source = pa.memory_map(_table_path(store_dir, name))
+        frames[name] = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+    return frames, manifest
+
+
+def export_dataset(dataset, store_dir, version=None):
+    """把仪表盘读取的数据（球员表、比赛表、传球数据立方体、期望得分表、球员下钻聚合）及各部分的加载状态写入共享存储
+
+    合并表与逐球员球探表只在构建立方体和聚合时需要，各板块都查询立方体或球员索引，因此不写入；
+    球员索引由各工作进程从球员表与下钻聚合重建（毫秒级）。
+    """
+    frames = {}
+    if dataset.players_df is not None:
+        frames['players'] = dataset.players_df
+    if dataset.games_df is not None:
+        frames['games'] = dataset.games_df
+    if dataset.ep_table is not None:
+        frames['ep_table'] = dataset.ep_table
+    for part, df in (dataset.pass_cube or {}).items():
+        frames[f'pass_cube.{part}'] = df
+    for part, df in (dataset.player_stats or {}).items():
+        frames[f'player_stats.{part}'] = df
+    write_store(store_dir, frames, {'version': version, 'status': dataset.status, 'errors': dataset.errors,
+                                    'stream': dataset.stream})
+
+
+def import_dataset(store_dir):
+    """挂载共享存储并还原为数据集，返回 (LiveDataset, 数据集版本号)"""
+    frames, manifest = open_store(store_dir)
+    pass_cube = {name.split('.', 1)[1]: df for name, df in frames.items() if name.startswith('pass_cube.')}
+    player_stats = {name.split('.', 1)[1]: df for name, df in frames.items() if name.startswith('player_stats.')}
+    dataset = LiveDataset(players_df=frames.get('players'), games_df=frames.get('games'),
+                          pass_cube=pass_cube or None, ep_table=frames.get('ep_table'),
+                          player_stats=player_stats or None, stream=manifest.get('stream', False))
+    dataset.status.update(manifest['status'])
+    dataset.errors.update(manifest['errors'])
+    if dataset.status.get('player_index') == 'ready':
+        dataset.player_index = PlayerIndex(dataset.players_df, dataset.player_stats)
+    return dataset, manifest['version']
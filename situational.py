@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+
+from scouting import PLAY_KEYS
+
+# 传球结果编码（与 metrics 一致）
+COMPLETE = 'C'
+INCOMPLETE = 'I'
+INTERCEPTION = 'IN'
+ATTEMPT_RESULTS = [COMPLETE, INCOMPLETE, INTERCEPTION]
+
+# 期望得分查找表的分桶：剩余码数（距首攻）与场区（距对方端区码数）
+DISTANCE_BINS = [0, 3, 6, 10, 99]
+DISTANCE_LABELS = ['1-3', '4-6', '7-10', '11+']
+DISTANCE_CENTERS = np.array([2.0, 5.0, 8.5, 14.0])
+FIELD_ZONE_BINS = list(range(0, 101, 10))
+FIELD_ZONE_LABELS = [f'{low + 1}-{min(low + 10, 99)}' for low in FIELD_ZONE_BINS[:-1]]
+FIELD_ZONE_CENTERS = np.array(FIELD_ZONE_BINS[:-1]) + 5.5
+DOWNS = [1, 2, 3, 4]
+
+# 分桶使用固定类别，保证分块、热更新拼接后的类别一致
+DISTANCE_BUCKETS = pd.CategoricalDtype(DISTANCE_LABELS, ordered=True)
+FIELD_ZONES = pd.CategoricalDtype(FIELD_ZONE_LABELS, ordered=True)
+
+# 终止状态的得分：达阵（含附加分的期望）、安全分
+TOUCHDOWN_POINTS = 7.0
+SAFETY_POINTS = -2.0
+# 单元样本较少时向全局线性拟合收缩的先验权重（相当于的回合数）
+EP_PRIOR_WEIGHT = 20
+
+# 计算所需的列
+SITUATION_COLUMNS = ['down', 'yardsToGo', 'yardlineSide', 'yardlineNumber', 'possessionTeam', 'passResult',
+                     'playResult']
+SCORE_COLUMNS = ['quarter', 'gameClock', 'homeTeamAbbr', 'preSnapHomeScore', 'preSnapVisitorScore']
+
+# 情境立方体的维度与可加的聚合列
+SITUATION_KEYS = ['down', 'field_zone']
+SITUATION_SUM_COLUMNS = ['plays', 'attempts', 'completions', 'successes', 'epa_sum']
+
+
+def has_situation_columns(df):
+    return all(column in df.columns for column in SITUATION_COLUMNS + PLAY_KEYS)
+
+
+def yards_to_goal(df):
+    """由码线归属与码线数推导进攻方距对方端区的码数（50码线没有归属）"""
+    number = df['yardlineNumber'].astype('float64')
+    own_half = (df['yardlineSide'].astype(object) == df['possessionTeam'].astype(object)).fillna(False)
+    return pd.Series(np.where(own_half, 100 - number, number), index=df.index)
+
+
+def clock_seconds(clock):
+    """比赛时钟 'MM:SS' → 本节剩余秒数
+
+    时钟的不同取值不超过901个，先去重编码，只解析去重后的取值再按编码取回。
+    """
+    codes, uniques = pd.factorize(clock)
+    if len(uniques) == 0:
+        return pd.Series(np.nan, index=clock.index)
+    parts = pd.Series(uniques, dtype='string').str.partition(':')
+    seconds = (pd.to_numeric(parts[0], errors='coerce') * 60 + pd.to_numeric(parts[2], errors='coerce')).to_numpy('float64')
+    return pd.Series(np.where(codes >= 0, seconds[codes], np.nan), index=clock.index)
+
+
+def _bucket(values, bins):
+    """分桶编号（超出范围为 -1），用于直接索引查找表"""
+    codes = pd.cut(np.asarray(values, dtype='float64'), bins, labels=False)
+    return np.nan_to_num(codes, nan=-1).astype(int)
+
+
+def next_score_points(df):
+    """每个回合之后同一半场内下一次得分对进攻方的分值（对方得分为负，半场内无得分为0）
+
+    回合按 (比赛, 节次, 剩余时间) 排序后比较相邻回合的开球前比分，全程为向量化的移位运算。
+    """
+    order = df.assign(_seconds=clock_seconds(df['gameClock'])).sort_values(
+        ['gameId', 'quarter', '_seconds', 'playId'], ascending=[True, True, False, True])
+    game = order['gameId'].to_numpy()
+    half = np.minimum((order['quarter'].to_numpy() + 1) // 2, 3)
+    home = order['preSnapHomeScore'].astype('float64').fillna(0).to_numpy()
+    visitor = order['preSnapVisitorScore'].astype('float64').fillna(0).to_numpy()
+
+    # 第k行与第k+1行之间比分变化即为一次得分事件
+    same_game = np.append(game[1:] == game[:-1], False)
+    home_delta = np.append(home[1:] - home[:-1], 0)
+    visitor_delta = np.append(visitor[1:] - visitor[:-1], 0)
+    event = same_game & ((home_delta != 0) | (visitor_delta != 0))
+
+    # 每行之后（含本行）的第一个得分事件
+    positions = np.arange(len(order))
+    next_event = pd.Series(np.where(event, positions, np.nan)).bfill().to_numpy()
+    found = ~np.isnan(next_event)
+    k = np.where(found, next_event, 0).astype(int)
+    valid = found & (game[k] == game) & (np.append(half[1:], 0)[k] == half)
+
+    offense_home = (order['possessionTeam'].astype(object) == order['homeTeamAbbr'].astype(object)).to_numpy()
+    net_home = home_delta[k] - visitor_delta[k]
+    points = np.where(valid, np.where(offense_home, net_home, -net_home), 0.0)
+    return pd.Series(points, index=order.index).reindex(df.index)
+
+
+def build_ep_table(merged_df):
+    """由全部回合预先计算期望得分查找表：(档数, 剩余码数桶, 场区) → 期望得分
+
+    每个单元取其回合之后下一次得分的平均值，并按样本量向全局线性拟合
+    （截距 + 档数 + 距端区码数 + 剩余码数）收缩，样本稀少或为空的单元由拟合值补足。
+    缺少所需列时返回 None。
+    """
+    if not has_situation_columns(merged_df) or not all(c in merged_df.columns for c in SCORE_COLUMNS):
+        return None
+    down = merged_df['down'].astype('float64')
+    distance = merged_df['yardsToGo'].astype('float64')
+    goal = yards_to_goal(merged_df)
+    points = next_score_points(merged_df)
+    valid = (down.between(1, 4) & distance.gt(0) & goal.between(1, 99)).to_numpy()
+
+    down, distance, goal, points = (s.to_numpy()[valid] for s in (down, distance, goal, points))
+    design = np.column_stack([np.ones(len(down)), down == 2, down == 3, down == 4, goal, distance])
+    coef = np.linalg.lstsq(design, points, rcond=None)[0] if len(down) >= design.shape[1] else np.zeros(6)
+
+    d, b, z = np.meshgrid(DOWNS, range(len(DISTANCE_LABELS)), range(len(FIELD_ZONE_LABELS)), indexing='ij')
+    d, b, z = d.ravel(), b.ravel(), z.ravel()
+    prior = (coef[0] + coef[1] * (d == 2) + coef[2] * (d == 3) + coef[3] * (d == 4)
+             + coef[4] * FIELD_ZONE_CENTERS[z] + coef[5] * DISTANCE_CENTERS[b])
+
+    cells = pd.DataFrame({'down': down, 'distance_bin': _bucket(distance, DISTANCE_BINS),
+                          'zone': _bucket(goal, FIELD_ZONE_BINS), 'points': points})
+    stats = cells.groupby(['down', 'distance_bin', 'zone'])['points'].agg(['sum', 'count'])
+    stats = stats.reindex(pd.MultiIndex.from_arrays([d, b, z]), fill_value=0)
+    count = stats['count'].to_numpy()
+    ep = (stats['sum'].to_numpy() + EP_PRIOR_WEIGHT * prior) / (count + EP_PRIOR_WEIGHT)
+
+    return pd.DataFrame({
+        'down': d.astype('int8'),
+        'distance_bin': pd.Categorical.from_codes(b, dtype=DISTANCE_BUCKETS),
+        'field_zone': pd.Categorical.from_codes(z, dtype=FIELD_ZONES),
+        'plays': count.astype('int32'),
+        'ep': ep,
+    })
+
+
+def _ep_grid(ep_table):
+    """查找表 → [档数, 剩余码数桶, 场区] 的数组"""
+    grid = np.zeros((len(DOWNS), len(DISTANCE_LABELS), len(FIELD_ZONE_LABELS)))
+    grid[ep_table['down'].to_numpy() - 1, ep_table['distance_bin'].cat.codes.to_numpy(),
+         ep_table['field_zone'].cat.codes.to_numpy()] = ep_table['ep'].to_numpy()
+    return grid
+
+
+def _lookup(grid, down, distance, goal):
+    """按状态数组查表（状态越界的位置返回 NaN，由调用方按终止状态处理）"""
+    down_index = np.nan_to_num(down).astype(int) - 1
+    distance_index = _bucket(distance, DISTANCE_BINS)
+    zone_index = _bucket(goal, FIELD_ZONE_BINS)
+    inside = (down_index >= 0) & (down_index < len(DOWNS)) & (distance_index >= 0) & (zone_index >= 0)
+    values = grid[np.clip(down_index, 0, len(DOWNS) - 1), np.clip(distance_index, 0, None), np.clip(zone_index, 0, None)]
+    return np.where(inside, values, np.nan)
+
+
+def situation_frame(merged_df, ep_table):
+    """逐回合的情境指标：场区、开球前期望得分、EPA、是否成功（EPA>0）、是否为传球出手及是否完成
+
+    回合后的状态由推进码数推导：越过端区为达阵，退回己方端区为安全分，拦截与第四档未达首攻为攻防转换
+    （对方在该位置获得第一档10码，拦截忽略回攻码数），达到剩余码数为新的第一档，否则进入下一档。
+    全部为数组运算，不逐回合调用Python。只保留第1至4档且场区有效的回合。
+    """
+    down = merged_df['down'].astype('float64').to_numpy()
+    distance = merged_df['yardsToGo'].astype('float64').to_numpy()
+    goal = yards_to_goal(merged_df).to_numpy()
+    gain = merged_df['playResult'].astype('float64').fillna(0).to_numpy()
+    result = merged_df['passResult'].astype(object).to_numpy()
+    valid = (down >= 1) & (down <= 4) & (distance > 0) & (goal >= 1) & (goal <= 99)
+
+    grid = _ep_grid(ep_table)
+    ep_before = _lookup(grid, down, distance, goal)
+
+    new_goal = goal - gain
+    first_down = gain >= distance
+    interception = result == INTERCEPTION
+    turnover_on_downs = (down == 4) & ~first_down
+    ep_first_down = _lookup(grid, np.ones_like(down), np.minimum(10, new_goal), new_goal)
+    ep_next_down = _lookup(grid, down + 1, distance - gain, new_goal)
+    ep_turnover = -_lookup(grid, np.ones_like(down), np.full_like(down, 10), 100 - np.where(interception, goal, new_goal))
+    ep_after = np.select(
+        [interception, new_goal <= 0, new_goal >= 100, turnover_on_downs, first_down],
+        [ep_turnover, TOUCHDOWN_POINTS, SAFETY_POINTS, ep_turnover, ep_first_down],
+        ep_next_down,
+    )
+    epa = ep_after - ep_before
+
+    frame = pd.DataFrame({
+        'down': np.nan_to_num(down).astype('int8'),
+        'field_zone': pd.Categorical.from_codes(_bucket(goal, FIELD_ZONE_BINS), dtype=FIELD_ZONES),
+        'ep': ep_before,
+        'epa': epa,
+        'success': epa > 0,
+        'attempt': np.isin(result, ATTEMPT_RESULTS),
+        'completion': result == COMPLETE,
+    }, index=merged_df.index)
+    return frame[valid & ~np.isnan(epa)]
+
+
+def rollup_situations(detail, keys):
+    """将情境立方体的部分聚合汇总到指定维度，并计算完成率、成功率与每回合EPA"""
+    summary = detail.groupby(keys, observed=True)[SITUATION_SUM_COLUMNS].sum()
+    plays = summary['plays']
+    summary['completion_rate'] = summary['completions'] / summary['attempts'].where(summary['attempts'] > 0) * 100
+    summary['success_rate'] = summary['successes'] / plays * 100
+    summary['epa_per_play'] = summary['epa_sum'] / plays
+    return summary.reset_index()
+
+
+def summarize_situations(detail):
+    """由情境立方体切片汇总出情境分析板块使用的指标；切片为空时返回 None"""
+    if detail is None or detail.empty or detail['plays'].sum() == 0:
+        return None
+    totals = detail[SITUATION_SUM_COLUMNS].sum()
+    return {
+        'plays': int(totals['plays']),
+        'epa_per_play': totals['epa_sum'] / totals['plays'],
+        'success_rate': totals['successes'] / totals['plays'] * 100,
+        'completion_rate': totals['completions'] / totals['attempts'] * 100 if totals['attempts'] else float('nan'),
+        'by_zone_down': rollup_situations(detail, SITUATION_KEYS),
+        'by_down': rollup_situations(detail, 'down'),
+        'by_team': rollup_situations(detail, 'possessionTeam'),
+    }
@@ -0,0 +1,117 @@
+import time
+
+import pandas as pd
+
+from cube import CUBE_PARTS, build_pass_cube, restore_categories
+from preprocessing import clean_plays, merge_play_tables
+from schema import concat_aligned, read_table_chunks
+from scouting import aggregate_scouting_by_play
+
+# 默认每块读取的行数
+DEFAULT_CHUNK_SIZE = 200_000
+
+
+class ScoutingCursor:
+    """按gameId顺序逐块读取球探数据，只在内存中保留尚未被回合分块消费的回合级汇总
+
+    要求球探文件与plays文件均按gameId升序排列（Big Data Bowl原始文件即如此）。
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = None
+        self._last_game = None
+        self.exhausted = False
+        self.rows = 0
+
+    def _read_next(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.exhausted = True
+            return
+        if chunk.empty:
+            return
+        first_game = chunk['gameId'].iloc[0]
+        if not chunk['gameId'].is_monotonic_increasing or (self._last_game is not None and first_game < self._last_game):
+            raise ValueError('流式读取要求球探数据按gameId升序排列')
+        self._last_game = chunk['gameId'].iloc[-1]
+        self.rows += len(chunk)
+        partial = aggregate_scouting_by_play(chunk)
+        self._buffer = partial if self._buffer is None else pd.concat([self._buffer, partial])
+
+    def take_through(self, game_id):
+        """返回gameId不超过game_id的回合级汇总，并随即从缓冲中释放
+
+        调用方只对已完整读入的比赛调用（每块最后一场比赛留到下一块处理），这些比赛之后不会再被请求。
+        """
+        while not self.exhausted and (self._buffer is None or self._last_game <= game_id):
+            self._read_next()
+        if self._buffer is None:
+            return None
+
+        games = self._buffer.index.get_level_values('gameId')
+        ready = self._buffer[games <= game_id]
+        self._buffer = self._buffer[games > game_id]
+        # 跨块的回合会出现多条部分汇总，按回合主键再求和一次
+        return ready.groupby(level=ready.index.names, sort=True).sum()
+
+
+def combine_cubes(parts):
+    """合并多个部分立方体：各单元的可加聚合直接相加"""
+    combined = {}
+    for name, (keys, columns) in CUBE_PARTS.items():
+        # 跳过空的部分（如没有可解析传球的分块），避免拼接时类型退化
+        frames = [p[name] for p in parts if not p[name].empty] or [parts[0][name]]
+        table = pd.concat(frames, ignore_index=True)
+        combined[name] = restore_categories(table.groupby(keys, observed=True)[columns].sum().reset_index())
+    return combined
+
+
+def stream_pass_cube(plays_path, scouting_path, games_df, chunk_size=DEFAULT_CHUNK_SIZE, report=print):
+    """流式构建传球数据立方体：plays与球探数据均按块读取，逐块关联比赛表并折叠进立方体
+
+    每块最后一场比赛可能延续到下一块，其回合留到下一块一起处理，使推进等按整场比赛计算的状态保持正确。
+    峰值内存由块大小（加上单场比赛的回合与球探汇总）决定，与数据集总行数无关。
+    """
+    scouting = ScoutingCursor(read_table_chunks('scouting', scouting_path, chunk_size))
+    partials = []
+    rows = 0
+    last_game = None
+    carry = None
+    start = time.perf_counter()
+
+    def fold(plays):
+        play_scouting = scouting.take_through(plays['gameId'].iloc[-1])
+        if play_scouting is None:
+            play_scouting = pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['gameId', 'playId']))
+        partial = build_pass_cube(merge_play_tables(clean_plays(plays), games_df, play_scouting))
+        if partial is not None:
+            partials.append(partial)
+
+    for chunk in read_table_chunks('plays', plays_path, chunk_size):
+        if chunk.empty:
+            continue
+        if not chunk['gameId'].is_monotonic_increasing or (last_game is not None and chunk['gameId'].iloc[0] < last_game):
+            raise ValueError('流式读取要求plays数据按gameId升序排列')
+        last_game = chunk['gameId'].iloc[-1]
+        rows += len(chunk)
+
+        if carry is not None:
+            # 上一块留下的回合与本块对齐类型后拼接（分类列的类别随块而异）
+            chunk = concat_aligned([carry, chunk], ignore_index=True)
+        complete = chunk['gameId'] < last_game
+        carry = chunk[~complete].copy()
+        if complete.any():
+            fold(chunk[complete].copy())
+
+        elapsed = time.perf_counter() - start
+        report(f"  - 流式读取: 回合 {rows} 行, 球探 {scouting.rows} 行 "
+               f"({(rows + scouting.rows) / max(elapsed, 1e-9):,.0f} 行/秒)")
+
+    if carry is not None and not carry.empty:
+        fold(carry)
+    # 各块的比赛互不重叠，部分立方体的单元不会重复，最后一次性合并
+    if not partials:
+        return None
+    return partials[0] if len(partials) == 1 else combine_cubes(partials)
@@ -0,0 +1,341 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# 预设规模（回合数），与真实数据的比赛数、球员数、每回合球探行数等基数成比例
+SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# 与 nfl_app.DATA_FILES 一致的文件名
+FILE_NAMES = {
+    'players': 'players.csv',
+    'plays': 'plays.csv',
+    'games': 'games.csv',
+    'scouting': 'pffScoutingData.csv',
+}
+
+# 真实数据集的基数：每场约70个传球回合，每回合约22行球探记录，联盟约1700名球员，每赛季272场
+PLAYS_PER_GAME = 70
+SCOUTING_PER_PLAY = 22
+PLAYER_COUNT = 1700
+GAMES_PER_SEASON = 272
+FIRST_SEASON = 2021
+# 每次写入的比赛数，控制生成大数据集时的内存占用
+GAMES_PER_CHUNK = 2000
+# 生成逻辑的版本（变化时递增，使之前生成并复用的数据集目录失效）
+DATA_VERSION = 2
+
+TEAMS = ['ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB', 'HOU', 'IND',
+         'JAX', 'KC', 'LA', 'LAC', 'LV', 'MIA', 'MIN', 'NE', 'NO', 'NYG', 'NYJ', 'PHI', 'PIT', 'SEA',
+         'SF', 'TB', 'TEN', 'WAS']
+
+# 类别取值及其在真实数据中的占比
+POSITIONS = {'WR': 0.125, 'CB': 0.114, 'DE': 0.085, 'OLB': 0.081, 'RB': 0.075, 'T': 0.073, 'TE': 0.072,
+             'DT': 0.068, 'G': 0.059, 'ILB': 0.048, 'FS': 0.043, 'SS': 0.041, 'QB': 0.036, 'C': 0.033,
+             'NT': 0.02, 'MLB': 0.016, 'FB': 0.009, 'LB': 0.001, 'DB': 0.001}
+PASS_RESULTS = {'C': 0.54, 'I': 0.322, 'S': 0.063, 'R': 0.053, 'IN': 0.022}
+DOWNS = {1: 0.36, 2: 0.33, 3: 0.28, 4: 0.027, 0: 0.003}
+FORMATIONS = {'SHOTGUN': 0.64, 'EMPTY': 0.163, 'SINGLEBACK': 0.139, 'I_FORM': 0.035, 'PISTOL': 0.018,
+              'JUMBO': 0.004, 'WILDCAT': 0.001}
+PERSONNEL_O = {'1 RB, 1 TE, 3 WR': 0.672, '1 RB, 2 TE, 2 WR': 0.176, '2 RB, 1 TE, 2 WR': 0.051,
+               '1 RB, 3 TE, 1 WR': 0.027, '1 RB, 0 TE, 4 WR': 0.022, '2 RB, 2 TE, 1 WR': 0.013,
+               '0 RB, 1 TE, 4 WR': 0.01, '2 RB, 0 TE, 3 WR': 0.029}
+PERSONNEL_D = {'4 DL, 2 LB, 5 DB': 0.283, '2 DL, 4 LB, 5 DB': 0.18, '3 DL, 3 LB, 5 DB': 0.134,
+               '2 DL, 3 LB, 6 DB': 0.093, '4 DL, 3 LB, 4 DB': 0.08, '3 DL, 4 LB, 4 DB': 0.065,
+               '4 DL, 1 LB, 6 DB': 0.054, '3 DL, 2 LB, 6 DB': 0.111}
+DROPBACK_TYPES = {'TRADITIONAL': 0.814, 'SCRAMBLE': 0.105, 'DESIGNED_ROLLOUT_RIGHT': 0.033,
+                  'DESIGNED_ROLLOUT_LEFT': 0.029, 'SCRAMBLE_ROLLOUT_RIGHT': 0.015,
+                  'SCRAMBLE_ROLLOUT_LEFT': 0.003, 'DESIGNED_RUN': 0.001}
+COVERAGES = {'Cover-3': 0.311, 'Cover-1': 0.235, 'Cover-2': 0.127, 'Quarters': 0.121, 'Cover-6': 0.094,
+             'Red Zone': 0.044, 'Cover-0': 0.032, '2-Man': 0.023, 'Goal Line': 0.013}
+COVERAGE_TYPES = {'Cover-3': 'Zone', 'Cover-1': 'Man', 'Cover-2': 'Zone', 'Quarters': 'Zone',
+                  'Cover-6': 'Zone', 'Red Zone': 'Other', 'Cover-0': 'Man', '2-Man': 'Man',
+                  'Goal Line': 'Other'}
+FOULS = {'Defensive Pass Interference': 0.2, 'Offensive Holding': 0.2, 'Defensive Holding': 0.11,
+         'Roughing the Passer': 0.08, 'Defensive Offside': 0.07, 'Unnecessary Roughness': 0.06,
+         'Illegal Use of Hands': 0.06, 'Intentional Grounding': 0.05, 'False Start': 0.05,
+         'Illegal Contact': 0.04, 'Face Mask (15 Yards)': 0.04, 'Neutral Zone Infraction': 0.04}
+# 回合有犯规记录的概率（第1、2、3个犯规）
+FOUL_RATES = (0.086, 0.0035, 0.0001)
+
+# 每回合的球探记录模板：(pff_role, pff_positionLinedUp)，共22人
+SCOUTING_TEMPLATE = (
+    [('Pass', 'QB')]
+    + [('Pass Route', p) for p in ('LWR', 'RWR', 'SLWR', 'TE-L')]
+    + [('Pass Block', p) for p in ('LT', 'LG', 'C', 'RG', 'RT', 'HB')]
+    + [('Pass Rush', p) for p in ('LEO', 'DLT', 'DRT', 'REO')]
+    + [('Coverage', p) for p in ('LCB', 'RCB', 'SCBL', 'FS', 'SS', 'MLB', 'ROLB')]
+)
+BLOCK_TYPES = ['PP', 'SW', 'CH', 'PT', 'BH']
+
+FIRST_NAMES = list('ABCDEJKLMRST')
+LAST_NAMES = ['Allen', 'Brown', 'Carter', 'Davis', 'Evans', 'Foster', 'Green', 'Harris', 'Jackson',
+              'Johnson', 'King', 'Lewis', 'Moore', 'Nelson', 'Owens', 'Parker', 'Reed', 'Smith',
+              'Taylor', 'Walker', 'White', 'Williams', 'Wilson', 'Young']
+
+
+def _choice(rng, distribution, size):
+    """按占比抽取类别取值"""
+    values = list(distribution)
+    probs = np.array(list(distribution.values()), dtype=float)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=probs / probs.sum())]
+
+
+def generate_players(rng, count=PLAYER_COUNT):
+    """球员表：身高为“英尺-英寸”字符串，位置分布与真实名册一致"""
+    heights = np.clip(rng.normal(74, 2.6, count).round().astype(int), 66, 81)
+    names = [f"{first} {last}{i}" for i, (first, last) in enumerate(zip(
+        rng.choice(['Aaron', 'Chris', 'David', 'James', 'Josh', 'Mike', 'Tom', 'Tyler'], count),
+        rng.choice(LAST_NAMES, count)))]
+    return pd.DataFrame({
+        'nflId': np.arange(25000, 25000 + count),
+        'height': [f"{h // 12}-{h % 12}" for h in heights],
+        'weight': np.clip(rng.normal(245, 45, count).round().astype(int), 155, 365),
+        'birthDate': pd.to_datetime('1990-01-01') + pd.to_timedelta(rng.integers(0, 5000, count), unit='D'),
+        'collegeName': rng.choice(['Alabama', 'Ohio State', 'Georgia', 'LSU', 'Michigan', 'USC'], count),
+        'officialPosition': _choice(rng, POSITIONS, count),
+        'displayName': names,
+    })
+
+
+def generate_games(rng, count):
+    """比赛表：gameId 形如 YYYYMMDDNN（NN为当天的比赛序号），每赛季272场、18周，gameId随比赛顺序递增"""
+    index = np.arange(count)
+    season = FIRST_SEASON + index // GAMES_PER_SEASON
+    week = 1 + (index % GAMES_PER_SEASON) * 18 // GAMES_PER_SEASON
+    dates = pd.to_datetime(season.astype(str) + '-09-09') + pd.to_timedelta((week - 1) * 7, unit='D')
+    home = rng.integers(0, len(TEAMS), count)
+    visitor = (home + rng.integers(1, len(TEAMS), count)) % len(TEAMS)
+    teams = np.asarray(TEAMS, dtype=object)
+    return pd.DataFrame({
+        'gameId': dates.strftime('%Y%m%d').astype(np.int64) * 100 + pd.Series(dates).groupby(dates).cumcount().to_numpy(),
+        'season': season,
+        'week': week,
+        'gameDate': dates.strftime('%m/%d/%Y'),
+        'gameTimeEastern': rng.choice(['13:00:00', '16:05:00', '16:25:00', '20:20:00'], count),
+        'homeTeamAbbr': teams[home],
+        'visitorTeamAbbr': teams[visitor],
+    })
+
+
+def _short_names(rng, size):
+    return pd.Series(rng.choice(FIRST_NAMES, size), dtype=object) + '.' + rng.choice(LAST_NAMES, size)
+
+
+def _describe_plays(rng, plays, yards_to_goal):
+    """按真实数据的格式生成回合描述（时间、阵型、传球深度与方向、结果码数、达阵、犯规）"""
+    n = len(plays)
+    shotgun = pd.Series(np.where(plays['offenseFormation'].eq('SHOTGUN'), '(Shotgun) ', ''))
+    prefix = '(' + plays['gameClock'].str.lstrip('0') + ') ' + shotgun
+    passer = _short_names(rng, n)
+    target = _short_names(rng, n)
+    defender = _short_names(rng, n)
+    throw = (pd.Series(rng.choice(['short', 'deep'], n, p=[0.78, 0.22])) + ' '
+             + rng.choice(['left', 'middle', 'right'], n, p=[0.37, 0.23, 0.4]))
+    yards = plays['playResult'].fillna(0).astype(int)
+    spot = plays['defensiveTeam'].astype(str) + ' ' + (yards_to_goal - yards).clip(1, 49).astype(str)
+    gain = np.where(yards == 0, 'for no gain', 'for ' + yards.astype(str) + ' yards')
+    touchdown = (plays['passResult'].eq('C') & (yards >= yards_to_goal)).to_numpy()
+
+    result = plays['passResult'].to_numpy()
+    description = np.select(
+        [result == 'C', result == 'I', result == 'S', result == 'IN'],
+        [passer + ' pass ' + throw + ' to ' + target + ' to ' + spot + ' ' + gain + ' (' + defender + ').',
+         passer + ' pass incomplete ' + throw + ' to ' + target + '.',
+         passer + ' sacked at ' + spot + ' ' + gain + ' (' + defender + ').',
+         passer + ' pass ' + throw + ' intended for ' + target + ' INTERCEPTED by ' + defender
+         + ' at ' + spot + '. ' + defender + ' to ' + spot + ' for no gain (' + target + ').'],
+        passer + ' scrambles ' + rng.choice(['left end', 'right end', 'up the middle'], n) + ' to ' + spot + ' ' + gain
+        + ' (' + defender + ').',
+    )
+    description = pd.Series(description, index=plays.index)
+    description[touchdown] = (prefix[touchdown] + passer[touchdown] + ' pass ' + throw[touchdown] + ' to '
+                              + target[touchdown] + ' for ' + yards[touchdown].astype(str) + ' yards, TOUCHDOWN.')
+    description[~touchdown] = prefix[~touchdown] + description[~touchdown]
+    fouled = plays['foulName1'].notna()
+    description[fouled] += (' PENALTY on ' + plays['defensiveTeam'][fouled].astype(str) + '-' + defender[fouled]
+                            + ', ' + plays['foulName1'][fouled] + ', 10 yards, enforced at ' + spot[fouled] + '.')
+    return description
+
+
+def generate_plays(rng, games, player_ids, plays_per_game=PLAYS_PER_GAME):
+    """回合表：每场比赛按节次和比赛时钟顺序生成，字段与真实 plays.csv 相同"""
+    counts = np.maximum(rng.poisson(plays_per_game, len(games)), 1)
+    n = int(counts.sum())
+    game_index = np.repeat(np.arange(len(games)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    position = (np.arange(n) - starts) / np.repeat(counts, counts)
+
+    play_id = (np.arange(n) - starts) * 60 + 50 + rng.integers(0, 40, n)
+    quarter = np.minimum((position * 4).astype(int) + 1, 4)
+    overtime = np.repeat(rng.random(len(games)) < 0.06, counts) & (position > 0.97)
+    quarter[overtime] = 5
+    seconds = (900 * (1 - (position * 4 - (quarter - 1)))).clip(0, 900).astype(int)
+    seconds[overtime] = rng.integers(0, 600, overtime.sum())
+
+    # 球权大约每6个回合交换一次
+    home_possession = ((np.arange(n) - starts) // 6 + np.repeat(rng.integers(0, 2, len(games)), counts)) % 2 == 0
+    home = games['homeTeamAbbr'].to_numpy(dtype=object)[game_index]
+    visitor = games['visitorTeamAbbr'].to_numpy(dtype=object)[game_index]
+    offense = np.where(home_possession, home, visitor)
+    defense = np.where(home_possession, visitor, home)
+
+    pass_result = _choice(rng, PASS_RESULTS, n)
+    yards_to_goal = rng.integers(1, 100, n)
+    play_result = np.select(
+        [pass_result == 'C', pass_result == 'S', pass_result == 'R'],
+        [np.clip(rng.gamma(1.6, 7, n).round(), -5, yards_to_goal),
+         -np.clip(rng.normal(7, 3, n).round(), 0, 20),
+         np.clip(rng.normal(6, 5, n).round(), -3, yards_to_goal)],
+        0,
+    ).astype(int)
+
+    # 码线：己方半场以进攻方为 yardlineSide，对方半场以防守方为 yardlineSide，50码线无归属
+    own_half = yards_to_goal > 50
+    yardline_number = np.where(own_half, 100 - yards_to_goal, yards_to_goal)
+    yardline_side = np.where(own_half, offense, defense).astype(object)
+    yardline_side[yards_to_goal == 50] = None
+    plays_right = np.repeat(rng.random(len(games)) < 0.5, counts) ^ (quarter % 2 == 0)
+    absolute_yardline = np.where(plays_right, 110 - yards_to_goal, 10 + yards_to_goal)
+
+    # 比分随回合推进单调增加
+    scored = rng.random(n) < 0.06
+    points = np.where(scored, rng.choice([3, 7], n, p=[0.45, 0.55]), 0)
+    game_points = pd.DataFrame({'game': game_index, 'home': np.where(home_possession, points, 0),
+                                'visitor': np.where(home_possession, 0, points)})
+    home_score = (game_points.groupby('game')['home'].cumsum() - game_points['home']).to_numpy()
+    visitor_score = (game_points.groupby('game')['visitor'].cumsum() - game_points['visitor']).to_numpy()
+
+    coverage = _choice(rng, COVERAGES, n)
+    plays = pd.DataFrame({
+        'gameId': games['gameId'].to_numpy()[game_index],
+        'playId': play_id,
+        'quarter': quarter,
+        'down': _choice(rng, DOWNS, n).astype(int),
+        'yardsToGo': np.clip(rng.gamma(2.5, 3.5, n).round(), 1, 30).astype(int),
+        'possessionTeam': offense,
+        'defensiveTeam': defense,
+        'yardlineSide': yardline_side,
+        'yardlineNumber': yardline_number,
+        'gameClock': [f"{s // 60:02d}:{s % 60:02d}" for s in seconds],
+        'preSnapHomeScore': home_score,
+        'preSnapVisitorScore': visitor_score,
+        'passResult': pass_result,
+        'penaltyYards': np.nan,
+        'prePenaltyPlayResult': play_result,
+        'playResult': play_result,
+    })
+    for number, rate in enumerate(FOUL_RATES, start=1):
+        fouled = rng.random(n) < rate
+        plays[f'foulName{number}'] = np.where(fouled, _choice(rng, FOULS, n), None)
+        plays[f'foulNFLId{number}'] = pd.array(np.where(fouled, rng.choice(player_ids, n), 0), dtype='Int32')
+        plays.loc[~fouled, f'foulNFLId{number}'] = pd.NA
+    plays['absoluteYardlineNumber'] = absolute_yardline
+    plays['offenseFormation'] = _choice(rng, FORMATIONS, n)
+    plays['personnelO'] = _choice(rng, PERSONNEL_O, n)
+    plays['defendersInBox'] = np.clip(rng.normal(6, 1, n).round(), 1, 11).astype(int)
+    plays['personnelD'] = _choice(rng, PERSONNEL_D, n)
+    plays['dropBackType'] = _choice(rng, DROPBACK_TYPES, n)
+    plays['pff_playAction'] = (rng.random(n) < 0.25).astype(int)
+    plays['pff_passCoverage'] = coverage
+    plays['pff_passCoverageType'] = pd.Series(coverage).map(COVERAGE_TYPES).to_numpy()
+    plays.insert(2, 'playDescription', _describe_plays(rng, plays, yards_to_goal))
+    return plays
+
+
+def generate_scouting(rng, plays, player_ids):
+    """球探表：每个回合按模板生成22名球员的角色、站位和压迫/护传指标"""
+    roles = np.array([role for role, _ in SCOUTING_TEMPLATE], dtype=object)
+    lined_up = np.array([position for _, position in SCOUTING_TEMPLATE], dtype=object)
+    per_play = len(SCOUTING_TEMPLATE)
+    n = len(plays) * per_play
+
+    role = np.tile(roles, len(plays))
+    rush = role == 'Pass Rush'
+    block = role == 'Pass Block'
+
+    def flag(mask, rate):
+        values = pd.array(np.where(rng.random(n) < rate, 1, 0), dtype='Int8')
+        values[~mask] = pd.NA
+        return values
+
+    blocked = pd.array(rng.choice(player_ids, n), dtype='Int32')
+    blocked[~block] = pd.NA
+    return pd.DataFrame({
+        'gameId': np.repeat(plays['gameId'].to_numpy(), per_play),
+        'playId': np.repeat(plays['playId'].to_numpy(), per_play),
+        'nflId': rng.choice(player_ids, n),
+        'pff_role': role,
+        'pff_positionLinedUp': np.tile(lined_up, len(plays)),
+        'pff_hit': flag(rush, 0.03),
+        'pff_hurry': flag(rush, 0.08),
+        'pff_sack': flag(rush, 0.02),
+        'pff_beatenByDefender': flag(block, 0.03),
+        'pff_hitAllowed': flag(block, 0.02),
+        'pff_hurryAllowed': flag(block, 0.05),
+        'pff_sackAllowed': flag(block, 0.01),
+        'pff_nflIdBlockedPlayer': blocked,
+        'pff_blockType': np.where(block, rng.choice(BLOCK_TYPES, n), None),
+        'pff_backFieldBlock': flag(block, 0.0),
+    })
+
+
+def write_dataset(out_dir, n_plays, seed=0, scouting_per_play=SCOUTING_PER_PLAY, report=print):
+    """生成约 n_plays 个回合的完整数据集并写入 out_dir，返回各表文件路径
+
+    plays 与球探数据按比赛分块生成并追加写入，按 gameId 升序排列（可直接用于流式模式），
+    生成过程的内存占用由 GAMES_PER_CHUNK 决定。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = {name: os.path.join(out_dir, file_name) for name, file_name in FILE_NAMES.items()}
+
+    players = generate_players(rng)
+    players.to_csv(paths['players'], index=False)
+    player_ids = players['nflId'].to_numpy()
+
+    games = generate_games(rng, max(n_plays // PLAYS_PER_GAME, 1))
+    games.to_csv(paths['games'], index=False)
+
+    written = 0
+    for start in range(0, len(games), GAMES_PER_CHUNK):
+        chunk_games = games.iloc[start:start + GAMES_PER_CHUNK]
+        plays = generate_plays(rng, chunk_games, player_ids)
+        header = start == 0
+        plays.to_csv(paths['plays'], index=False, header=header, mode='w' if header else 'a')
+        scouting = generate_scouting(rng, plays, player_ids)
+        if scouting_per_play < len(SCOUTING_TEMPLATE):
+            scouting = scouting[np.tile(np.arange(len(SCOUTING_TEMPLATE)) < scouting_per_play, len(plays))]
+        scouting.to_csv(paths['scouting'], index=False, header=header, mode='w' if header else 'a')
+        written += len(plays)
+        report(f"  - 已生成 {written:,} 个回合 / {len(games):,} 场比赛")
+    return paths
+
+
+def dataset_dir_name(size, seed):
+    """生成结果的目录名：按规模、随机种子与生成逻辑版本区分"""
+    return f"{size}-seed{seed}-v{DATA_VERSION}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成与真实数据schema和基数一致的合成NFL数据集')
+    parser.add_argument('size', help=f"回合数，可用预设 {', '.join(SIZES)} 或直接给出整数")
+    parser.add_argument('--out', default=None, help='输出目录（默认 .bench_data/<size>-seed<seed>）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子，相同种子生成的数据完全一致')
+    parser.add_argument('--scouting-per-play', type=int, default=SCOUTING_PER_PLAY,
+                        help='每个回合的球探记录数（最多22）')
+    args = parser.parse_args()
+    n_plays = SIZES.get(args.size.lower()) or int(args.size)
+    out_dir = args.out or os.path.join('.bench_data', dataset_dir_name(args.size.lower(), args.seed))
+    write_dataset(out_dir, n_plays, args.seed, args.scouting_per_play)
+    print(f"数据已写入 {out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# 各模块位于仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_data import write_dataset  # noqa: E402
+
+# 测试数据集的回合数（约40场比赛），足以覆盖跨块比赛、推进与情境立方体
+SMALL_PLAYS = 3000
+# 流式测试的块大小：回合与球探数据都会被切成多块
+STREAM_CHUNK_SIZE = 1000
+
+
+@pytest.fixture(scope='session')
+def dataset_dir(tmp_path_factory):
+    """按gameId升序生成的小型合成数据集，文件名与 nfl_app.DATA_FILES 一致"""
+    out_dir = tmp_path_factory.mktemp('data')
+    write_dataset(str(out_dir), SMALL_PLAYS, seed=0, report=lambda *args: None)
+    return out_dir
+
+
+@pytest.fixture
+def in_dataset_dir(dataset_dir, monkeypatch):
+    """切换到数据集目录（nfl_app 按相对路径读取数据文件）"""
+    monkeypatch.chdir(dataset_dir)
+    return dataset_dir
+
+
+def sorted_part(df):
+    columns = list(df.columns)
+    return df[columns].sort_values(columns).reset_index(drop=True)
+
+
+def assert_cubes_equal(actual, expected, parts=None):
+    """逐部分比较两个立方体的单元（与行顺序和分类类别无关）"""
+    for part in parts or expected:
+        left = sorted_part(actual[part][list(expected[part].columns)])
+        right = sorted_part(expected[part])
+        pd.testing.assert_frame_equal(left, right, check_dtype=False, check_categorical=False, obj=part)
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from conftest import STREAM_CHUNK_SIZE, assert_cubes_equal
+from cube import build_pass_cube
+from data_cache import DataCache
+from nfl_app import (PASS_SOURCES, load_ep_table, load_merged, load_pass_cube, load_source_table,
+                     load_streaming_cube)
+
+
+def load_full_cube(cache):
+    merged_df = load_merged(cache, *(load_source_table(cache, name) for name in PASS_SOURCES))
+    ep_table = load_ep_table(cache, merged_df)
+    return merged_df, ep_table, load_pass_cube(cache, merged_df, ep_table)
+
+
+def test_normal_build_does_not_reuse_streamed_cube(in_dataset_dir, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cache = DataCache(cache_dir)
+    streamed = load_streaming_cube(cache, load_source_table(cache, 'games'), STREAM_CHUNK_SIZE)
+    assert streamed['situations'].empty
+
+    # 下一次以常规模式启动：必须重新构建包含情境部分的完整立方体
+    merged_df, ep_table, cube = load_full_cube(DataCache(cache_dir))
+    assert ep_table is not None
+    assert not cube['situations'].empty
+    assert_cubes_equal(cube, build_pass_cube(merged_df, ep_table))
+
+
+def test_warm_cache_matches_cold_cache(in_dataset_dir, tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    cold = load_full_cube(DataCache(cache_dir))
+    cold_stream = load_streaming_cube(DataCache(cache_dir), load_source_table(None, 'games'), STREAM_CHUNK_SIZE)
+    capsys.readouterr()
+
+    cache = DataCache(cache_dir)
+    warm = load_full_cube(cache)
+    warm_stream = load_streaming_cube(cache, load_source_table(cache, 'games'), STREAM_CHUNK_SIZE)
+    output = capsys.readouterr().out
+    assert '缓存命中' in output and '缓存未命中' not in output
+
+    pd.testing.assert_frame_equal(warm[0], cold[0])
+    pd.testing.assert_frame_equal(warm[1], cold[1])
+    for part in cold[2]:
+        pd.testing.assert_frame_equal(warm[2][part], cold[2][part], obj=part)
+    for part in cold_stream:
+        pd.testing.assert_frame_equal(warm_stream[part], cold_stream[part], obj=part)
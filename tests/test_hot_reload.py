@@ -0,0 +1,154 @@
+import asyncio
+import shutil
+
+import pandas as pd
+import pytest
+
+from hot_reload import HotReloader, LiveDataset
+from nfl_app import DATA_FILES, PASS_SOURCES, load_merged, load_source_table, populate_dataset, update_player_fouls
+from player_index import PlayerIndex, collect_fouls
+from scouting import PLAY_KEYS
+
+from conftest import assert_cubes_equal
+from cube import build_pass_cube
+
+
+@pytest.fixture
+def live_dir(dataset_dir, tmp_path, monkeypatch):
+    """数据集的可修改副本"""
+    for file_name in DATA_FILES.values():
+        shutil.copy(dataset_dir / file_name, tmp_path / file_name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def load_dataset():
+    dataset = LiveDataset()
+    asyncio.run(populate_dataset(dataset, None))
+    return dataset
+
+
+def full_reload():
+    return load_merged(None, *(load_source_table(None, name) for name in PASS_SOURCES))
+
+
+def read_csv(name):
+    return pd.read_csv(DATA_FILES[name], dtype={'foulNFLId1': 'Int32', 'foulNFLId2': 'Int32', 'foulNFLId3': 'Int32'})
+
+
+def append_rows(name, rows):
+    rows.to_csv(DATA_FILES[name], mode='a', header=False, index=False)
+
+
+def copy_game(game_id, new_game_id):
+    """把一场比赛的回合、比赛信息和球探记录以新的gameId追加到各文件末尾"""
+    for name in ('games', 'plays', 'scouting'):
+        df = read_csv(name)
+        append_rows(name, df[df['gameId'] == game_id].assign(gameId=new_game_id))
+
+
+def assert_matches_full_reload(dataset):
+    expected = full_reload()
+    actual = dataset.merged_df
+    assert list(actual.columns) == list(expected.columns)
+    assert [str(dtype) for dtype in actual.dtypes] == [str(dtype) for dtype in expected.dtypes]
+    assert actual[PLAY_KEYS].equals(actual[PLAY_KEYS].sort_values(PLAY_KEYS, ignore_index=True))
+    pd.testing.assert_frame_equal(actual, expected.sort_values(PLAY_KEYS, ignore_index=True),
+                                  check_dtype=False, check_categorical=False)
+    assert_cubes_equal(dataset.pass_cube, build_pass_cube(expected, dataset.ep_table))
+
+
+def test_append_and_rewrite_match_full_reload(live_dir):
+    reloader = HotReloader(LiveDataset(), DATA_FILES, report=lambda *args: None)
+    reloader.dataset = dataset = load_dataset()
+    games = read_csv('games')['gameId']
+
+    # 全新比赛追加到文件末尾（gameId最大）
+    copy_game(games.iloc[0], games.max() + 1)
+    assert reloader.poll()
+    assert_matches_full_reload(dataset)
+
+    # 已有比赛追加回合
+    plays = read_csv('plays')
+    middle = games.iloc[len(games) // 2]
+    extra = plays[plays['gameId'] == middle].tail(3).assign(playId=lambda df: df['playId'] + 5000)
+    append_rows('plays', extra)
+    assert reloader.poll()
+    assert_matches_full_reload(dataset)
+
+    # 改写已有比赛的回合
+    plays = read_csv('plays')
+    plays.loc[plays['gameId'] == games.iloc[1], 'playResult'] += 1
+    plays.to_csv(DATA_FILES['plays'], index=False)
+    assert reloader.poll()
+    assert_matches_full_reload(dataset)
+
+
+def test_scouting_before_plays_is_merged_when_plays_arrive(live_dir):
+    reloader = HotReloader(LiveDataset(), DATA_FILES, report=lambda *args: None)
+    reloader.dataset = dataset = load_dataset()
+    games = read_csv('games')
+    new_game = games['gameId'].max() + 1
+    source = games['gameId'].iloc[2]
+    append_rows('games', games[games['gameId'] == source].assign(gameId=new_game))
+    scouting = read_csv('scouting')
+    append_rows('scouting', scouting[scouting['gameId'] == source].assign(gameId=new_game))
+    assert reloader.poll()
+    assert reloader.pending_scouting is not None
+
+    plays = read_csv('plays')
+    append_rows('plays', plays[plays['gameId'] == source].assign(gameId=new_game))
+    assert reloader.poll()
+    assert reloader.pending_scouting is None
+    assert_matches_full_reload(dataset)
+
+
+def test_plays_of_unknown_game_match_full_reload(live_dir):
+    # 比赛表中还没有的比赛：合并后比赛信息列全为缺失，整数列与全量加载一样变为浮点
+    reloader = HotReloader(LiveDataset(), DATA_FILES, report=lambda *args: None)
+    reloader.dataset = dataset = load_dataset()
+    games = read_csv('games')['gameId']
+    plays = read_csv('plays')
+    append_rows('plays', plays[plays['gameId'] == games.iloc[0]].assign(gameId=games.max() + 1))
+    assert reloader.poll()
+    assert_matches_full_reload(dataset)
+
+
+def test_change_during_startup_is_picked_up(live_dir):
+    # 快照在加载前记录；加载期间（此处为加载前）追加的比赛在第一次轮询时处理且不会重复累加
+    dataset = LiveDataset()
+    reloader = HotReloader(dataset, DATA_FILES, report=lambda *args: None)
+    games = read_csv('games')['gameId']
+    copy_game(games.iloc[0], games.max() + 1)
+    asyncio.run(populate_dataset(dataset, None))
+    assert reloader.poll()
+    assert_matches_full_reload(dataset)
+
+
+def poll_and_update_fouls(reloader):
+    """与应用中的 on_update 相同：每次更新后只刷新受影响比赛的犯规"""
+    dataset = reloader.dataset
+    assert reloader.poll()
+    dataset.player_stats, dataset.player_index = update_player_fouls(dataset, reloader.updated_games)
+
+
+def test_player_fouls_follow_updated_games(live_dir):
+    reloader = HotReloader(LiveDataset(), DATA_FILES, report=lambda *args: None)
+    reloader.dataset = dataset = load_dataset()
+    plays = read_csv('plays')
+    fouled = plays[plays['foulNFLId1'].notna()]
+    # 改写文件撤销一场比赛的犯规，另追加一场有犯规的新比赛
+    game = fouled['gameId'].iloc[0]
+    plays.loc[plays['gameId'] == game, ['foulName1', 'foulNFLId1']] = None
+    plays.to_csv(DATA_FILES['plays'], index=False)
+    poll_and_update_fouls(reloader)
+    copy_game(fouled['gameId'].iloc[-1], read_csv('games')['gameId'].max() + 1)
+    poll_and_update_fouls(reloader)
+
+    player_stats, player_index = dataset.player_stats, dataset.player_index
+    expected_fouls = collect_fouls(dataset.merged_df)
+    pd.testing.assert_frame_equal(player_stats['fouls'], expected_fouls)
+    expected = PlayerIndex(dataset.players_df, {**player_stats, 'fouls': expected_fouls})
+    assert [(r['nflId'], n) for r, n in player_index.foul_leaders] == [(r['nflId'], n) for r, n in expected.foul_leaders]
+    for nfl_id in expected_fouls['nflId'].unique():
+        assert player_index.get(nfl_id) == expected.get(nfl_id)
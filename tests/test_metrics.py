@@ -0,0 +1,43 @@
+import pandas as pd
+
+from cube import build_pass_cube, query_pass_metrics
+from metrics import compute_pass_metrics
+from nfl_app import PASS_SOURCES, load_merged, load_source_table
+
+
+def play(team, result, description, yards=0):
+    return {'gameId': 2021090900, 'season': 2021, 'week': 1, 'quarter': 1, 'possessionTeam': team,
+            'defensiveTeam': 'DEF', 'passResult': result, 'playResult': yards, 'playDescription': description}
+
+
+def test_touchdown_and_interception_counts():
+    plays = pd.DataFrame([
+        play('A', 'C', 'J.Doe pass short left to R.Roe for 12 yards, TOUCHDOWN.', 12),
+        play('A', 'C', 'J.Doe pass short left to R.Roe for 5 yards, TOUCHDOWN. The Replay Official reviewed '
+                       'the play, and the play was REVERSED.', 5),
+        play('A', 'C', 'J.Doe pass short right to R.Roe to DEF 20 for 10 yards. FUMBLES (D.Def), '
+                       'RECOVERED by DEF-X.Def at DEF 25. X.Def for 75 yards, TOUCHDOWN.', 10),
+        play('A', 'C', 'J.Doe pass deep left to R.Roe to DEF 2 for 30 yards. FUMBLES (D.Def), '
+                       'RECOVERED by A-T.Mate at DEF 1. T.Mate for 1 yard, TOUCHDOWN.', 31),
+        play('B', 'IN', 'K.Poe pass short middle intended for S.Loe INTERCEPTED by D.Def at B 30. '
+                        'D.Def for 30 yards, TOUCHDOWN.', 0),
+        play('B', 'IN', 'K.Poe pass deep right intended for S.Loe INTERCEPTED by D.Def at DEF 10.', 0),
+        play('B', 'S', 'K.Poe sacked at B 20 for -8 yards (D.Def). FUMBLES (D.Def), RECOVERED by DEF-D.Def '
+                       'at B 15. D.Def for 15 yards, TOUCHDOWN.', -8),
+        play('B', 'I', 'K.Poe pass incomplete short left to S.Loe.', 0),
+        play('B', 'unknown', 'K.Poe scrambles for 20 yards, TOUCHDOWN.', 20),
+    ])
+    by_team = compute_pass_metrics(plays)['by_team'].set_index('possessionTeam')
+    # A：正常达阵与进攻方抢回掉球后的达阵；被改判与防守方回攻的达阵不计
+    assert by_team.loc['A', ['plays', 'touchdowns', 'interceptions']].tolist() == [4, 2, 0]
+    # B：拦截回攻达阵、擒杀掉球回攻达阵不计为传球达阵；未知结果的回合不计入
+    assert by_team.loc['B', ['plays', 'touchdowns', 'interceptions', 'sacks']].tolist() == [4, 0, 2, 1]
+
+
+def test_cube_counts_match_play_level_metrics(in_dataset_dir):
+    merged_df = load_merged(None, *(load_source_table(None, name) for name in PASS_SOURCES))
+    expected = compute_pass_metrics(merged_df)['by_team'].set_index('possessionTeam')
+    actual = query_pass_metrics(build_pass_cube(merged_df))['by_team'].set_index('possessionTeam')
+    columns = ['plays', 'touchdowns', 'interceptions']
+    assert expected['touchdowns'].sum() > 0 and expected['interceptions'].sum() > 0
+    pd.testing.assert_frame_equal(actual.loc[expected.index, columns], expected[columns], check_dtype=False)
@@ -0,0 +1,19 @@
+import pytest
+
+from conftest import STREAM_CHUNK_SIZE, assert_cubes_equal
+from cube import build_pass_cube
+from nfl_app import DATA_FILES, PASS_SOURCES, load_merged, load_source_table
+from streaming import stream_pass_cube
+
+# 流式立方体不含情境部分，其余各部分应与内存中构建的立方体一致
+STREAM_PARTS = ['facts', 'yards', 'tactics', 'drives']
+
+
+@pytest.mark.parametrize('chunk_size', [STREAM_CHUNK_SIZE, 333, 10 ** 6])
+def test_streamed_cube_matches_in_memory_cube(in_dataset_dir, chunk_size):
+    games_df = load_source_table(None, 'games')
+    streamed = stream_pass_cube(DATA_FILES['plays'], DATA_FILES['scouting'], games_df,
+                                chunk_size=chunk_size, report=lambda *args: None)
+    merged_df = load_merged(None, *(load_source_table(None, name) for name in PASS_SOURCES))
+    assert_cubes_equal(streamed, build_pass_cube(merged_df), STREAM_PARTS)
+    assert streamed['situations'].empty